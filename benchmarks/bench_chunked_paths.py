@@ -0,0 +1,82 @@
+"""
+基准测试：多路径推理的分块执行 (内存预算) vs 一次性解码全部路径。
+
+auto_regressive_inference 的每条路径各自持有 KV 缓存, 内存随 batch × sample_count 线性增长。
+设置 max_memory_mb 后路径按预算分块解码并流式累加均值, 峰值内存由预算决定。
+两种模式分别在独立子进程中运行, 报告耗时与进程峰值内存 (RSS)。
+
+用法:
+    python benchmarks/bench_chunked_paths.py
+    python benchmarks/bench_chunked_paths.py --samples 64 --budget-mb 512
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+from benchmarks.bench_onnx import peak_rss_mb
+
+
+def child(samples: int, budget_mb: float):
+    """子进程: 用给定预算 (<= 0 表示不限) 跑一次预测, 结果以 JSON 打印到 stdout。"""
+    from benchmarks.common import build_random_models, synthetic_window
+    from model import KronosPredictor
+    from model.kronos import path_memory_bytes
+    from src.config import DEFAULT_TEMPERATURE, DEFAULT_TOP_P, INPUT_WINDOW, MAX_CONTEXT, OUTPUT_WINDOW
+
+    tokenizer, model = build_random_models()
+    predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=MAX_CONTEXT,
+                                max_memory_mb=budget_mb if budget_mb > 0 else None)
+    x_df, x_ts, y_ts = synthetic_window(INPUT_WINDOW, OUTPUT_WINDOW)
+    baseline_mb = peak_rss_mb()
+
+    start = time.perf_counter()
+    predictor.predict(x_df, x_ts, y_ts, OUTPUT_WINDOW, T=DEFAULT_TEMPERATURE, top_p=DEFAULT_TOP_P,
+                      sample_count=samples, verbose=False, seed=0)
+    seconds = time.perf_counter() - start
+
+    per_path_mb = path_memory_bytes(tokenizer, model, INPUT_WINDOW + OUTPUT_WINDOW, MAX_CONTEXT) / 2 ** 20
+    print(json.dumps({
+        "seconds": seconds,
+        "rss_mb": peak_rss_mb(),
+        "baseline_mb": baseline_mb,
+        "per_path_mb": per_path_mb,
+    }))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=32, help="采样路径数")
+    parser.add_argument("--budget-mb", type=float, default=512, help="分块模式的内存预算 (MB)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--child-budget", type=float, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.samples, args.child_budget)
+        return
+
+    results = {}
+    for label, budget in (("一次性", 0), (f"预算 {args.budget_mb:.0f} MB", args.budget_mb)):
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", "--samples", str(args.samples), "--child-budget", str(budget)],
+            check=True, capture_output=True, text=True, cwd=ROOT,
+        ).stdout
+        results[label] = json.loads(out.strip().splitlines()[-1])
+
+    per_path = next(iter(results.values()))["per_path_mb"]
+    print("=" * 64)
+    print(f"  {args.samples} 条路径 (随机权重 base 结构, 估算每条路径 {per_path:.0f} MB)")
+    print("=" * 64)
+    print(f"{'模式':>14} | {'耗时 (s)':>8} | {'峰值 RSS (MB)':>13} | {'推理增量 (MB)':>13}")
+    for label, r in results.items():
+        print(f"{label:>14} | {r['seconds']:>8.2f} | {r['rss_mb']:>13.0f} | {r['rss_mb'] - r['baseline_mb']:>13.0f}")
+
+
+if __name__ == "__main__":
+    main()
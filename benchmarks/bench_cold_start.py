@@ -0,0 +1,87 @@
+"""
+基准测试：冷启动 — from_pretrained vs mmap 加载 (model.loading.load_pretrained)。
+
+随机权重 (base 结构) 先用 save_pretrained 保存为 safetensors, 再在两个独立子进程中分别加载,
+报告: 加载耗时、首次预测耗时 (含权重换入) 与二者之和 (部署后首个预测的等待时间)。
+
+用法:
+    python benchmarks/bench_cold_start.py
+    python benchmarks/bench_cold_start.py --weights-dir /tmp/kronos_weights   # 复用已有保存
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+
+def child(loader: str, weights_dir: str):
+    """子进程: 用指定方式加载并跑一次预测, 结果以 JSON 打印到 stdout。"""
+    from benchmarks.common import synthetic_window
+    from model import Kronos, KronosPredictor, KronosTokenizer
+    from model.loading import load_pretrained
+    from src.config import DEFAULT_TEMPERATURE, DEFAULT_TOP_P, INPUT_WINDOW, MAX_CONTEXT, OUTPUT_WINDOW
+
+    start = time.perf_counter()
+    if loader == "mmap":
+        tokenizer = load_pretrained(KronosTokenizer, os.path.join(weights_dir, "tokenizer"))
+        model = load_pretrained(Kronos, os.path.join(weights_dir, "model"))
+    else:
+        tokenizer = KronosTokenizer.from_pretrained(os.path.join(weights_dir, "tokenizer"))
+        model = Kronos.from_pretrained(os.path.join(weights_dir, "model"))
+    predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=MAX_CONTEXT)
+    load_seconds = time.perf_counter() - start
+
+    x_df, x_ts, y_ts = synthetic_window(INPUT_WINDOW, OUTPUT_WINDOW)
+    start = time.perf_counter()
+    predictor.predict(x_df, x_ts, y_ts, OUTPUT_WINDOW, T=DEFAULT_TEMPERATURE, top_p=DEFAULT_TOP_P,
+                      sample_count=1, verbose=False)
+    print(json.dumps({"load": load_seconds, "first": time.perf_counter() - start}))
+
+
+def save(weights_dir: str):
+    from benchmarks.common import build_random_models
+
+    tokenizer, model = build_random_models()
+    tokenizer.save_pretrained(os.path.join(weights_dir, "tokenizer"))
+    model.save_pretrained(os.path.join(weights_dir, "model"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--weights-dir", default=None, help="已保存的权重目录 (默认保存到临时目录)")
+    parser.add_argument("--child", choices=["from_pretrained", "mmap"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.weights_dir)
+        return
+
+    weights_dir = args.weights_dir or tempfile.mkdtemp(prefix="kronos_weights_")
+    if not os.path.exists(os.path.join(weights_dir, "model", "model.safetensors")):
+        print(f"保存随机权重到 {weights_dir} ...")
+        save(weights_dir)
+
+    results = {}
+    for loader in ("from_pretrained", "mmap"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", loader, "--weights-dir", weights_dir],
+            check=True, capture_output=True, text=True, cwd=ROOT,
+        ).stdout
+        results[loader] = json.loads(out.strip().splitlines()[-1])
+
+    print("=" * 60)
+    print("  冷启动 (随机权重 base 结构, 权重文件已在页缓存中)")
+    print("=" * 60)
+    print(f"{'加载方式':>16} | {'加载 (s)':>8} | {'首次预测 (s)':>11} | {'合计 (s)':>8}")
+    for loader, r in results.items():
+        print(f"{loader:>16} | {r['load']:>8.2f} | {r['first']:>11.2f} | {r['load'] + r['first']:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
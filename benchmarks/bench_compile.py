@@ -0,0 +1,80 @@
+"""
+基准测试：单步解码 eager vs torch.compile。
+
+自回归推理中, 预填充之后的每一步都是同一段计算:
+embedding → Transformer 堆叠 → s1 头 → 采样 → 依赖感知层 → s2 头 → 采样。
+本脚本在同一 KV 缓存长度下测量该步骤的中位延迟, 并报告编译 (或从磁盘缓存加载) 耗时。
+第二次运行会命中 --cache-dir 中的编译产物, 可对比冷/热启动的编译耗时。
+
+用法:
+    python benchmarks/bench_compile.py
+    python benchmarks/bench_compile.py --batch-sizes 1 5 --steps 30
+"""
+import argparse
+import copy
+import os
+import statistics
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import torch
+
+from benchmarks.common import build_random_models
+from model.compiled import compile_decode_step
+from model.module import share_rotary_embeddings
+from src.config import COMPILE_CACHE_DIR, DEFAULT_TEMPERATURE, DEFAULT_TOP_P, INPUT_WINDOW, MAX_CONTEXT
+
+
+def step_latency(model, batch_size, history_len, steps):
+    """在长度为 history_len 的缓存之后连续解码 steps 步, 返回单步延迟中位数 (秒)。"""
+    torch.manual_seed(0)
+    vocab = 2 ** model.s1_bits
+    s1_ids = torch.randint(0, vocab, (batch_size, history_len))
+    s2_ids = torch.randint(0, vocab, (batch_size, history_len))
+    stamp = torch.randint(0, 5, (batch_size, history_len + steps, 5)).float()
+    cache = model.new_kv_cache()
+    model.prefill(s1_ids, s2_ids, cache, stamp=stamp[:, :history_len])
+
+    pre, post = s1_ids[:, -1:], s2_ids[:, -1:]
+    timings = []
+    for i in range(steps):
+        pos = slice(history_len + i, history_len + i + 1)
+        start = time.perf_counter()
+        pre, post = model.decode_step(pre, post, stamp[:, pos], cache,
+                                      temperature=DEFAULT_TEMPERATURE, top_k=0, top_p=DEFAULT_TOP_P)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings[1:])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 5], help="batch_size * sample_count")
+    parser.add_argument("--steps", type=int, default=24, help="计时的解码步数")
+    parser.add_argument("--cache-dir", default=str(COMPILE_CACHE_DIR), help="编译产物缓存目录")
+    args = parser.parse_args()
+
+    torch.set_grad_enabled(False)
+    _, model = build_random_models()
+    share_rotary_embeddings(model, max_len=MAX_CONTEXT)
+    compiled = copy.deepcopy(model)
+    warmup = sorted(set(min(b, 2) for b in args.batch_sizes))
+    report = compile_decode_step(compiled, cache_dir=args.cache_dir, max_len=MAX_CONTEXT, warmup_batch_sizes=warmup)
+
+    print("=" * 60)
+    state = "命中磁盘缓存" if report["cache_loaded"] else "冷启动"
+    print(f"  编译: {'成功' if report['compiled'] else '失败, 回退 eager'} ({state}, {report['seconds']:.1f} s)")
+    if report["error"]:
+        print(f"  错误: {report['error']}")
+    print(f"  单步解码延迟 (缓存长度 {INPUT_WINDOW}, 中位数)")
+    print("=" * 60)
+    print(f"{'batch':>6} | {'eager (ms)':>11} | {'compiled (ms)':>14} | {'加速':>6}")
+    for batch_size in args.batch_sizes:
+        t_eager = step_latency(model, batch_size, INPUT_WINDOW, args.steps)
+        t_compiled = step_latency(compiled, batch_size, INPUT_WINDOW, args.steps)
+        print(f"{batch_size:>6} | {t_eager * 1e3:>11.1f} | {t_compiled * 1e3:>14.1f} | {t_eager / t_compiled:>5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
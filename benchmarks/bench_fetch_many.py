@@ -0,0 +1,70 @@
+"""
+基准测试：观察列表拉取 — 逐个同步 fetch_ohlcv vs AsyncDataFeed.fetch_many 并发拉取。
+
+本地模拟交易所 (tests.fake_exchange) 为每次请求注入 --latency 秒的网络延迟, 缓存为空 (每个交易对整段拉取)。
+
+用法:
+    python benchmarks/bench_fetch_many.py
+    python benchmarks/bench_fetch_many.py --symbols 20 --latency 0.3 --concurrency 8
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.async_feed import AsyncDataFeed
+from src.cache_manager import CacheManager
+from src.config import FETCH_CONCURRENCY
+from src.data_feed import DataFeed
+from tests.fake_exchange import AsyncFakeExchange, FakeExchange
+
+
+class SlowFakeExchange(FakeExchange):
+    """同步版本的延迟注入。"""
+
+    def __init__(self, symbols, latency: float):
+        super().__init__(symbols)
+        self.latency = latency
+
+    def fetch_ohlcv(self, *args, **kwargs):
+        time.sleep(self.latency)
+        return super().fetch_ohlcv(*args, **kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=20, help="观察列表中的交易对数")
+    parser.add_argument("--latency", type=float, default=0.2, help="每次请求的模拟延迟 (秒)")
+    parser.add_argument("--concurrency", type=int, default=FETCH_CONCURRENCY, help="并发请求上限")
+    args = parser.parse_args()
+    symbols = [f"COIN{i}/USDT" for i in range(args.symbols)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        feed = DataFeed(cache_manager=CacheManager(ohlcv_dir=tmp, prediction_dir=tmp),
+                        exchange=SlowFakeExchange(symbols, args.latency))
+        start = time.perf_counter()
+        for symbol in symbols:
+            feed.fetch_ohlcv(symbol)
+        t_sync = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        exchange = AsyncFakeExchange(symbols, latency=args.latency)
+        feed = AsyncDataFeed(cache_manager=CacheManager(ohlcv_dir=tmp, prediction_dir=tmp), exchange=exchange,
+                             concurrency=args.concurrency)
+        start = time.perf_counter()
+        feed.fetch_many(symbols)
+        t_async = time.perf_counter() - start
+        feed.close()
+
+    print("=" * 60)
+    print(f"  {args.symbols} 个交易对, 请求延迟 {args.latency * 1000:.0f}ms, 并发上限 {args.concurrency}")
+    print("=" * 60)
+    print(f"逐个同步拉取:      {t_sync:.2f}s")
+    print(f"fetch_many 并发:   {t_async:.2f}s  (最大并发 {exchange.max_in_flight}, 加速 {t_sync / t_async:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+基准测试：增量 OHLCV 拉取 vs 原先的 TTL 缓存 + 整段拉取。
+
+在本地模拟交易所 (tests.fake_exchange) 上模拟一个交易日的页面刷新: 每隔 --interval 秒刷新一次观察列表,
+统计向交易所请求的次数与传输的 K 线根数, 以及拉取的总耗时 (含磁盘缓存读写)。
+
+用法:
+    python benchmarks/bench_incremental_fetch.py
+    python benchmarks/bench_incremental_fetch.py --symbols 10 --interval 60
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+from unittest.mock import patch
+
+import pandas as pd
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.cache_manager import CacheManager
+from src.config import FETCH_LIMIT, TIMEFRAME
+from src.data_feed import OHLCV_COLUMNS, DataFeed
+from tests.fake_exchange import FakeExchange
+
+
+def fetch_full(feed: DataFeed, symbol: str):
+    """原先的拉取方式: 缓存超过 TTL 后整段重新拉取 limit 根。"""
+    key = f"{symbol}_{TIMEFRAME}"
+    if feed.cache_manager.get(key) is None:
+        ohlcv = feed.exchange.fetch_ohlcv(symbol, TIMEFRAME, limit=FETCH_LIMIT)
+        feed.cache_manager.set(key, pd.DataFrame(ohlcv, columns=OHLCV_COLUMNS))
+
+
+def simulate(symbols, incremental: bool, interval: int, hours: int):
+    """返回 (请求次数, K 线根数, 总耗时秒)。"""
+    exchange = FakeExchange(symbols=symbols)
+    with tempfile.TemporaryDirectory() as tmp:
+        feed = DataFeed(cache_manager=CacheManager(ohlcv_dir=tmp, prediction_dir=tmp), exchange=exchange)
+        start = 1_700_000_000 // 3600 * 3600
+        elapsed = 0.0
+        for now in range(start, start + hours * 3600, interval):
+            with patch("time.time", return_value=float(now)):
+                for symbol in symbols:
+                    t0 = time.perf_counter()
+                    if incremental:
+                        feed.fetch_ohlcv(symbol, TIMEFRAME, limit=FETCH_LIMIT)
+                    else:
+                        fetch_full(feed, symbol)
+                    elapsed += time.perf_counter() - t0
+    return len(exchange.calls), sum(call["rows"] for call in exchange.calls), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=5, help="观察列表中的交易对数")
+    parser.add_argument("--interval", type=int, default=120, help="刷新间隔 (秒)")
+    parser.add_argument("--hours", type=int, default=24, help="模拟时长 (小时)")
+    args = parser.parse_args()
+
+    symbols = [f"COIN{i}/USDT" for i in range(args.symbols)]
+    print("=" * 64)
+    print(f"  {args.symbols} 个交易对, 每 {args.interval}s 刷新, 模拟 {args.hours}h, limit={FETCH_LIMIT}")
+    print("=" * 64)
+    print(f"{'模式':>10} | {'请求次数':>8} | {'K 线根数':>10} | {'耗时 (s)':>8}")
+    for label, incremental in (("TTL+整段", False), ("增量拉取", True)):
+        calls, rows, elapsed = simulate(symbols, incremental, args.interval, args.hours)
+        print(f"{label:>10} | {calls:>8} | {rows:>10} | {elapsed:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+基准测试：PyTorch 后端 vs ONNX Runtime 后端。
+
+用随机权重 (base 结构) 导出 ONNX, 再在两个独立子进程中分别加载两种后端, 报告:
+导入耗时 (ONNX 服务路径不导入 torch)、加载耗时、单次预测耗时与进程峰值内存 (RSS)。
+
+用法:
+    python benchmarks/bench_onnx.py
+    python benchmarks/bench_onnx.py --samples 5 --onnx-dir /tmp/kronos_onnx   # 复用已有导出
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(ROOT)
+
+
+def peak_rss_mb() -> float:
+    """本进程峰值常驻内存 (VmHWM); ru_maxrss 会继承 fork 前父进程的峰值, 不适合子进程对比。"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+
+def child(backend: str, onnx_dir: str, samples: int, repeat: int):
+    """子进程: 只加载一种后端并计时, 结果以 JSON 打印到 stdout。"""
+    start = time.perf_counter()
+    if backend == "onnx":
+        from src.onnx_backend import OnnxKronosPredictor
+    else:
+        from benchmarks.common import build_random_models
+        from model import KronosPredictor
+    import_seconds = time.perf_counter() - start
+
+    from benchmarks.common import synthetic_window
+    from src.config import DEFAULT_TEMPERATURE, DEFAULT_TOP_P, INPUT_WINDOW, MAX_CONTEXT, OUTPUT_WINDOW
+
+    start = time.perf_counter()
+    if backend == "onnx":
+        predictor = OnnxKronosPredictor(onnx_dir, seed=0)
+    else:
+        tokenizer, model = build_random_models()
+        predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=MAX_CONTEXT)
+    load_seconds = time.perf_counter() - start
+
+    x_df, x_ts, y_ts = synthetic_window(INPUT_WINDOW, OUTPUT_WINDOW)
+    best = float("inf")
+    for _ in range(repeat + 1):  # 首次为预热
+        start = time.perf_counter()
+        predictor.predict(x_df, x_ts, y_ts, OUTPUT_WINDOW, T=DEFAULT_TEMPERATURE, top_p=DEFAULT_TOP_P,
+                          sample_count=samples, verbose=False)
+        best = min(best, time.perf_counter() - start)
+
+    print(json.dumps({
+        "import": import_seconds,
+        "load": load_seconds,
+        "predict": best,
+        "rss_mb": peak_rss_mb(),
+        "torch_imported": "torch" in sys.modules,
+    }))
+
+
+def export(onnx_dir: str):
+    from benchmarks.common import build_random_models
+    from model.onnx_export import export_onnx
+    from src.config import MAX_CONTEXT
+
+    tokenizer, model = build_random_models()
+    export_onnx(model, tokenizer, onnx_dir, max_context=MAX_CONTEXT)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=1, help="每次预测的采样路径数")
+    parser.add_argument("--repeat", type=int, default=3, help="计时重复次数 (取最快)")
+    parser.add_argument("--onnx-dir", default=None, help="已有的导出目录 (默认导出到临时目录)")
+    parser.add_argument("--child", choices=["torch", "onnx"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child, args.onnx_dir, args.samples, args.repeat)
+        return
+
+    onnx_dir = args.onnx_dir or tempfile.mkdtemp(prefix="kronos_onnx_")
+    if not os.path.exists(os.path.join(onnx_dir, "manifest.json")):
+        print(f"导出 ONNX 到 {onnx_dir} ...")
+        export(onnx_dir)
+
+    results = {}
+    for backend in ("torch", "onnx"):
+        out = subprocess.run(
+            [sys.executable, __file__, "--child", backend, "--onnx-dir", onnx_dir,
+             "--samples", str(args.samples), "--repeat", str(args.repeat)],
+            check=True, capture_output=True, text=True, cwd=ROOT,
+        ).stdout
+        results[backend] = json.loads(out.strip().splitlines()[-1])
+
+    print("=" * 64)
+    print(f"  后端对比 (随机权重 base 结构, samples={args.samples})")
+    print("=" * 64)
+    print(f"{'后端':>6} | {'导入 (s)':>8} | {'加载 (s)':>8} | {'预测 (s)':>8} | {'峰值 RSS (MB)':>13} | torch")
+    for backend, r in results.items():
+        print(f"{backend:>6} | {r['import']:>8.2f} | {r['load']:>8.2f} | {r['predict']:>8.2f} | "
+              f"{r['rss_mb']:>13.0f} | {'是' if r['torch_imported'] else '否'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+基准测试：推理精度模式的精度-延迟报告。
+
+以 fp32 为基准, 在同一窗口、同一随机种子下比较其他精度模式
+(如 bf16 / int8 动态量化) 的预测误差与单次预测耗时;
+--throughput 模式下改为比较 predict_batch 在不同批大小下的吞吐 (序列/秒)。
+
+用法:
+    python benchmarks/bench_precision.py                 # 随机权重 (base 结构)
+    python benchmarks/bench_precision.py --pretrained    # 真实 Kronos-base 权重 (需联网下载)
+    python benchmarks/bench_precision.py --throughput --precision bf16 --batch-sizes 1 8 32
+"""
+import argparse
+import copy
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import torch
+
+from benchmarks.common import build_random_models, synthetic_window, timeit
+from model import Kronos, KronosPredictor, KronosTokenizer
+from model.precision import PRECISIONS, apply_precision, precision_report, resolve_precision
+from src.config import (
+    DEFAULT_TEMPERATURE,
+    DEFAULT_TOP_P,
+    INPUT_WINDOW,
+    MAX_CONTEXT,
+    MODEL_NAME,
+    OUTPUT_WINDOW,
+    TOKENIZER_NAME,
+)
+
+
+def load_models(pretrained: bool):
+    if pretrained:
+        return KronosTokenizer.from_pretrained(TOKENIZER_NAME).eval(), Kronos.from_pretrained(MODEL_NAME).eval()
+    return build_random_models()
+
+
+def throughput_report(model, tokenizer, precisions, batch_sizes, n_hist, n_pred, samples, repeat):
+    """各精度在不同批大小下的 predict_batch 吞吐, 以 fp32 为基准。"""
+    x_df, x_ts, y_ts = synthetic_window(n_hist, n_pred)
+    predictors = {"fp32": KronosPredictor(model, tokenizer, device="cpu", max_context=MAX_CONTEXT)}
+    for precision in precisions:
+        resolved = resolve_precision(precision)
+        if resolved == "fp32":
+            print(f"  [跳过] {precision}: 当前 CPU 不支持, 已回退 fp32")
+            continue
+        predictors[precision] = KronosPredictor(
+            copy.deepcopy(model), copy.deepcopy(tokenizer), device="cpu", max_context=MAX_CONTEXT, precision=resolved
+        )
+
+    print("=" * 72)
+    print(f"  吞吐报告 (窗口 {n_hist}+{n_pred}, samples={samples}, 单位: 序列/秒)")
+    print("=" * 72)
+    print(f"{'批大小':>6} | " + " | ".join(f"{name:>9}" for name in predictors) + " | 相对 fp32")
+
+    for batch_size in batch_sizes:
+        throughput = {}
+        for name, predictor in predictors.items():
+            seconds = timeit(
+                lambda: predictor.predict_batch(
+                    [x_df] * batch_size, [x_ts] * batch_size, [y_ts] * batch_size, n_pred,
+                    T=DEFAULT_TEMPERATURE, top_p=DEFAULT_TOP_P, sample_count=samples, verbose=False,
+                ),
+                repeat=repeat,
+            )
+            throughput[name] = batch_size / seconds
+        ratios = ", ".join(f"{name} {throughput[name] / throughput['fp32']:.2f}x" for name in throughput if name != "fp32")
+        print(f"{batch_size:>6} | " + " | ".join(f"{v:>9.2f}" for v in throughput.values()) + f" | {ratios}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pretrained", action="store_true", help="使用 HuggingFace 上的真实权重")
+    parser.add_argument("--precision", nargs="+", default=[p for p in PRECISIONS if p != "fp32"],
+                        choices=PRECISIONS, help="待比较的精度模式")
+    parser.add_argument("--samples", type=int, default=1, help="每次预测的采样路径数")
+    parser.add_argument("--repeat", type=int, default=3, help="计时重复次数 (取最快)")
+    parser.add_argument("--throughput", action="store_true", help="比较不同批大小下的吞吐")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32], help="吞吐模式的批大小")
+    parser.add_argument("--hist", type=int, default=INPUT_WINDOW, help="吞吐模式的历史长度")
+    parser.add_argument("--pred", type=int, default=OUTPUT_WINDOW, help="吞吐模式的预测长度")
+    args = parser.parse_args()
+
+    torch.set_grad_enabled(False)
+    tokenizer, model = load_models(args.pretrained)
+    if args.throughput:
+        throughput_report(model, tokenizer, args.precision, args.batch_sizes, args.hist, args.pred, args.samples, args.repeat)
+        return
+
+    x_df, x_ts, y_ts = synthetic_window(INPUT_WINDOW, OUTPUT_WINDOW)
+    reference = KronosPredictor(model, tokenizer, device="cpu", max_context=MAX_CONTEXT)
+
+    print("=" * 72)
+    print(f"  精度-延迟报告 (基准 fp32, 窗口 {INPUT_WINDOW}+{OUTPUT_WINDOW}, samples={args.samples})")
+    print("=" * 72)
+    print(f"{'精度':>6} | {'close MAPE %':>12} | {'OHLC MAPE %':>11} | {'fp32 (s)':>9} | {'候选 (s)':>9} | {'加速':>6}")
+
+    for precision in args.precision:
+        precision = resolve_precision(precision)
+        cand_model, cand_tokenizer = apply_precision(copy.deepcopy(model), copy.deepcopy(tokenizer), precision)
+        candidate = KronosPredictor(cand_model, cand_tokenizer, device="cpu", max_context=MAX_CONTEXT)
+        report = precision_report(
+            reference, candidate, x_df, x_ts, y_ts, OUTPUT_WINDOW, repeat=args.repeat,
+            T=DEFAULT_TEMPERATURE, top_p=DEFAULT_TOP_P, sample_count=args.samples,
+        )
+        print(
+            f"{precision:>6} | {report['close_mape']:>12.3f} | {report['ohlc_mape']:>11.3f} | "
+            f"{report['reference_seconds']:>9.2f} | {report['candidate_seconds']:>9.2f} | {report['speedup']:>5.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+基准测试：请求调度器 (src.rate_limiter) — 后台回补占满令牌桶时, 交互式请求的等待时间。
+
+一组后台请求 (模拟历史回补) 先行排队耗尽令牌, 随后每隔一段时间到达一个交互式请求 (模拟用户点击);
+对比交互式请求以 INTERACTIVE 优先级插队与按到达顺序 (同为 BACKGROUND) 排队时的等待时间。
+
+用法:
+    python benchmarks/bench_rate_limiter.py
+    python benchmarks/bench_rate_limiter.py --background 60 --rate 20
+"""
+import argparse
+import os
+import sys
+import threading
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from src.config import OHLCV_REQUEST_WEIGHT
+from src.rate_limiter import Priority, RequestScheduler
+
+
+def simulate(background: int, clicks: int, rate: float, click_priority: Priority) -> np.ndarray:
+    """返回各交互式请求的等待时间 (毫秒)。"""
+    scheduler = RequestScheduler(weight_per_minute=rate * OHLCV_REQUEST_WEIGHT * 60)
+    scheduler.acquire(scheduler.capacity)  # 从空令牌桶开始
+    waits = []
+
+    def click():
+        waits.append(scheduler.acquire(OHLCV_REQUEST_WEIGHT, click_priority) * 1000)
+
+    threads = [threading.Thread(target=scheduler.acquire, args=(OHLCV_REQUEST_WEIGHT, Priority.BACKGROUND))
+               for _ in range(background)]
+    for thread in threads:
+        thread.start()
+    for _ in range(clicks):
+        time.sleep(background / rate / (clicks + 1))
+        threads.append(threading.Thread(target=click))
+        threads[-1].start()
+    for thread in threads:
+        thread.join()
+    return np.array(waits)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--background", type=int, default=40, help="排队的后台请求数")
+    parser.add_argument("--clicks", type=int, default=5, help="交互式请求数")
+    parser.add_argument("--rate", type=float, default=20, help="令牌桶允许的请求数 / 秒")
+    args = parser.parse_args()
+
+    print("=" * 64)
+    print(f"  {args.background} 个后台请求排队, {args.clicks} 次点击, 限速 {args.rate:.0f} 请求/秒")
+    print("=" * 64)
+    print(f"{'点击请求排队方式':>16} | {'平均等待 (ms)':>12} | {'最大等待 (ms)':>12}")
+    for label, priority in (("按到达顺序", Priority.BACKGROUND), ("INTERACTIVE 插队", Priority.INTERACTIVE)):
+        waits = simulate(args.background, args.clicks, args.rate, priority)
+        print(f"{label:>16} | {waits.mean():>12.0f} | {waits.max():>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
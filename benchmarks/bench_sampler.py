@@ -0,0 +1,71 @@
+"""
+基准测试：采样器 top_k_top_p_filtering + multinomial vs model.sampling.sample_tokens。
+
+每个解码步对 s1 与 s2 各采样一次 (Kronos-base 两者词表均为 2^10)。
+旧实现每次都对整个词表排序; 新实现用部分 top-k 候选求 nucleus, 仅在候选不足时回退全排序。
+logits 为 N(0, scale²) 随机数: scale 越小分布越平, nucleus 越大, 回退越多。
+
+用法:
+    python benchmarks/bench_sampler.py
+    python benchmarks/bench_sampler.py --batch-sizes 1 8 32 --scales 1 2 4 --top-p 0.9
+"""
+import argparse
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import torch
+
+from benchmarks.common import KRONOS_BASE_CONFIG, timeit
+from model.kronos import sample_from_logits
+from model.sampling import DEFAULT_CANDIDATES, RowGenerator, sample_tokens
+from src.config import DEFAULT_TEMPERATURE
+
+
+def nucleus_fallback_rate(logits, top_p, candidates):
+    """候选集装不下 nucleus (需回退全排序) 的行占比。"""
+    probs = torch.softmax(logits / DEFAULT_TEMPERATURE, dim=-1)
+    top = probs.topk(min(candidates, probs.size(-1)), dim=-1).values.sum(dim=-1)
+    return float((top <= top_p).float().mean())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=[1, 8, 32], help="batch_size * sample_count")
+    parser.add_argument("--scales", nargs="+", type=float, default=[1.0, 2.0, 4.0], help="logits 标准差")
+    parser.add_argument("--top-p", type=float, default=0.9)
+    parser.add_argument("--repeat", type=int, default=200, help="每次计时的采样次数")
+    args = parser.parse_args()
+
+    vocab = 2 ** KRONOS_BASE_CONFIG["s1_bits"]
+    torch.manual_seed(0)
+    print("=" * 84)
+    print(f"  单次采样耗时 (vocab={vocab}, top_p={args.top_p}, T={DEFAULT_TEMPERATURE}, 候选 {DEFAULT_CANDIDATES})")
+    print("=" * 84)
+    print(f"{'batch':>6} | {'scale':>5} | {'回退率':>6} | {'旧 (µs)':>9} | {'新 (µs)':>9} | {'新+种子 (µs)':>12} | {'加速':>6}")
+    for batch_size in args.batch_sizes:
+        generator = RowGenerator(range(batch_size))
+        for scale in args.scales:
+            logits = torch.randn(batch_size, vocab) * scale
+
+            def old():
+                for _ in range(args.repeat):
+                    sample_from_logits(logits.clone(), temperature=DEFAULT_TEMPERATURE, top_k=0, top_p=args.top_p)
+
+            def new():
+                for _ in range(args.repeat):
+                    sample_tokens(logits, DEFAULT_TEMPERATURE, 0, args.top_p)
+
+            def seeded():
+                for _ in range(args.repeat):
+                    sample_tokens(logits, DEFAULT_TEMPERATURE, 0, args.top_p, uniform=generator.uniform())
+
+            t_old, t_new, t_seeded = (timeit(fn) / args.repeat * 1e6 for fn in (old, new, seeded))
+            rate = nucleus_fallback_rate(logits, args.top_p, DEFAULT_CANDIDATES)
+            print(f"{batch_size:>6} | {scale:>5.1f} | {rate:>6.0%} | {t_old:>9.1f} | {t_new:>9.1f} | "
+                  f"{t_seeded:>12.1f} | {t_old / t_new:>5.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+基准测试：批处理调度器 vs 逐个串行预测。
+
+模拟 N 个交易对 (会话 / 后台任务) 同时请求预测:
+- 串行: 依次调用 KronosPredictor.predict, 每个交易对一次完整的自回归推理;
+- 调度: N 个线程同时向 BatchScheduler 提交, 收集窗口内合并为一次 predict_batch,
+  每个解码步只做一次 batch=N 的前向。
+
+用法:
+    python benchmarks/bench_scheduler.py
+    python benchmarks/bench_scheduler.py --symbols 20 --hist 128 --pred 24
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import torch
+
+from benchmarks.common import build_random_models, synthetic_window
+from model import KronosPredictor
+from src.batch_scheduler import BatchScheduler
+from src.config import BATCH_MAX_WAIT_MS, DEFAULT_TEMPERATURE, DEFAULT_TOP_P, INPUT_WINDOW, MAX_CONTEXT, OUTPUT_WINDOW
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--symbols", type=int, default=20, help="并发请求的交易对数")
+    parser.add_argument("--hist", type=int, default=INPUT_WINDOW, help="历史长度")
+    parser.add_argument("--pred", type=int, default=OUTPUT_WINDOW, help="预测长度")
+    parser.add_argument("--wait-ms", type=float, default=BATCH_MAX_WAIT_MS, help="调度器收集窗口 (毫秒)")
+    args = parser.parse_args()
+
+    tokenizer, model = build_random_models()
+    predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=MAX_CONTEXT)
+    windows = [synthetic_window(args.hist, args.pred, seed=i) for i in range(args.symbols)]
+    sampling = dict(T=DEFAULT_TEMPERATURE, top_p=DEFAULT_TOP_P, sample_count=1, verbose=False)
+
+    predictor.predict(*windows[0], args.pred, **sampling)  # 预热
+
+    torch.manual_seed(0)
+    start = time.perf_counter()
+    for x_df, x_ts, y_ts in windows:
+        predictor.predict(x_df, x_ts, y_ts, args.pred, **sampling)
+    t_serial = time.perf_counter() - start
+
+    scheduler = BatchScheduler(lambda: predictor, max_batch_size=args.symbols, max_wait_ms=args.wait_ms)
+
+    def request(window):
+        x_df, x_ts, y_ts = window
+        return scheduler.submit(x_df, x_ts, y_ts, args.pred, temperature=DEFAULT_TEMPERATURE,
+                                top_p=DEFAULT_TOP_P, sample_count=1).result()
+
+    torch.manual_seed(0)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.symbols) as pool:
+        list(pool.map(request, windows))
+    t_batched = time.perf_counter() - start
+
+    print("=" * 60)
+    print(f"  {args.symbols} 个交易对并发预测 (hist={args.hist}, pred={args.pred})")
+    print("=" * 60)
+    print(f"  串行 predict      : {t_serial:>7.2f} s  ({args.symbols} 次推理)")
+    print(f"  调度器合批        : {t_batched:>7.2f} s  ({scheduler.batches_run} 次推理)")
+    print(f"  加速              : {t_serial / t_batched:>6.2f}x")
+
+
+if __name__ == "__main__":
+    main()
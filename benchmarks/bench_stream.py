@@ -0,0 +1,58 @@
+"""
+基准测试：流式预测 (KronosPredictor.predict_stream) vs 一次性 predict。
+
+报告首个部分预测 (第 1 小时) 的等待时间、完整结果的耗时, 以及逐步解码相对 predict 的额外开销。
+
+用法:
+    python benchmarks/bench_stream.py
+    python benchmarks/bench_stream.py --samples 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.common import build_random_models, synthetic_window
+from model import KronosPredictor
+from src.config import DEFAULT_TEMPERATURE, DEFAULT_TOP_P, INPUT_WINDOW, MAX_CONTEXT, OUTPUT_WINDOW
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=1, help="采样路径数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数 (取最小值)")
+    args = parser.parse_args()
+
+    tokenizer, model = build_random_models()
+    predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=MAX_CONTEXT)
+    x_df, x_ts, y_ts = synthetic_window(INPUT_WINDOW, OUTPUT_WINDOW)
+    sampling = dict(T=DEFAULT_TEMPERATURE, top_p=DEFAULT_TOP_P, sample_count=args.samples, seed=0)
+
+    predictor.predict(x_df, x_ts, y_ts, OUTPUT_WINDOW, verbose=False, **sampling)  # 预热
+
+    t_predict = t_first = t_stream = float("inf")
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        predictor.predict(x_df, x_ts, y_ts, OUTPUT_WINDOW, verbose=False, **sampling)
+        t_predict = min(t_predict, time.perf_counter() - start)
+
+        start = time.perf_counter()
+        first = None
+        for _pred_df in predictor.predict_stream(x_df, x_ts, y_ts, OUTPUT_WINDOW, **sampling):
+            if first is None:
+                first = time.perf_counter() - start
+        t_first = min(t_first, first)
+        t_stream = min(t_stream, time.perf_counter() - start)
+
+    print("=" * 60)
+    print(f"  流式预测 ({args.samples} 条路径, {OUTPUT_WINDOW} 步, 随机权重 base 结构)")
+    print("=" * 60)
+    print(f"predict 完整结果:          {t_predict:.2f}s")
+    print(f"predict_stream 首个部分预测: {t_first:.2f}s")
+    print(f"predict_stream 完整结果:    {t_stream:.2f}s  (额外开销 {(t_stream / t_predict - 1) * 100:+.1f}%)")
+
+
+if __name__ == "__main__":
+    main()
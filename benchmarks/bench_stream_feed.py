@@ -0,0 +1,81 @@
+"""
+基准测试：点击预测时的取数耗时 — REST 拉取 (AsyncDataFeed) vs 推送维护的内存窗口 (StreamingDataFeed)。
+
+本地模拟交易所为每次 REST 请求注入 --latency 秒延迟, 推送来自本地回放服务器 (tests.replay_server);
+REST 分无缓存 (整段拉取) 与缓存已过期 (增量拉取) 两种情况, 均含 preprocess。
+
+用法:
+    python benchmarks/bench_stream_feed.py
+    python benchmarks/bench_stream_feed.py --latency 0.3
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+
+from src.async_feed import AsyncDataFeed
+from src.cache_manager import CacheManager
+from src.rate_limiter import RequestScheduler
+from src.stream_feed import BinanceKlineSource, StreamingDataFeed
+from tests.fake_exchange import AsyncFakeExchange
+from tests.replay_server import KlineReplayServer
+
+SYMBOL = "BTC/USDT"
+
+
+def click(feed) -> float:
+    """一次点击的取数 + 预处理耗时 (毫秒)。"""
+    start = time.perf_counter()
+    feed.preprocess(feed.fetch_ohlcv(SYMBOL))
+    return (time.perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2, help="每次 REST 请求的模拟延迟 (秒)")
+    parser.add_argument("--repeat", type=int, default=5, help="每种情况的点击次数")
+    args = parser.parse_args()
+    results = {}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = CacheManager(ohlcv_dir=tmp, prediction_dir=tmp)
+        feed = AsyncDataFeed(cache_manager=cache, exchange=AsyncFakeExchange(latency=args.latency),
+                             scheduler=RequestScheduler())
+        cold, expired = [], []
+        for _ in range(args.repeat):
+            cache._cache_path(f"{SYMBOL}_1h").unlink(missing_ok=True)
+            cold.append(click(feed))
+            cache.ttl_seconds = -1  # 缓存立即过期 → 增量拉取
+            expired.append(click(feed))
+            cache.ttl_seconds = 300
+        feed.close()
+        results["REST 无缓存"] = cold
+        results["REST 增量"] = expired
+
+    server = KlineReplayServer().start()
+    with tempfile.TemporaryDirectory() as tmp:
+        feed = StreamingDataFeed(cache_manager=CacheManager(ohlcv_dir=tmp, prediction_dir=tmp),
+                                 exchange=AsyncFakeExchange(latency=args.latency), scheduler=RequestScheduler(),
+                                 source=BinanceKlineSource(server.url))
+        feed.subscribe([SYMBOL])
+        open_ts = int(time.time() * 1000) // 3_600_000 * 3_600_000
+        server.push("btcusdt@kline_1h", [[open_ts, 1.0, 1.0, 1.0, 1.0, 1.0]])
+        feed.wait_ready(SYMBOL, timeout=10)
+        results["推送内存窗口"] = [click(feed) for _ in range(args.repeat)]
+        feed.close()
+    server.close()
+
+    print("=" * 60)
+    print(f"  点击取数 + 预处理耗时 (REST 延迟 {args.latency * 1000:.0f}ms)")
+    print("=" * 60)
+    for label, times in results.items():
+        print(f"{label:>10}: 中位数 {np.median(times):>7.1f}ms  最大 {np.max(times):>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""
+基准测试：Tokenizer 尾部增量解码 vs 全窗口解码。
+
+auto_regressive_inference 结束时只需要最后 OUTPUT_WINDOW 行预测。
+全窗口解码会对 sample_count 条路径各跑一遍 512 长度的 decoder；
+尾部解码对每个序列只预填充一次历史，再在缓存上解码生成的 24 个 token。
+
+用法:
+    python benchmarks/bench_tail_decode.py
+"""
+import os
+import sys
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import torch
+
+from benchmarks.common import build_random_models, timeit
+from model.kronos import prefill_tail_decoder
+from src.config import INPUT_WINDOW, MAX_CONTEXT, OUTPUT_WINDOW
+
+
+def main():
+    tokenizer, _ = build_random_models()
+    vocab = 2 ** tokenizer.s1_bits
+    window = min(INPUT_WINDOW + OUTPUT_WINDOW, MAX_CONTEXT)
+    history_len = window - OUTPUT_WINDOW
+
+    print("=" * 60)
+    print(f"  Tokenizer 解码耗时 (窗口 {window}, 预测 {OUTPUT_WINDOW} 步)")
+    print("=" * 60)
+    print(f"{'samples':>8} | {'全窗口 (ms)':>12} | {'尾部增量 (ms)':>14} | {'加速':>6}")
+
+    for sample_count in (1, 5, 10):
+        torch.manual_seed(0)
+        history = [torch.randint(0, vocab, (1, history_len)) for _ in range(2)]
+        tail = [torch.randint(0, vocab, (sample_count, OUTPUT_WINDOW)) for _ in range(2)]
+        full = [torch.cat([h.expand(sample_count, -1), t], dim=1) for h, t in zip(history, tail)]
+
+        def full_decode():
+            with torch.no_grad():
+                return tokenizer.decode(full, half=True)[:, -OUTPUT_WINDOW:]
+
+        def tail_decode():
+            with torch.no_grad():
+                cache = prefill_tail_decoder(tokenizer, history, sample_count)
+                return tokenizer.decode(tail, half=True, kv_cache=cache)
+
+        torch.testing.assert_close(full_decode(), tail_decode(), atol=1e-4, rtol=1e-4)
+        t_full = timeit(full_decode)
+        t_tail = timeit(tail_decode)
+        print(f"{sample_count:>8} | {t_full * 1e3:>12.1f} | {t_tail * 1e3:>14.1f} | {t_full / t_tail:>5.1f}x")
+
+
+if __name__ == "__main__":
+    main()
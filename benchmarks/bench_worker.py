@@ -0,0 +1,94 @@
+"""
+基准测试：推理期间 Streamlit 进程的响应延迟 — 进程内调度器 vs 独立推理进程 (src.inference_worker)。
+
+预测进行时, 主进程反复执行一段模拟页面 rerun 的 Python 工作 (构造 DataFrame + 汇总),
+记录每次 "rerun" 的耗时; 进程内推理与页面争用 GIL, 独立进程只与页面分享 CPU 时间片。
+报告: 空闲基线、两种模式下 rerun 耗时的中位数 / p95 / 最大值, 以及预测本身的耗时。
+
+用法:
+    python benchmarks/bench_worker.py
+    python benchmarks/bench_worker.py --samples 8
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.common import synthetic_window
+from src.config import DEFAULT_TEMPERATURE, DEFAULT_TOP_P, INPUT_WINDOW, MAX_CONTEXT, OUTPUT_WINDOW
+
+
+def load_random_predictor():
+    """随机权重 base 结构的预测器 (模块级, 供推理进程按名称加载)。"""
+    from benchmarks.common import build_random_models
+    from model import KronosPredictor
+
+    tokenizer, model = build_random_models()
+    return KronosPredictor(model, tokenizer, device="cpu", max_context=MAX_CONTEXT)
+
+
+def fake_rerun(frame: pd.DataFrame) -> float:
+    """模拟一次页面 rerun 的纯 Python / pandas 工作, 返回耗时 (毫秒)。"""
+    start = time.perf_counter()
+    view = frame.copy()
+    view["ret"] = view["close"].pct_change()
+    summary = {column: float(view[column].describe()["mean"]) for column in view.columns}
+    _ = [f"{name}: {value:.2f}" for name, value in summary.items() for _ in range(20)]
+    return (time.perf_counter() - start) * 1000
+
+
+def measure(frame: pd.DataFrame, future=None, seconds: float = 3.0):
+    """future 为 None 时测空闲基线 (固定时长), 否则一直测到预测完成。"""
+    latencies = []
+    start = time.perf_counter()
+    while (future is None and time.perf_counter() - start < seconds) or (future is not None and not future.done()):
+        latencies.append(fake_rerun(frame))
+        time.sleep(0.005)
+    if future is not None:
+        future.result()
+    return np.array(latencies), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=4, help="采样路径数")
+    args = parser.parse_args()
+
+    from src.batch_scheduler import BatchScheduler
+    from src.inference_worker import InferenceWorker
+
+    x_df, x_ts, y_ts = synthetic_window(INPUT_WINDOW, OUTPUT_WINDOW)
+    request = dict(pred_len=OUTPUT_WINDOW, temperature=DEFAULT_TEMPERATURE, top_p=DEFAULT_TOP_P,
+                   sample_count=args.samples)
+
+    predictor = load_random_predictor()
+    scheduler = BatchScheduler(lambda: predictor, max_wait_ms=1)
+    worker = InferenceWorker(load_random_predictor, warmup=(x_df, x_ts, y_ts), max_wait_ms=1)
+    worker.start()
+    # 两种模式各预热一次 (首次前向), 之后再计时
+    scheduler.submit(x_df, x_ts, y_ts, **request).result()
+    worker.ready.wait()
+    worker.submit(x_df, x_ts, y_ts, **request).result()
+
+    results = {"空闲": measure(x_df)}
+    results["进程内调度器"] = measure(x_df, scheduler.submit(x_df, x_ts, y_ts, **request))
+    results["独立推理进程"] = measure(x_df, worker.submit(x_df, x_ts, y_ts, **request))
+    worker.close()
+
+    print("=" * 72)
+    print(f"  推理期间页面 rerun 耗时 ({args.samples} 条路径, 随机权重 base 结构, {os.cpu_count()} CPU)")
+    print("=" * 72)
+    print(f"{'模式':>12} | {'中位数 (ms)':>10} | {'p95 (ms)':>8} | {'最大 (ms)':>9} | {'rerun 次数':>9} | {'预测 (s)':>8}")
+    for label, (latencies, seconds) in results.items():
+        forecast = "-" if label == "空闲" else f"{seconds:.2f}"
+        print(f"{label:>12} | {np.median(latencies):>10.1f} | {np.percentile(latencies, 95):>8.1f} | "
+              f"{latencies.max():>9.1f} | {len(latencies):>9} | {forecast:>8}")
+
+
+if __name__ == "__main__":
+    main()
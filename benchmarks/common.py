@@ -0,0 +1,73 @@
+"""
+基准测试公共工具。
+按 Kronos-base / Kronos-Tokenizer-base 的结构参数构造随机权重模型，
+无需下载 HuggingFace 权重即可在本地 CPU 上测量推理耗时。
+"""
+import os
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import numpy as np
+import pandas as pd
+
+# 与 HuggingFace 上 config.json 一致的结构参数 (dropout 在推理中无影响)
+TOKENIZER_BASE_CONFIG = dict(
+    d_in=6, d_model=256, n_heads=4, ff_dim=512, n_enc_layers=4, n_dec_layers=4,
+    ffn_dropout_p=0.0, attn_dropout_p=0.0, resid_dropout_p=0.0,
+    s1_bits=10, s2_bits=10, beta=0.05, gamma0=1.0, gamma=1.1, zeta=0.05, group_size=4,
+)
+KRONOS_BASE_CONFIG = dict(
+    s1_bits=10, s2_bits=10, n_layers=12, d_model=832, n_heads=16, ff_dim=2048,
+    ffn_dropout_p=0.0, attn_dropout_p=0.0, resid_dropout_p=0.0, token_dropout_p=0.0,
+    learn_te=True,
+)
+
+
+def build_random_models(seed: int = 0):
+    """返回 (tokenizer, model)，结构同 base 版本，权重随机初始化。"""
+    import torch  # 延迟导入: ONNX 基准的子进程只用 synthetic_window, 不应加载 torch
+
+    from model import Kronos, KronosTokenizer
+
+    torch.manual_seed(seed)
+    tokenizer = KronosTokenizer(**TOKENIZER_BASE_CONFIG).eval()
+    model = Kronos(**KRONOS_BASE_CONFIG).eval()
+    return tokenizer, model
+
+
+def timeit(fn, repeat: int = 3, warmup: int = 1) -> float:
+    """返回 fn() 多次运行的最小耗时 (秒)。"""
+    for _ in range(warmup):
+        fn()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def synthetic_window(n_hist: int, n_pred: int, seed: int = 0):
+    """
+    生成固定种子的随机游走 OHLCV 窗口。
+
+    Returns:
+        (x_df, x_timestamp, y_timestamp): 与 DataFeed.preprocess() 输出格式一致
+    """
+    rng = np.random.default_rng(seed)
+    close = 40000 * np.exp(np.cumsum(rng.normal(0, 0.01, n_hist)))
+    open_ = np.concatenate([[close[0]], close[:-1]])
+    high = np.maximum(open_, close) * (1 + rng.uniform(0, 0.005, n_hist))
+    low = np.minimum(open_, close) * (1 - rng.uniform(0, 0.005, n_hist))
+    volume = rng.uniform(10, 100, n_hist)
+    x_df = pd.DataFrame({
+        "open": open_, "high": high, "low": low, "close": close,
+        "volume": volume, "amount": close * volume,
+    })
+    x_timestamp = pd.Series(pd.date_range("2025-01-01", periods=n_hist, freq="h"))
+    y_timestamp = pd.Series(pd.date_range(
+        x_timestamp.iloc[-1] + pd.Timedelta(hours=1), periods=n_pred, freq="h"
+    ))
+    return x_df, x_timestamp, y_timestamp
@@ -0,0 +1,113 @@
+import os
+import time
+import types
+import warnings
+
+import torch
+
+from model.module import share_rotary_embeddings
+from model.sampling import exclude_fallback_from_graphs
+
+
+def _artifact_path(cache_dir):
+    return os.path.join(cache_dir, f"decode_step-torch{torch.__version__}.bin")
+
+
+def _load_artifacts(cache_dir):
+    """Primes the Inductor caches from a previous run. Returns True if an artifact file was found and loaded."""
+    path = _artifact_path(cache_dir)
+    if not os.path.exists(path):
+        return False
+    try:
+        with open(path, 'rb') as f:
+            torch.compiler.load_cache_artifacts(f.read())
+        return True
+    except Exception as e: # A stale or corrupt artifact only costs a recompilation
+        warnings.warn(f"Ignoring compile cache {path}: {e}")
+        return False
+
+
+def _save_artifacts(cache_dir):
+    artifacts = torch.compiler.save_cache_artifacts()
+    if artifacts is None:
+        return
+    os.makedirs(cache_dir, exist_ok=True)
+    path = _artifact_path(cache_dir)
+    with open(path + '.tmp', 'wb') as f:
+        f.write(artifacts[0])
+    os.replace(path + '.tmp', path)
+
+
+def _warm_up(model, step, batch_sizes, prompt_len=8):
+    """Runs `step` on dummy inputs so that compilation happens now rather than on the first forecast."""
+    device = next(model.parameters()).device
+    s1_vocab, s2_vocab = 2 ** model.s1_bits, 2 ** model.s2_bits
+    n_stamp = 5 # minute, hour, weekday, day, month (see calc_time_stamps)
+    with torch.no_grad():
+        for batch_size in batch_sizes:
+            s1_ids = torch.randint(0, s1_vocab, (batch_size, prompt_len + 1), device=device)
+            s2_ids = torch.randint(0, s2_vocab, (batch_size, prompt_len + 1), device=device)
+            stamp = torch.zeros(batch_size, prompt_len + 1, n_stamp, device=device)
+            kv_cache = model.new_kv_cache()
+            model.prefill(s1_ids[:, :-1], s2_ids[:, :-1], kv_cache, stamp=stamp[:, :-1])
+            step(s1_ids[:, -1:], s2_ids[:, -1:], stamp[:, -1:], kv_cache)
+
+
+def compile_decode_step(model, cache_dir=None, max_len=512, warmup_batch_sizes=(1, 2)):
+    """
+    Replaces `model.decode_step` with a `torch.compile`d version and compiles it immediately.
+
+    The cached decode step (embedding, Transformer stack, both heads and both sampling calls) runs once per forecast
+    step with the same shapes apart from the growing KV cache, so it is compiled with dynamic shapes. Batch size 1 is
+    specialised by the compiler, hence the default warm-up covers both 1 and 2 (which stands for any larger batch).
+    The RoPE tables are precomputed up to `max_len` first; a table that grows during decoding would invalidate the
+    compiled graph at every step.
+
+    With `cache_dir`, the compiled artifacts are saved there and loaded again on the next start, which turns the
+    compilation into a cache lookup. If anything goes wrong, during warm-up or on a later recompilation, the model
+    keeps (or returns to) the eager `decode_step` with a warning. Sampling inside a compiled graph uses its own RNG
+    stream, so unseeded results match eager mode in distribution but not draw for draw; seeded inference passes its
+    uniform numbers in (see `model.sampling.RowGenerator`) and gives the same draws as eager mode.
+
+    Args:
+        model (Kronos): Model to compile, modified in place.
+        cache_dir (str, optional): Directory for the on-disk compile cache.
+        max_len (int): Longest sequence the model will see, i.e. the predictor's `max_context`.
+        warmup_batch_sizes (Sequence[int]): Batch sizes (batch_size * sample_count) to compile for up front.
+
+    Returns:
+        dict: `compiled` (bool), `cache_loaded` (whether a previous artifact was found), `seconds` (compile and
+              warm-up time) and `error` (the exception message if compilation failed, else None).
+    """
+    start = time.perf_counter()
+    eager_step = types.MethodType(type(model).decode_step, model)
+    cache_loaded = _load_artifacts(cache_dir) if cache_dir else False
+    share_rotary_embeddings(model, max_len=max_len)
+    exclude_fallback_from_graphs()
+    try:
+        compiled_step = torch.compile(eager_step, dynamic=True, options={"freezing": True})
+
+        def run_compiled(s1_ids, s2_ids, stamp, kv_cache, **kwargs):
+            # The inputs are usually slices of larger buffers; fresh copies with standard strides keep the compiled
+            # graph's guards independent of those buffers' sizes
+            s1_ids, s2_ids, stamp = (t.clone(memory_format=torch.contiguous_format) for t in (s1_ids, s2_ids, stamp))
+            return compiled_step(s1_ids, s2_ids, stamp, kv_cache, **kwargs)
+
+        def decode_step(*args, **kwargs):
+            try:
+                return run_compiled(*args, **kwargs)
+            except Exception as e:
+                # Compiler errors are raised while tracing, before the step has written to the KV cache
+                warnings.warn(f"Compiled decode step failed ({e}), falling back to eager mode.")
+                model.decode_step = eager_step
+                return eager_step(*args, **kwargs)
+
+        _warm_up(model, run_compiled, warmup_batch_sizes)
+        model.decode_step = decode_step
+        if cache_dir:
+            _save_artifacts(cache_dir)
+    except Exception as e:
+        model.decode_step = eager_step
+        warnings.warn(f"torch.compile of the decode step failed ({e}), using eager mode.")
+        return {'compiled': False, 'cache_loaded': cache_loaded, 'seconds': time.perf_counter() - start, 'error': str(e)}
+    return {'compiled': True, 'cache_loaded': cache_loaded, 'seconds': time.perf_counter() - start, 'error': None}
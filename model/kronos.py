@@ -4,10 +4,10 @@ import torch
 from huggingface_hub import PyTorchModelHubMixin
 import sys
 
-from tqdm import trange
-
 sys.path.append("../")
 from model.module import *
+from model.precision import apply_precision, resolve_precision
+from model.sampling import RowGenerator, sample_tokens
 
 
 class KronosTokenizer(nn.Module, PyTorchModelHubMixin):
@@ -70,6 +70,7 @@ class KronosTokenizer(nn.Module, PyTorchModelHubMixin):
         self.post_quant_embed_pre = nn.Linear(in_features=self.s1_bits, out_features=self.d_model) # Linear layer after quantization (pre part - s1 bits)
         self.post_quant_embed = nn.Linear(in_features=self.codebook_dim, out_features=self.d_model) # Linear layer after quantization (full codebook)
         self.tokenizer = BSQuantizer(self.s1_bits, self.s2_bits, beta, gamma0, gamma, zeta, group_size) # BSQuantizer module
+        share_rotary_embeddings(self) # One RoPE table for all encoder/decoder layers
 
     def forward(self, x):
         """
@@ -134,48 +135,60 @@ class KronosTokenizer(nn.Module, PyTorchModelHubMixin):
             mask = 2 ** torch.arange(self.codebook_dim, device=x.device, dtype=torch.long) # Create a mask for bit extraction
             x = (x.unsqueeze(-1) & mask) != 0 # Extract bits
 
-        x = x.float() * 2 - 1 # Convert boolean to bipolar (-1, 1)
+        x = x.to(self.post_quant_embed.weight.dtype) * 2 - 1 # Convert boolean to bipolar (-1, 1), in the decoder's dtype
         q_scale = 1. / (self.codebook_dim ** 0.5) # Scaling factor
         x = x * q_scale
         return x
 
-    def encode(self, x, half=False):
+    def encode(self, x, half=False, padding_mask=None):
         """
         Encodes the input data into quantized indices.
 
         Args:
             x (torch.Tensor): Input tensor of shape (batch_size, seq_len, d_in).
             half (bool, optional): Whether to use half quantization in BSQuantizer. Defaults to False.
+            padding_mask (torch.Tensor, optional): Nonzero at padded positions, which the encoder attention ignores.
+                Shape: (batch_size, seq_len). Defaults to None.
 
         Returns:
             torch.Tensor: Quantized indices from BSQuantizer.
         """
         z = self.embed(x)
         for layer in self.encoder:
-            z = layer(z)
+            z = layer(z, key_padding_mask=padding_mask)
         z = self.quant_embed(z)
 
         bsq_loss, quantized, z_indices = self.tokenizer(z, half=half, collect_metrics=False)
         return z_indices
 
-    def decode(self, x, half=False):
+    def decode(self, x, half=False, kv_cache=None, padding_mask=None):
         """
         Decodes quantized indices back to the input data space.
 
         Args:
             x (torch.Tensor): Quantized indices tensor.
             half (bool, optional): Whether the indices were generated with half quantization. Defaults to False.
+            kv_cache (KVCache, optional): Decoder cache from `new_kv_cache()`. When given, `x` continues the cached
+                sequence and only the new positions are decoded, e.g. one forecast step at a time. Defaults to None.
+            padding_mask (torch.Tensor, optional): Nonzero at padded positions of `x`. Shape: (batch_size, seq_len).
+                With a cache, the padding of earlier positions is remembered by the cache. Defaults to None.
 
         Returns:
             torch.Tensor: Reconstructed output tensor of shape (batch_size, seq_len, d_in).
         """
         quantized = self.indices_to_bits(x, half)
+        if kv_cache is not None:
+            padding_mask = kv_cache.extend_padding_mask(padding_mask, quantized)
         z = self.post_quant_embed(quantized)
-        for layer in self.decoder:
-            z = layer(z)
+        for i, layer in enumerate(self.decoder):
+            z = layer(z, key_padding_mask=padding_mask, kv_cache=kv_cache[i] if kv_cache is not None else None)
         z = self.head(z)
         return z
 
+    def new_kv_cache(self):
+        """Returns an empty `KVCache` for incremental decoding with `decode(..., kv_cache=...)`."""
+        return KVCache(len(self.decoder))
+
 
 class Kronos(nn.Module, PyTorchModelHubMixin):
     """
@@ -220,6 +233,7 @@ class Kronos(nn.Module, PyTorchModelHubMixin):
         self.norm = RMSNorm(self.d_model)
         self.dep_layer = DependencyAwareLayer(self.d_model)
         self.head = DualHead(self.s1_bits, self.s2_bits, self.d_model)
+        share_rotary_embeddings(self)
         self.apply(self._init_weights)
 
     def _init_weights(self, module):
@@ -275,7 +289,7 @@ class Kronos(nn.Module, PyTorchModelHubMixin):
         s2_logits = self.head.cond_forward(x2)
         return s1_logits, s2_logits
 
-    def decode_s1(self, s1_ids, s2_ids, stamp=None, padding_mask=None):
+    def decode_s1(self, s1_ids, s2_ids, stamp=None, padding_mask=None, kv_cache=None, last_only=False):
         """
         Decodes only the s1 tokens.
 
@@ -286,11 +300,16 @@ class Kronos(nn.Module, PyTorchModelHubMixin):
             s1_ids (torch.Tensor): Input tensor of s1 token IDs. Shape: [batch_size, seq_len]
             s2_ids (torch.Tensor): Input tensor of s2 token IDs. Shape: [batch_size, seq_len]
             stamp (torch.Tensor, optional): Temporal stamp tensor. Shape: [batch_size, seq_len]. Defaults to None.
-            padding_mask (torch.Tensor, optional): Mask for padding tokens. Shape: [batch_size, seq_len]. Defaults to None.
+            padding_mask (torch.Tensor, optional): Mask for padding tokens (nonzero = padded). Shape: [batch_size, seq_len].
+                With a cache, the padding of earlier positions is remembered by the cache. Defaults to None.
+            kv_cache (KVCache, optional): Cache created with `new_kv_cache()`. When given, the inputs are treated as
+                the continuation of the cached sequence and only these new positions are computed. Defaults to None.
+            last_only (bool, optional): Project only the final position through the s1 head. Defaults to False.
 
         Returns:
             Tuple[torch.Tensor, torch.Tensor]:
                 - s1 logits: Logits for s1 token predictions. Shape: [batch_size, seq_len, s1_vocab_size]
+                  ([batch_size, 1, s1_vocab_size] if `last_only`)
                 - context: Context representation from the Transformer. Shape: [batch_size, seq_len, d_model]
         """
         x = self.embedding([s1_ids, s2_ids])
@@ -299,15 +318,77 @@ class Kronos(nn.Module, PyTorchModelHubMixin):
             x = x + time_embedding
         x = self.token_drop(x)
 
-        for layer in self.transformer:
-            x = layer(x, key_padding_mask=padding_mask)
+        if kv_cache is not None:
+            padding_mask = kv_cache.extend_padding_mask(padding_mask, x)
+        for i, layer in enumerate(self.transformer):
+            x = layer(x, key_padding_mask=padding_mask, kv_cache=kv_cache[i] if kv_cache is not None else None)
 
         x = self.norm(x)
 
-        s1_logits = self.head(x)
+        s1_logits = self.head(x[:, -1:, :] if last_only else x)
         return s1_logits, x
 
-    def decode_s2(self, context, s1_ids, padding_mask=None):
+    def prefill(self, s1_ids, s2_ids, kv_cache, stamp=None, padding_mask=None):
+        """
+        Runs a prompt through the model and fills an empty `kv_cache` for step-wise decoding.
+
+        All context positions except the last are also added to the dependency-aware layer's cross-attention cache;
+        the last one is returned and should be passed to `decode_s2(..., last_only=True, kv_cache=kv_cache)`,
+        exactly like the output of a cached `decode_s1` step.
+
+        Args:
+            s1_ids (torch.Tensor): s1 token IDs of the prompt. Shape: [batch_size, seq_len]
+            s2_ids (torch.Tensor): s2 token IDs of the prompt. Shape: [batch_size, seq_len]
+            kv_cache (KVCache): Empty cache from `new_kv_cache()`.
+            stamp (torch.Tensor, optional): Temporal stamp tensor. Shape: [batch_size, seq_len]. Defaults to None.
+            padding_mask (torch.Tensor, optional): Nonzero at padded (e.g. left-padded) prompt positions.
+                Shape: [batch_size, seq_len]. Stored in the cache, so later steps keep ignoring them. Defaults to None.
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]:
+                - s1 logits for the next token. Shape: [batch_size, 1, s1_vocab_size]
+                - context of the last position. Shape: [batch_size, 1, d_model]
+        """
+        s1_logits, context = self.decode_s1(s1_ids, s2_ids, stamp, padding_mask=padding_mask, kv_cache=kv_cache, last_only=True)
+        self.dep_layer.extend_cache(context[:, :-1, :], kv_cache[self.n_layers])
+        return s1_logits, context[:, -1:, :]
+
+    def new_kv_cache(self):
+        """
+        Returns an empty `KVCache` for incremental decoding.
+
+        It has one slot per Transformer block plus a trailing slot for the dependency-aware layer's
+        cross-attention keys/values, which `decode_s2(..., last_only=True)` fills.
+        """
+        return KVCache(self.n_layers + 1)
+
+    def decode_step(self, s1_ids, s2_ids, stamp, kv_cache, temperature=1.0, top_k=0, top_p=0.99, uniform=None):
+        """
+        One cached autoregressive step: feeds the newest token, then samples the next s1 and s2 tokens.
+
+        The shapes are the same at every step (only the cached length grows), which makes this the natural unit
+        for graph compilation, see `model.compiled.compile_decode_step`.
+
+        Args:
+            s1_ids (torch.Tensor): s1 token IDs of the newest position. Shape: [batch_size, 1]
+            s2_ids (torch.Tensor): s2 token IDs of the newest position. Shape: [batch_size, 1]
+            stamp (torch.Tensor): Temporal stamp of the newest position. Shape: [batch_size, 1, n_features]
+            kv_cache (KVCache): Cache filled by `prefill` and earlier steps; updated in place.
+            temperature, top_k, top_p: Sampling parameters, see `model.sampling.sample_tokens`.
+            uniform (torch.Tensor, optional): Uniform numbers of shape [batch_size, 2] for the s1 and s2 draws, e.g.
+                from `RowGenerator.uniform(2)`. If None, the global RNG is used.
+
+        Returns:
+            Tuple[torch.Tensor, torch.Tensor]: Sampled s1 and s2 token IDs. Shape: [batch_size, 1] each
+        """
+        u_pre, u_post = (None, None) if uniform is None else (uniform[:, 0], uniform[:, 1])
+        s1_logits, context = self.decode_s1(s1_ids, s2_ids, stamp, kv_cache=kv_cache, last_only=True)
+        sample_pre = sample_tokens(s1_logits[:, -1, :].float(), temperature, top_k, top_p, uniform=u_pre)
+        s2_logits = self.decode_s2(context, sample_pre, last_only=True, kv_cache=kv_cache)
+        sample_post = sample_tokens(s2_logits[:, -1, :].float(), temperature, top_k, top_p, uniform=u_post)
+        return sample_pre, sample_post
+
+    def decode_s2(self, context, s1_ids, padding_mask=None, last_only=False, kv_cache=None):
         """
         Decodes the s2 tokens, conditioned on the context and s1 tokens.
 
@@ -319,10 +400,23 @@ class Kronos(nn.Module, PyTorchModelHubMixin):
                                      Shape: [batch_size, seq_len, d_model]
             s1_ids (torch.torch.Tensor): Input tensor of s1 token IDs. Shape: [batch_size, seq_len]
             padding_mask (torch.Tensor, optional): Mask for padding tokens. Shape: [batch_size, seq_len]. Defaults to None.
+            last_only (bool, optional): Compute the sibling embedding, dependency-aware attention and s2 head for
+                the final query position only. Defaults to False.
+            kv_cache (KVCache, optional): Only with `last_only`. Cache whose trailing slot holds the context already
+                seen; `context` then contains just the new positions (as returned by a cached `decode_s1`). The
+                padding recorded in the cache is used in place of `padding_mask`.
 
         Returns:
-            torch.Tensor: s2 logits. Shape: [batch_size, seq_len, s2_vocab_size]
+            torch.Tensor: s2 logits. Shape: [batch_size, seq_len, s2_vocab_size] ([batch_size, 1, s2_vocab_size] if `last_only`)
         """
+        if last_only:
+            if kv_cache is not None:
+                padding_mask = kv_cache.padding_mask
+            sibling_embed = self.embedding.emb_s1(s1_ids[:, -1:])
+            x2 = self.dep_layer.step(context, sibling_embed, key_padding_mask=padding_mask,
+                                     kv_cache=kv_cache[self.n_layers] if kv_cache is not None else None)
+            return self.head.cond_forward(x2)
+
         sibling_embed = self.embedding.emb_s1(s1_ids)
         x2 = self.dep_layer(context, sibling_embed, key_padding_mask=padding_mask)
         return self.head.cond_forward(x2)
@@ -341,6 +435,7 @@ def top_k_top_p_filtering(
         if top_k > 0: keep only top k tokens with highest probability (top-k filtering).
         if top_p < 1.0: keep the top tokens with cumulative probability >= top_p (nucleus filtering).
             Nucleus filtering is described in Holtzman et al. (http://arxiv.org/abs/1904.09751)
+            top_p may also be a tensor of shape (batch size, 1) with one threshold per row; rows >= 1.0 are not filtered.
         Make sure we keep at least min_tokens_to_keep per batch example in the output
     From: https://gist.github.com/thomwolf/1a5a29f6962089e871b94cbd09daf317
     """
@@ -351,10 +446,13 @@ def top_k_top_p_filtering(
         logits[indices_to_remove] = filter_value
         return logits
 
-    if top_p < 1.0:
+    if torch.is_tensor(top_p) or top_p < 1.0:
         sorted_logits, sorted_indices = torch.sort(logits, descending=True)
         cumulative_probs = torch.cumsum(F.softmax(sorted_logits, dim=-1), dim=-1)
 
+        if torch.is_tensor(top_p):
+            # Per-row thresholds: rows with top_p >= 1 keep their whole distribution
+            top_p = torch.where(top_p < 1.0, top_p, torch.full_like(top_p, float("inf")))
         # Remove tokens with cumulative probability above the threshold (token with 0 are kept)
         sorted_indices_to_remove = cumulative_probs > top_p
         if min_tokens_to_keep > 1:
@@ -371,9 +469,15 @@ def top_k_top_p_filtering(
 
 
 def sample_from_logits(logits, temperature=1.0, top_k=None, top_p=None, sample_logits=True):
+    """
+    Samples one token per row of `logits` (batch size, vocabulary size).
+
+    `temperature` and `top_p` are either scalars or tensors of shape (batch size, 1) holding one value per row,
+    see `expand_sampling_param`.
+    """
     logits = logits / temperature
     if top_k is not None or top_p is not None:
-        if top_k > 0 or top_p < 1.0:
+        if top_k > 0 or torch.is_tensor(top_p) or top_p < 1.0:
             logits = top_k_top_p_filtering(logits, top_k=top_k, top_p=top_p)
 
     probs = F.softmax(logits, dim=-1)
@@ -386,21 +490,255 @@ def sample_from_logits(logits, temperature=1.0, top_k=None, top_p=None, sample_l
     return x
 
 
-def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip=5, T=1.0, top_k=0, top_p=0.99, sample_count=5, verbose=False):
-    with torch.no_grad():
-        x = torch.clip(x, -clip, clip)
+def expand_sampling_param(value, batch_size, sample_count, device=None):
+    """
+    Aligns a sampling parameter (temperature or top_p) with the sample-path rows of `auto_regressive_inference`.
+
+    Scalars are returned unchanged. Per-series values (a sequence, array or tensor of shape (batch_size,)) become a
+    float tensor of shape (batch_size * sample_count, 1), so each series samples with its own setting in one batch.
+    """
+    if np.ndim(value) == 0:
+        return value
+    if not torch.is_tensor(value):
+        value = torch.from_numpy(np.asarray(value, dtype=np.float32))
+    value = value.to(device=device, dtype=torch.float32).reshape(-1)
+    if value.numel() != batch_size:
+        raise ValueError(f"Expected one sampling value per series ({batch_size}), got {value.numel()}.")
+    return value.repeat_interleave(sample_count).unsqueeze(-1)
 
-        device = x.device
-        x = x.unsqueeze(1).repeat(1, sample_count, 1, 1).reshape(-1, x.size(1), x.size(2)).to(device)
-        x_stamp = x_stamp.unsqueeze(1).repeat(1, sample_count, 1, 1).reshape(-1, x_stamp.size(1), x_stamp.size(2)).to(device)
-        y_stamp = y_stamp.unsqueeze(1).repeat(1, sample_count, 1, 1).reshape(-1, y_stamp.size(1), y_stamp.size(2)).to(device)
 
-        x_token = tokenizer.encode(x, half=True)
-        
-        initial_seq_len = x.size(1)
+def prefill_tail_decoder(tokenizer, history_tokens, sample_count=1, padding_mask=None):
+    """
+    Prepares the tokenizer decoder for reconstructing only the generated tail of a sequence.
+
+    The history part of the decode window is identical for all sample paths, so it is run through the decoder once
+    per series and the resulting cache is fanned out to `sample_count` paths. Generated tokens are then decoded on top
+    of it with `tokenizer.decode(tokens, half=True, kv_cache=cache)`, one step at a time or as a single chunk, and give
+    exactly the rows a full-window decode would produce for those positions.
+
+    Args:
+        tokenizer (KronosTokenizer): Tokenizer whose decoder is used.
+        history_tokens (List[torch.Tensor]): s1/s2 history token IDs inside the decode window. Shape: [batch_size, seq_len]
+        sample_count (int): Number of sample paths per series.
+        padding_mask (torch.Tensor, optional): Nonzero at padded history positions. Shape: [batch_size, seq_len]
+
+    Returns:
+        KVCache: Decoder cache of shape [batch_size * sample_count, ...].
+    """
+    cache = tokenizer.new_kv_cache()
+    tokenizer.decode(history_tokens, half=True, kv_cache=cache, padding_mask=padding_mask)
+    cache.repeat_interleave(sample_count)
+    return cache
+
+
+def path_memory_bytes(tokenizer, model, seq_len, max_context):
+    """
+    Rough upper bound on the memory (bytes) one sample path of one series adds to `auto_regressive_inference`.
+
+    Counts the model and tokenizer-decoder key/value caches over the decode window, plus the largest transient
+    activations of one row: the attention scores and feed-forward of a full-window forward pass, which is what the
+    sliding-window steps and the tokenizer decode run.
+    """
+    window = min(seq_len, max_context)
+    itemsize = model.embedding.emb_s1.weight.element_size()
+    cache = 2 * window * itemsize * (
+        model.d_model * (model.n_layers + 1) + tokenizer.d_model * len(tokenizer.decoder)
+    )
+    width = max(model.d_model, tokenizer.d_model)
+    activations = 4 * window * (max(model.n_heads, tokenizer.n_heads) * window + max(model.ff_dim, tokenizer.ff_dim) + 4 * width)
+    return cache + activations
+
+
+class PathAccumulator:
+    """
+    Collects the sample paths of `auto_regressive_inference` chunk by chunk.
+
+    Keeps the running sum (for the mean forecast) and the running moments of the last step (for the standard error
+    of its mean); the paths themselves are only stored if `keep_paths` is set.
+
+    Args:
+        batch_size (int): Number of series.
+        capacity (int): Maximum number of paths per series.
+        keep_paths (bool): Store every path, see `paths()`.
+    """
+
+    def __init__(self, batch_size, capacity, keep_paths=False):
+        self.batch_size = batch_size
+        self.capacity = capacity
+        self.keep_paths = keep_paths
+        self.count = 0
+        self._sum = None
+        self._last_sum = None
+        self._last_sq_sum = None
+        self._paths = None
+
+    def add(self, paths):
+        """Adds a chunk of shape (batch_size, n, pred_len, d_in)."""
+        n = paths.shape[1]
+        if self.count + n > self.capacity:
+            raise ValueError(f"Accumulator holds at most {self.capacity} paths per series, got {self.count + n}.")
+        last = paths[:, :, -1, :].astype(np.float64)
+        if self._sum is None:
+            self._sum = paths.sum(axis=1)
+            self._last_sum = last.sum(axis=1)
+            self._last_sq_sum = np.square(last).sum(axis=1)
+            if self.keep_paths:
+                self._paths = np.empty((self.batch_size, self.capacity) + paths.shape[2:], dtype=paths.dtype)
+        else:
+            self._sum += paths.sum(axis=1)
+            self._last_sum += last.sum(axis=1)
+            self._last_sq_sum += np.square(last).sum(axis=1)
+        if self.keep_paths:
+            self._paths[:, self.count:self.count + n] = paths
+        self.count += n
+
+    def mean(self):
+        """Mean forecast of shape (batch_size, pred_len, d_in)."""
+        return self._sum / self.count
+
+    def paths(self):
+        """All paths so far, of shape (batch_size, count, pred_len, d_in); requires `keep_paths`."""
+        if not self.keep_paths:
+            raise ValueError("Paths were not kept, construct the accumulator with keep_paths=True.")
+        return self._paths[:, :self.count]
+
+    def last_step_std_error(self):
+        """Standard error of the mean last-step value, shape (batch_size, d_in); needs at least two paths."""
+        mean = self._last_sum / self.count
+        variance = (self._last_sq_sum - self.count * np.square(mean)) / (self.count - 1)
+        return np.sqrt(np.maximum(variance, 0.0) / self.count)
+
+
+def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip=5, T=1.0, top_k=0, top_p=0.99, sample_count=5, verbose=False, use_cache=True, return_paths=False, padding_mask=None, seed=None, tolerance=None, path_increment=4, target_index=3, max_memory=None, progress=None):
+    """
+    Autoregressively samples `pred_len` future tokens and decodes them back to the input space.
+
+    With `use_cache=True` the Transformer keeps per-layer keys/values, so after the first step only the newly
+    sampled token is run through the model. Once the sequence outgrows `max_context` the window starts sliding,
+    which invalidates the cache; those steps fall back to a full-window forward pass exactly like `use_cache=False`.
+
+    The history is identical for every sample path, so it is tokenized (and, with the cache, prefilled) once per
+    series; the resulting tokens and cache are then fanned out so that only the stochastic decoding is replicated.
+    Likewise only the generated tail is reconstructed by the tokenizer decoder (see `prefill_tail_decoder`).
+
+    Series with shorter histories can share a batch by left-padding them to a common length and passing
+    `padding_mask` (nonzero at the padded history positions, shape (batch_size, seq_len)). Padded positions are
+    masked out of every attention layer, in the tokenizer as well as the model, and RoPE only sees relative
+    positions, so each series is forecast as if it were run on its own.
+
+    `T` and `top_p` may be scalars or hold one value per series (shape (batch_size,)), e.g. to run a sweep over
+    sampling settings, or requests with different settings, as one batched decode.
+
+    Tokens are drawn with `model.sampling.sample_tokens`. With `seed` (an int, or one int per series) every sample path
+    gets its own seeded generator (see `RowGenerator.for_paths`), so a series' forecast depends only on its data, its
+    sampling settings and its seed, not on the rest of the batch; without it the global RNG is used.
+
+    Adaptive sampling: with `tolerance` (a scalar or one value per series, in normalised units) the paths are drawn
+    in rounds of `path_increment` per series, all sharing the history prefill, until the standard error of the mean
+    of feature `target_index` (the close for Kronos inputs) at the last step is at most `tolerance` for every series.
+    `sample_count` then caps the number of paths; `return_paths=True` shows how many were used. Seeded paths do not
+    depend on the rounds, so an adaptive run that stops after n paths returns the same paths as `sample_count=n`.
+
+    Memory: every path carries its own caches, so memory grows with `batch_size * sample_count`. With `max_memory`
+    (bytes) the paths are decoded in chunks sized by `path_memory_bytes` (at least one path per series each) and
+    folded into a `PathAccumulator`, so large sample counts only cost time. Seeded paths do not depend on the chunking.
+
+    `progress`, if given, is called with the completed fraction of the `sample_count` paths (0 to 1) after every decode
+    step, and with 1.0 at the end (also when adaptive sampling stops early).
+
+    Returns:
+        np.ndarray: Forecast of shape (batch_size, pred_len, d_in), averaged over the sample paths, or the
+            individual paths of shape (batch_size, sample_count, pred_len, d_in) if `return_paths` is True.
+    """
+    return exhaust(iter_auto_regressive_inference(
+        tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip, T, top_k, top_p, sample_count, verbose,
+        use_cache=use_cache, return_paths=return_paths, padding_mask=padding_mask, seed=seed, tolerance=tolerance,
+        path_increment=path_increment, target_index=target_index, max_memory=max_memory, progress=progress,
+    ))
+
+
+def exhaust(generator, on_item=None):
+    """Runs `generator` to completion, passing every yielded item to `on_item` (if given); returns its return value."""
+    while True:
+        try:
+            item = next(generator)
+        except StopIteration as stop:
+            return stop.value
+        if on_item is not None:
+            on_item(item)
+
+
+@torch.no_grad()
+def iter_auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context, pred_len, clip=5, T=1.0, top_k=0, top_p=0.99, sample_count=5, verbose=False, use_cache=True, return_paths=False, padding_mask=None, seed=None, tolerance=None, path_increment=4, target_index=3, max_memory=None, progress=None, decode_steps=False):
+    """
+    Generator form of `auto_regressive_inference` (same arguments and return value, see there).
+
+    Yields `(first_path, step, rows)` after every decode step of every chunk of paths: the chunk covers paths
+    `first_path ..` of each series and `step` counts from 0. With `decode_steps` the sampled tokens are decoded right
+    away and `rows` holds the step's values, shape (batch_size, path_count, d_in) in the normalised input space;
+    otherwise (or when the decode window no longer contains the history) `rows` is None and the tail is decoded once
+    at the end of the chunk. Either way the final forecast is the same, up to floating point rounding.
+    """
+    x = torch.clip(x, -clip, clip)
+    # Low-precision (e.g. bfloat16) models get inputs in their own dtype; sampling and outputs stay in fp32
+    x = x.to(tokenizer.embed.weight.dtype)
+
+    device = x.device
+    x_stamp = x_stamp.to(device)
+    y_stamp = y_stamp.to(device)
+    if padding_mask is not None:
+        padding_mask = padding_mask.to(device).bool()
+
+    seeds = None
+    if seed is not None:
+        seeds = [seed] * x.size(0) if np.ndim(seed) == 0 else list(seed)
+        if len(seeds) != x.size(0):
+            raise ValueError(f"Expected one seed per series ({x.size(0)}), got {len(seeds)}.")
+
+    series_token = tokenizer.encode(x, half=True, padding_mask=padding_mask)
+
+    initial_seq_len = x.size(1)
+    total_seq_len = initial_seq_len + pred_len
+    series_stamp = torch.cat([x_stamp, y_stamp], dim=1)
+    series_padding_mask = None
+    if padding_mask is not None:
+        # Generated positions are never padding
+        series_padding_mask = torch.cat([padding_mask, padding_mask.new_zeros(padding_mask.size(0), pred_len)], dim=1)
+
+    # Prefill the history once per series; every round of sample paths starts from its own copy of the cache
+    prefill = None
+    if use_cache and initial_seq_len <= max_context:
+        prefill_cache = model.new_kv_cache()
+        s1_logits, context = model.prefill(series_token[0], series_token[1], prefill_cache, stamp=x_stamp,
+                                           padding_mask=padding_mask)
+        prefill = (prefill_cache, s1_logits, context)
+
+    context_start = max(0, total_seq_len - max_context)
+    # The tail decode pays off once the history prefill is shared by several paths (and is needed to decode every step)
+    dec_prefill = None
+    if use_cache and (sample_count > 1 or decode_steps) and context_start < initial_seq_len:
+        history_tokens = [t[:, context_start:] for t in series_token]
+        history_mask = padding_mask[:, context_start:] if padding_mask is not None else None
+        dec_prefill = prefill_tail_decoder(tokenizer, history_tokens, padding_mask=history_mask)
+
+    def sample_paths(path_count, first_path):
+        """
+        Samples paths `first_path .. first_path + path_count - 1` of every series, yielding the step events; returns
+        (batch_size, path_count, pred_len, d_in).
+        """
+        generator = None
+        if seeds is not None:
+            generator = RowGenerator.for_paths(seeds, path_count, device, first_path=first_path)
+
+        row_T = expand_sampling_param(T, x.size(0), path_count, device)
+        row_top_p = expand_sampling_param(top_p, x.size(0), path_count, device)
+
+        x_token = [t.repeat_interleave(path_count, dim=0) for t in series_token]
         batch_size = x_token[0].size(0)
-        total_seq_len = initial_seq_len + pred_len
-        full_stamp = torch.cat([x_stamp, y_stamp], dim=1)
+        full_stamp = series_stamp.repeat_interleave(path_count, dim=0)
+        full_padding_mask = None
+        if series_padding_mask is not None:
+            full_padding_mask = series_padding_mask.repeat_interleave(path_count, dim=0)
 
         generated_pre = x_token[0].new_empty(batch_size, pred_len)
         generated_post = x_token[1].new_empty(batch_size, pred_len)
@@ -413,7 +751,13 @@ def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context
             pre_buffer[:, :buffer_len] = x_token[0][:, start_idx:start_idx + buffer_len]
             post_buffer[:, :buffer_len] = x_token[1][:, start_idx:start_idx + buffer_len]
 
+        kv_cache = prefill[0].repeated(path_count) if prefill is not None else None
+        # Decoding step by step continues the tail decoder cache, giving the same rows as one decode at the end
+        step_dec_cache = dec_prefill.repeated(path_count) if decode_steps and dec_prefill is not None else None
+        step_rows = []
+
         if verbose:
+            from tqdm import trange  # Only needed for progress bars
             ran = trange
         else:
             ran = range
@@ -430,16 +774,34 @@ def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context
                 input_tokens = [pre_buffer, post_buffer]
 
             context_end = current_seq_len
-            context_start = max(0, context_end - max_context)
-            current_stamp = full_stamp[:, context_start:context_end, :].contiguous()
-
-            s1_logits, context = model.decode_s1(input_tokens[0], input_tokens[1], current_stamp)
-            s1_logits = s1_logits[:, -1, :]
-            sample_pre = sample_from_logits(s1_logits, temperature=T, top_k=top_k, top_p=top_p, sample_logits=True)
-
-            s2_logits = model.decode_s2(context, sample_pre)
-            s2_logits = s2_logits[:, -1, :]
-            sample_post = sample_from_logits(s2_logits, temperature=T, top_k=top_k, top_p=top_p, sample_logits=True)
+            window_start = max(0, context_end - max_context)
+            current_stamp = full_stamp[:, window_start:context_end, :].contiguous()
+
+            uniform = generator.uniform(2) if generator is not None else None
+            step_cache = kv_cache if current_seq_len <= max_context else None
+            if step_cache is not None and i > 0:
+                # Only the token sampled in the previous step is new; everything before it is cached.
+                new_pos = slice(current_seq_len - 1, current_seq_len)
+                sample_pre, sample_post = model.decode_step(pre_buffer[:, new_pos], post_buffer[:, new_pos],
+                                                            full_stamp[:, new_pos, :], step_cache,
+                                                            temperature=row_T, top_k=top_k, top_p=row_top_p, uniform=uniform)
+            else:
+                window_mask = None
+                if step_cache is None:
+                    if full_padding_mask is not None:
+                        window_mask = full_padding_mask[:, window_start:context_end]
+                    s1_logits, context = model.decode_s1(input_tokens[0], input_tokens[1], current_stamp,
+                                                         padding_mask=window_mask, last_only=True)
+                else:
+                    # First step on top of the shared prefill
+                    s1_logits = prefill[1].repeat_interleave(path_count, dim=0)
+                    context = prefill[2].repeat_interleave(path_count, dim=0)
+                s1_logits = s1_logits[:, -1, :].float()
+                sample_pre = sample_tokens(s1_logits, row_T, top_k, row_top_p, uniform=None if uniform is None else uniform[:, 0])
+
+                s2_logits = model.decode_s2(context, sample_pre, padding_mask=window_mask, last_only=True, kv_cache=step_cache)
+                s2_logits = s2_logits[:, -1, :].float()
+                sample_post = sample_tokens(s2_logits, row_T, top_k, row_top_p, uniform=None if uniform is None else uniform[:, 1])
 
             generated_pre[:, i] = sample_pre.squeeze(-1)
             generated_post[:, i] = sample_post.squeeze(-1)
@@ -453,20 +815,61 @@ def auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, max_context
                 pre_buffer[:, -1] = sample_pre.squeeze(-1)
                 post_buffer[:, -1] = sample_post.squeeze(-1)
 
-        full_pre = torch.cat([x_token[0], generated_pre], dim=1)
-        full_post = torch.cat([x_token[1], generated_post], dim=1)
+            if progress is not None:
+                progress(min(1.0, (first_path + path_count * (i + 1) / pred_len) / sample_count))
 
-        context_start = max(0, total_seq_len - max_context)
-        input_tokens = [
-            full_pre[:, context_start:total_seq_len].contiguous(),
-            full_post[:, context_start:total_seq_len].contiguous()
-        ]
-        z = tokenizer.decode(input_tokens, half=True)
-        z = z.reshape(-1, sample_count, z.size(1), z.size(2))
-        preds = z.cpu().numpy()
-        preds = np.mean(preds, axis=1)
+            rows = None
+            if step_dec_cache is not None:
+                rows = tokenizer.decode([sample_pre, sample_post], half=True, kv_cache=step_dec_cache)[:, -1, :]
+                step_rows.append(rows)
+                rows = rows.reshape(-1, path_count, rows.size(-1)).float().cpu().numpy()
+            yield first_path, i, rows
 
-        return preds
+
+        if step_dec_cache is not None:
+            z = torch.stack(step_rows, dim=1)
+        elif dec_prefill is not None:
+            z = tokenizer.decode([generated_pre, generated_post], half=True, kv_cache=dec_prefill.repeated(path_count))
+        else:
+            full_pre = torch.cat([x_token[0], generated_pre], dim=1)
+            full_post = torch.cat([x_token[1], generated_post], dim=1)
+            input_tokens = [
+                full_pre[:, context_start:total_seq_len].contiguous(),
+                full_post[:, context_start:total_seq_len].contiguous()
+            ]
+            window_mask = full_padding_mask[:, context_start:total_seq_len] if full_padding_mask is not None else None
+            z = tokenizer.decode(input_tokens, half=True, padding_mask=window_mask)[:, -pred_len:, :]
+        z = z.reshape(-1, path_count, z.size(1), z.size(2))
+        return z.float().cpu().numpy()
+
+    chunk_paths = sample_count
+    if max_memory is not None:
+        series_bytes = x.size(0) * path_memory_bytes(tokenizer, model, total_seq_len, max_context)
+        chunk_paths = max(1, int(max_memory // series_bytes))
+    accumulator = PathAccumulator(x.size(0), sample_count, keep_paths=return_paths)
+
+    def draw(path_count):
+        end = accumulator.count + path_count
+        while accumulator.count < end:
+            accumulator.add((yield from sample_paths(min(chunk_paths, end - accumulator.count), accumulator.count)))
+
+    if tolerance is None:
+        yield from draw(sample_count)
+    else:
+        tolerance = np.broadcast_to(np.asarray(tolerance, dtype=np.float64), (x.size(0),))
+        # The standard error needs at least two paths
+        increment = max(2, path_increment)
+        yield from draw(min(increment, sample_count))
+        while accumulator.count < sample_count:
+            if np.all(accumulator.last_step_std_error()[:, target_index] <= tolerance):
+                break
+            yield from draw(min(increment, sample_count - accumulator.count))
+    if progress is not None:
+        progress(1.0)
+
+    if return_paths:
+        return accumulator.paths()
+    return accumulator.mean()
 
 
 def calc_time_stamps(x_timestamp):
@@ -480,12 +883,28 @@ def calc_time_stamps(x_timestamp):
 
 
 class KronosPredictor:
+    """
+    High-level forecasting interface around a Kronos model and its tokenizer.
 
-    def __init__(self, model, tokenizer, device=None, max_context=512, clip=5):
+    Args:
+        model (Kronos): Kronos model.
+        tokenizer (KronosTokenizer): Matching tokenizer.
+        device (str, optional): Target device; auto-detected if None.
+        max_context (int): Maximum context length in tokens.
+        clip (float): Clipping bound for normalised inputs.
+        precision (str): Inference precision, see `model.precision.PRECISIONS`. "bf16" falls back to "fp32" on CPUs
+            without native bfloat16 support; the precision actually used is stored in `self.precision`.
+        max_memory_mb (float, optional): Memory budget of one forecast call; larger sample counts are decoded in
+            chunks of paths that fit into it (see `auto_regressive_inference`). None decodes all paths at once.
+    """
+
+    def __init__(self, model, tokenizer, device=None, max_context=512, clip=5, precision='fp32', max_memory_mb=None):
         self.tokenizer = tokenizer
         self.model = model
         self.max_context = max_context
         self.clip = clip
+        self.max_memory_mb = max_memory_mb
+        self.precision = resolve_precision(precision)
         self.price_cols = ['open', 'high', 'low', 'close']
         self.vol_col = 'volume'
         self.amt_vol = 'amount'
@@ -504,19 +923,102 @@ class KronosPredictor:
 
         self.tokenizer = self.tokenizer.to(self.device)
         self.model = self.model.to(self.device)
+        self.model, self.tokenizer = apply_precision(self.model, self.tokenizer, self.precision)
+
+        # Build the shared RoPE tables once for the whole context instead of growing them during decoding
+        share_rotary_embeddings(self.tokenizer, max_len=self.max_context)
+        share_rotary_embeddings(self.model, max_len=self.max_context)
 
-    def generate(self, x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose):
+    def generate(self, x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose, return_paths=False, padding_mask=None, seed=None, tolerance=None, path_increment=4, progress=None):
+        preds = exhaust(self.generate_steps(x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose,
+                                            return_paths=return_paths, padding_mask=padding_mask, seed=seed,
+                                            tolerance=tolerance, path_increment=path_increment, progress=progress))
+        preds = preds[..., -pred_len:, :]
+        return preds
 
+    def generate_steps(self, x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose, return_paths=False, padding_mask=None, seed=None, tolerance=None, path_increment=4, progress=None, decode_steps=False):
+        """Like `generate`, but returns the `iter_auto_regressive_inference` generator (step events, then the forecast)."""
         x_tensor = torch.from_numpy(np.array(x).astype(np.float32)).to(self.device)
         x_stamp_tensor = torch.from_numpy(np.array(x_stamp).astype(np.float32)).to(self.device)
         y_stamp_tensor = torch.from_numpy(np.array(y_stamp).astype(np.float32)).to(self.device)
+        if padding_mask is not None:
+            padding_mask = torch.from_numpy(np.asarray(padding_mask, dtype=bool)).to(self.device)
 
-        preds = auto_regressive_inference(self.tokenizer, self.model, x_tensor, x_stamp_tensor, y_stamp_tensor, self.max_context, pred_len,
-                                          self.clip, T, top_k, top_p, sample_count, verbose)
-        preds = preds[:, -pred_len:, :]
-        return preds
+        return iter_auto_regressive_inference(self.tokenizer, self.model, x_tensor, x_stamp_tensor, y_stamp_tensor, self.max_context, pred_len,
+                                              self.clip, T, top_k, top_p, sample_count, verbose, return_paths=return_paths,
+                                              padding_mask=padding_mask, seed=seed, tolerance=tolerance,
+                                              path_increment=path_increment, target_index=self.price_cols.index('close'),
+                                              max_memory=self.max_memory_mb * 2 ** 20 if self.max_memory_mb is not None else None,
+                                              progress=progress, decode_steps=decode_steps)
+
+    def _partial_forecasts(self, steps, means, stds, y_timestamps):
+        """
+        Consumes the step events of `generate_steps` and yields the forecast decoded so far, as a list with one
+        de-normalised DataFrame per series (the mean over the first chunk of paths, indexed by the first `step + 1`
+        timestamps); returns the generator's final forecast.
+        """
+        columns = self.price_cols + [self.vol_col, self.amt_vol]
+        step_means = []
+        while True:
+            try:
+                first_path, step, rows = next(steps)
+            except StopIteration as stop:
+                return stop.value
+            if first_path != 0 or rows is None:
+                continue
+            step_means.append(rows.mean(axis=1))
+            decoded = np.stack(step_means, axis=1)  # (B, step + 1, feat)
+            yield [
+                pd.DataFrame(decoded[i] * (stds[i] + 1e-5) + means[i], columns=columns, index=y_timestamps[i][:step + 1])
+                for i in range(len(y_timestamps))
+            ]
+
+    def predict(self, df, x_timestamp, y_timestamp, pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=1, verbose=True, return_paths=False, seed=None, tolerance=None, path_increment=4, progress=None, partial=None):
+        """
+        Forecasts `pred_len` steps for a single series.
+
+        With an integer `seed` the sample paths are drawn from their own seeded generators, so the same inputs and seed
+        always give the same forecast, also when the series is part of a `predict_batch` call.
+
+        With `tolerance` the paths are drawn adaptively, `path_increment` at a time, until the standard error of the
+        mean final close is at most `tolerance` times the last observed close (e.g. 0.005 = 0.5%) or `sample_count`
+        paths were drawn, see `auto_regressive_inference`.
 
-    def predict(self, df, x_timestamp, y_timestamp, pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=1, verbose=True):
+        `progress`, if given, receives the completed fraction of the forecast (0 to 1) after every decode step, and
+        `partial` the forecast decoded so far, see `predict_stream`.
+
+        Returns:
+            pd.DataFrame: Mean forecast over the sample paths, indexed by `y_timestamp`; the number of paths used is
+                stored in `pred_df.attrs['sample_count']`. If `return_paths` is True, a tuple `(pred_df, paths)` where
+                `paths` is the de-normalised array of shape (sample_count, pred_len, 6) from the same run, with columns
+                ordered as in `pred_df`.
+        """
+        steps = self._predict_steps(df, x_timestamp, y_timestamp, pred_len, T, top_k, top_p, sample_count, verbose,
+                                    return_paths, seed, tolerance, path_increment, progress, stream=partial is not None)
+        return exhaust(steps, None if partial is None else lambda pred_dfs: partial(pred_dfs[0]))
+
+    def predict_stream(self, df, x_timestamp, y_timestamp, pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=1, return_paths=False, seed=None, tolerance=None, path_increment=4, progress=None):
+        """
+        Generator form of `predict`: yields the forecast as it is decoded, then the result of `predict`.
+
+        After every decode step a DataFrame with the steps decoded so far is yielded (indexed by the first rows of
+        `y_timestamp`), so a caller can show the first hours of the forecast while the rest is still being sampled.
+        Partial forecasts average the first chunk of paths (all of them unless `max_memory_mb` or `tolerance` split
+        the paths); the last item is exactly what `predict` returns for the same arguments, up to floating point
+        rounding, and the sampled paths do not depend on whether the forecast is streamed.
+        """
+        steps = self._predict_steps(df, x_timestamp, y_timestamp, pred_len, T, top_k, top_p, sample_count, False,
+                                    return_paths, seed, tolerance, path_increment, progress, stream=True)
+        while True:
+            try:
+                pred_dfs = next(steps)
+            except StopIteration as stop:
+                yield stop.value
+                return
+            yield pred_dfs[0]
+
+    def _predict_steps(self, df, x_timestamp, y_timestamp, pred_len, T, top_k, top_p, sample_count, verbose, return_paths, seed, tolerance, path_increment, progress, stream):
+        """Generator behind `predict` and `predict_stream`: yields partial forecasts (with `stream`), returns the result."""
 
         if not isinstance(df, pd.DataFrame):
             raise ValueError("Input must be a pandas DataFrame.")
@@ -542,6 +1044,7 @@ class KronosPredictor:
         y_stamp = y_time_df.values.astype(np.float32)
 
         x_mean, x_std = np.mean(x, axis=0), np.std(x, axis=0)
+        norm_tolerance = self._normalised_tolerance(tolerance, x, x_std)
 
         x = (x - x_mean) / (x_std + 1e-5)
         x = np.clip(x, -self.clip, self.clip)
@@ -550,34 +1053,76 @@ class KronosPredictor:
         x_stamp = x_stamp[np.newaxis, :]
         y_stamp = y_stamp[np.newaxis, :]
 
-        preds = self.generate(x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose)
+        # Adaptive runs need the paths to tell how many were drawn
+        keep_paths = return_paths or tolerance is not None
+        steps = self.generate_steps(x, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, verbose,
+                                    return_paths=keep_paths, seed=seed, tolerance=norm_tolerance,
+                                    path_increment=path_increment, progress=progress, decode_steps=stream)
+        preds = yield from self._partial_forecasts(steps, [x_mean], [x_std], [y_timestamp])
 
         preds = preds.squeeze(0)
         preds = preds * (x_std + 1e-5) + x_mean
 
+        paths_used = sample_count
+        if keep_paths:
+            paths, preds = preds, preds.mean(axis=0)
+            paths_used = paths.shape[0]
+
         pred_df = pd.DataFrame(preds, columns=self.price_cols + [self.vol_col, self.amt_vol], index=y_timestamp)
+        pred_df.attrs['sample_count'] = paths_used
+        if return_paths:
+            return pred_df, paths
         return pred_df
 
+    def _normalised_tolerance(self, tolerance, x, x_std):
+        """Converts a tolerance relative to the last close of the raw history `x` into normalised units."""
+        if tolerance is None:
+            return None
+        close_idx = self.price_cols.index('close')
+        return tolerance * abs(float(x[-1, close_idx])) / (x_std[close_idx] + 1e-5)
+
 
-    def predict_batch(self, df_list, x_timestamp_list, y_timestamp_list, pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=1, verbose=True):
+    def predict_batch(self, df_list, x_timestamp_list, y_timestamp_list, pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=1, verbose=True, return_paths=False, seed=None, tolerance=None, path_increment=4, progress=None, partial=None):
         """
-        Perform parallel (batch) prediction on multiple time series. All series must have the same historical length and prediction length (pred_len).
+        Perform parallel (batch) prediction on multiple time series. All series share the prediction length (pred_len); shorter
+        histories are left-padded to the longest one and masked out of attention, so each result matches a separate `predict` call.
 
         Args:
             df_list (List[pd.DataFrame]): List of input DataFrames, each containing price columns and optional volume/amount columns.
             x_timestamp_list (List[pd.DatetimeIndex or Series]): List of timestamps corresponding to historical data, length should match the number of rows in each DataFrame.
             y_timestamp_list (List[pd.DatetimeIndex or Series]): List of future prediction timestamps, length should equal pred_len.
             pred_len (int): Number of prediction steps.
-            T (float): Sampling temperature.
+            T (float or List[float]): Sampling temperature, or one temperature per series.
             top_k (int): Top-k filtering threshold.
-            top_p (float): Top-p (nucleus sampling) threshold.
+            top_p (float or List[float]): Top-p (nucleus sampling) threshold, or one threshold per series.
             sample_count (int): Number of parallel samples per series, automatically averaged internally.
             verbose (bool): Whether to display autoregressive progress.
+            return_paths (bool): Also return the individual sample paths of each series.
+            seed (int or List[int], optional): Sampling seed shared by all series, or one seed per series. A seeded
+                series gets the same forecast as `predict(..., seed=seed)` on its own.
+            tolerance (float or List[float], optional): Adaptive sampling tolerance relative to each series' last close,
+                as in `predict`. Paths are added until every series meets its tolerance, so all series get the same
+                number of paths.
+            path_increment (int): Paths per series drawn in each adaptive round.
+            progress (Callable[[float], None], optional): Receives the completed fraction of the batch (0 to 1) after
+                every decode step.
+            partial (Callable[[List[pd.DataFrame]], None], optional): Receives the forecasts decoded so far, one
+                DataFrame per series, after every decode step (see `predict_stream`).
 
         Returns:
             List[pd.DataFrame]: List of prediction results in the same order as input, each DataFrame contains
                                 `open, high, low, close, volume, amount` columns, indexed by corresponding `y_timestamp`.
+                                If `return_paths` is True, each item is a tuple `(pred_df, paths)` with `paths` of shape
+                                (sample_count, pred_len, 6), as in `predict`. `pred_df.attrs['sample_count']` holds
+                                the number of paths used.
         """
+        steps = self._predict_batch_steps(df_list, x_timestamp_list, y_timestamp_list, pred_len, T, top_k, top_p,
+                                          sample_count, verbose, return_paths, seed, tolerance, path_increment, progress,
+                                          stream=partial is not None)
+        return exhaust(steps, partial)
+
+    def _predict_batch_steps(self, df_list, x_timestamp_list, y_timestamp_list, pred_len, T, top_k, top_p, sample_count, verbose, return_paths, seed, tolerance, path_increment, progress, stream):
+        """Generator behind `predict_batch`: yields partial forecasts (with `stream`), returns the result."""
         # Basic validation
         if not isinstance(df_list, (list, tuple)) or not isinstance(x_timestamp_list, (list, tuple)) or not isinstance(y_timestamp_list, (list, tuple)):
             raise ValueError("df_list, x_timestamp_list, y_timestamp_list must be list or tuple types.")
@@ -591,6 +1136,7 @@ class KronosPredictor:
         y_stamp_list = []
         means = []
         stds = []
+        norm_tolerances = []
         seq_lens = []
         y_lens = []
 
@@ -627,6 +1173,9 @@ class KronosPredictor:
                 raise ValueError(f"y_timestamp length at index {i} should equal pred_len={pred_len}, got {y_stamp.shape[0]}.")
 
             x_mean, x_std = np.mean(x, axis=0), np.std(x, axis=0)
+            if tolerance is not None:
+                series_tolerance = tolerance[i] if np.ndim(tolerance) else tolerance
+                norm_tolerances.append(self._normalised_tolerance(series_tolerance, x, x_std))
             x_norm = (x - x_mean) / (x_std + 1e-5)
             x_norm = np.clip(x_norm, -self.clip, self.clip)
 
@@ -639,24 +1188,43 @@ class KronosPredictor:
             seq_lens.append(x_norm.shape[0])
             y_lens.append(y_stamp.shape[0])
 
-        # Require all series to have consistent historical and prediction lengths for batch processing
-        if len(set(seq_lens)) != 1:
-            raise ValueError(f"Parallel prediction requires all series to have consistent historical lengths, got: {seq_lens}")
         if len(set(y_lens)) != 1:
             raise ValueError(f"Parallel prediction requires all series to have consistent prediction lengths, got: {y_lens}")
 
+        # Left-pad ragged histories to a common length; padded positions are masked in every attention layer
+        padding_mask = None
+        max_len = max(seq_lens)
+        if len(set(seq_lens)) != 1:
+            padding_mask = np.zeros((num_series, max_len), dtype=bool)
+            for i, seq_len in enumerate(seq_lens):
+                pad = max_len - seq_len
+                padding_mask[i, :pad] = True
+                x_list[i] = np.pad(x_list[i], ((pad, 0), (0, 0)))
+                # Repeat the first stamp so padded positions still carry valid calendar indices
+                x_stamp_list[i] = np.pad(x_stamp_list[i], ((pad, 0), (0, 0)), mode='edge')
+
         x_batch = np.stack(x_list, axis=0).astype(np.float32)           # (B, seq_len, feat)
         x_stamp_batch = np.stack(x_stamp_list, axis=0).astype(np.float32) # (B, seq_len, time_feat)
         y_stamp_batch = np.stack(y_stamp_list, axis=0).astype(np.float32) # (B, pred_len, time_feat)
 
-        preds = self.generate(x_batch, x_stamp_batch, y_stamp_batch, pred_len, T, top_k, top_p, sample_count, verbose)
-        # preds: (B, pred_len, feat)
+        keep_paths = return_paths or tolerance is not None
+        steps = self.generate_steps(x_batch, x_stamp_batch, y_stamp_batch, pred_len, T, top_k, top_p, sample_count, verbose,
+                                    return_paths=keep_paths, padding_mask=padding_mask, seed=seed,
+                                    tolerance=norm_tolerances if tolerance is not None else None,
+                                    path_increment=path_increment, progress=progress, decode_steps=stream)
+        preds = yield from self._partial_forecasts(steps, means, stds, y_timestamp_list)
+        # preds: (B, pred_len, feat), or (B, paths, pred_len, feat) with return_paths / tolerance
 
         pred_dfs = []
         for i in range(num_series):
             preds_i = preds[i] * (stds[i] + 1e-5) + means[i]
+            paths_used = sample_count
+            if keep_paths:
+                paths_i, preds_i = preds_i, preds_i.mean(axis=0)
+                paths_used = paths_i.shape[0]
             pred_df = pd.DataFrame(preds_i, columns=self.price_cols + [self.vol_col, self.amt_vol], index=y_timestamp_list[i])
-            pred_dfs.append(pred_df)
+            pred_df.attrs['sample_count'] = paths_used
+            pred_dfs.append((pred_df, paths_i) if return_paths else pred_df)
 
         return pred_dfs
 
@@ -0,0 +1,111 @@
+"""
+Fast loading of Hugging Face Kronos checkpoints.
+
+`PyTorchModelHubMixin.from_pretrained` builds the model with randomly initialised weights and then copies the
+checkpoint over them. `load_pretrained` skips both steps: the model is built on the meta device (no allocation, no
+init) and its parameters and persistent buffers are then replaced by tensors that view a copy-on-write memory map of
+the safetensors file; the few buffers derived from the config are recomputed. Loading only parses the header; the
+weights are paged in from the OS page cache by the first forward pass, and processes serving the same checkpoint share
+those pages.
+"""
+import inspect
+import json
+import os
+
+import torch
+from huggingface_hub import hf_hub_download
+from huggingface_hub.constants import CONFIG_NAME, SAFETENSORS_SINGLE_FILE
+from huggingface_hub.errors import EntryNotFoundError
+
+_DTYPES = {
+    "F64": torch.float64, "F32": torch.float32, "F16": torch.float16, "BF16": torch.bfloat16,
+    "I64": torch.int64, "I32": torch.int32, "I16": torch.int16, "I8": torch.int8, "U8": torch.uint8,
+    "BOOL": torch.bool,
+}
+
+
+def mmap_safetensors(path):
+    """
+    Maps a safetensors file into memory without reading it.
+
+    The mapping is private (copy-on-write): the tensors can be modified in place, which never changes the file.
+
+    Returns:
+        Dict[str, torch.Tensor]: CPU tensors viewing the mapping.
+    """
+    with open(path, 'rb') as f:
+        header_len = int.from_bytes(f.read(8), 'little')
+        header = json.loads(f.read(header_len))
+    header.pop('__metadata__', None)
+
+    storage = torch.UntypedStorage.from_file(path, shared=False, nbytes=os.path.getsize(path))
+    data_start = 8 + header_len
+    tensors = {}
+    for name, info in header.items():
+        dtype = _DTYPES[info['dtype']]
+        begin, end = (data_start + offset for offset in info['data_offsets'])
+        itemsize = torch.empty((), dtype=dtype).element_size()
+        if begin % itemsize == 0:
+            tensor = torch.empty(0, dtype=dtype).set_(storage, begin // itemsize, info['shape'])
+        else:
+            # Misaligned entries (not written by safetensors itself) are copied instead of viewed
+            tensor = torch.frombuffer(bytearray(storage[begin:end]), dtype=dtype).reshape(info['shape'])
+        tensors[name] = tensor
+    return tensors
+
+
+def _materialize_buffers(model):
+    """
+    Rebuilds the buffers still on the meta device after loading: those not stored in the checkpoint
+    (non-persistent, derived from the config) are recomputed by their module's `reset_buffers()`.
+
+    Raises:
+        ValueError: If a module with such buffers cannot recompute them.
+    """
+    for module_name, module in model.named_modules():
+        if not any(buffer is not None and buffer.is_meta for buffer in module.buffers(recurse=False)):
+            continue
+        if not hasattr(module, 'reset_buffers'):
+            names = [name for name, buffer in module.named_buffers(recurse=False) if buffer.is_meta]
+            raise ValueError(f"Cannot materialize buffers {names} of module '{module_name}'")
+        module.reset_buffers()
+
+
+def _resolve(model_id, filename, **hub_kwargs):
+    if os.path.isdir(model_id):
+        return os.path.join(model_id, filename)
+    return hf_hub_download(repo_id=model_id, filename=filename, **hub_kwargs)
+
+
+def load_pretrained(cls, model_id, revision=None, cache_dir=None, local_files_only=False, token=None):
+    """
+    Loads `cls` (e.g. `Kronos` or `KronosTokenizer`) from a Hub repo or local directory saved with `save_pretrained`.
+
+    Equivalent to `cls.from_pretrained(model_id)` for safetensors checkpoints, without the random initialisation and
+    the weight copy; checkpoints without a safetensors file are delegated to `from_pretrained`.
+
+    Raises:
+        ValueError: If the checkpoint does not provide every parameter of the model.
+    """
+    hub_kwargs = dict(revision=revision, cache_dir=cache_dir, local_files_only=local_files_only, token=token)
+    try:
+        weights_file = _resolve(model_id, SAFETENSORS_SINGLE_FILE, **hub_kwargs)
+    except EntryNotFoundError:
+        weights_file = None
+    if weights_file is None or not os.path.exists(weights_file):
+        return cls.from_pretrained(model_id, **hub_kwargs)
+    with open(_resolve(model_id, CONFIG_NAME, **hub_kwargs)) as f:
+        config = json.load(f)
+    accepted = inspect.signature(cls.__init__).parameters
+    config = {k: v for k, v in config.items() if k in accepted}
+
+    # The device context is a thread-local function mode: modules built concurrently on other threads are unaffected
+    with torch.device('meta'):
+        model = cls(**config)
+    model.load_state_dict(mmap_safetensors(weights_file), strict=False, assign=True)
+
+    missing = [name for name, param in model.named_parameters() if param.is_meta]
+    if missing:
+        raise ValueError(f"Checkpoint {model_id} is missing parameters: {', '.join(missing)}")
+    _materialize_buffers(model)
+    return model.eval()
@@ -73,12 +73,18 @@ class BinarySphericalQuantizer(nn.Module):
 
         # we only need to keep the codebook portion up to the group size
         # because we approximate the H loss with this subcode
-        group_codes = torch.arange(2 ** self.group_size)
-        group_codebook = self.indexes_to_codes(group_codes).float()[:, -group_size:]
-        self.register_buffer('group_codebook', group_codebook, persistent=False)
+        self.register_buffer('group_codebook', self._group_codebook(), persistent=False)
 
         self.soft_entropy = soft_entropy  # soft_entropy: Sec 3.2 of https://arxiv.org/pdf/1911.05894.pdf
 
+    def _group_codebook(self):
+        group_codes = torch.arange(2 ** self.group_size, device=self.basis.device)
+        return self.indexes_to_codes(group_codes).float()[:, -self.group_size:]
+
+    def reset_buffers(self):
+        """Recomputes the non-persistent buffers, e.g. after the module was built on the meta device."""
+        self.group_codebook = self._group_codebook()
+
     def quantize(self, z):
         assert z.shape[-1] == self.embed_dim, f"Expected {self.embed_dim} dimensions, got {z.shape[-1]}"
 
@@ -282,26 +288,44 @@ class FeedForward(nn.Module):
 
 
 class RotaryPositionalEmbedding(nn.Module):
+    """
+    Rotary positional embedding with a cos/sin table that only ever grows.
+
+    The table covers positions [0, seq_len_cached) and is sliced by position offset, so decoding steps of varying
+    length (or with a KV cache) reuse it instead of rebuilding it. One instance can be shared by every attention
+    layer with the same head dimension, see `share_rotary_embeddings`.
+    """
+
     def __init__(self, dim):
         super().__init__()
         inv_freq = 1.0 / (10000 ** (torch.arange(0, dim, 2).float() / dim))
         self.register_buffer("inv_freq", inv_freq)
         self.seq_len_cached = None
-        self.cos_cached = None
-        self.sin_cached = None
+        self.register_buffer("cos_cached", None, persistent=False)
+        self.register_buffer("sin_cached", None, persistent=False)
+
+    def precompute(self, seq_len, device=None):
+        """Builds the cos/sin table for positions [0, seq_len). The table is always computed and kept in fp32."""
+        device = device if device is not None else self.inv_freq.device
+        self.seq_len_cached = seq_len
+        t = torch.arange(seq_len, device=device, dtype=torch.float32)
+        freqs = torch.einsum('i,j->ij', t, self.inv_freq.to(device=device, dtype=torch.float32))
+        emb = torch.cat((freqs, freqs), dim=-1)
+        self.cos_cached = emb.cos()[None, None, :, :]
+        self.sin_cached = emb.sin()[None, None, :, :]
 
     def _update_cos_sin_cache(self, x, seq_len):
-        if seq_len != self.seq_len_cached:
-            self.seq_len_cached = seq_len
-            t = torch.arange(seq_len, device=x.device).type_as(self.inv_freq)
-            freqs = torch.einsum('i,j->ij', t, self.inv_freq)
-            emb = torch.cat((freqs, freqs), dim=-1).to(x.device)
-            self.cos_cached = emb.cos()[None, None, :, :]
-            self.sin_cached = emb.sin()[None, None, :, :]
+        if self.seq_len_cached is None or seq_len > self.seq_len_cached or self.cos_cached.device != x.device:
+            self.precompute(max(seq_len, self.seq_len_cached or 0), device=x.device)
         return self.cos_cached, self.sin_cached
 
-    def forward(self, q, k):
-        cos, sin = self._update_cos_sin_cache(q, q.shape[-2])
+    def forward(self, q, k, offset=0):
+        """
+        Rotates q and k, whose positions start at `offset` (non-zero when earlier positions live in a KV cache).
+        """
+        seq_len = q.shape[-2]
+        cos, sin = self._update_cos_sin_cache(q, offset + seq_len)
+        cos, sin = cos[:, :, offset:offset + seq_len].to(q.dtype), sin[:, :, offset:offset + seq_len].to(q.dtype)
         return (
             (q * cos) + (self._rotate_half(q) * sin),
             (k * cos) + (self._rotate_half(k) * sin),
@@ -312,6 +336,138 @@ class RotaryPositionalEmbedding(nn.Module):
         return torch.cat((-x2, x1), dim=-1)
 
 
+def share_rotary_embeddings(module, max_len=None):
+    """
+    Makes all RoPE attention layers under `module` share one `RotaryPositionalEmbedding` per head dimension.
+
+    Args:
+        module (nn.Module): Model whose attention layers should share tables.
+        max_len (int, optional): If given, precompute the shared tables up to this many positions.
+    """
+    attn_layers = [m for m in module.modules() if isinstance(m, (MultiHeadAttentionWithRoPE, MultiHeadCrossAttentionWithRoPE))]
+    shared = {}
+    for layer in attn_layers:
+        layer.rotary = shared.setdefault(layer.head_dim, layer.rotary)
+    if max_len is not None:
+        for rotary in shared.values():
+            rotary.precompute(max_len)
+    return list(shared.values())
+
+
+class LayerKVCache:
+    """Keys/values of one self-attention layer, each of shape [batch, n_heads, seq_len, head_dim]."""
+
+    def __init__(self):
+        self.k = None
+        self.v = None
+
+    @property
+    def seq_len(self):
+        return 0 if self.k is None else self.k.size(-2)
+
+    def update(self, k, v):
+        """Appends the new keys/values and returns the full (past + new) tensors."""
+        if self.k is None:
+            # Stored contiguous, like the torch.cat results of later steps, so the cache layout never changes
+            self.k, self.v = k.contiguous(), v.contiguous()
+        else:
+            self.k = torch.cat([self.k, k], dim=-2)
+            self.v = torch.cat([self.v, v], dim=-2)
+        return self.k, self.v
+
+
+class KVCache:
+    """
+    Per-layer key/value cache for incremental decoding of a causal Transformer stack.
+
+    Positions already in the cache are never recomputed: each decoding step feeds only the newly generated
+    token(s) and the attention layers extend their cached keys/values in place.
+    """
+
+    def __init__(self, n_layers):
+        self.layers = [LayerKVCache() for _ in range(n_layers)]
+        self.padding_mask = None  # [batch, seq_len] bool, True at padded positions; None while nothing is padded
+
+    def __getitem__(self, idx):
+        return self.layers[idx]
+
+    def __len__(self):
+        return len(self.layers)
+
+    @property
+    def seq_len(self):
+        return self.layers[0].seq_len
+
+    def reset(self):
+        for layer in self.layers:
+            layer.k = layer.v = None
+        self.padding_mask = None
+
+    def extend_padding_mask(self, padding_mask, new):
+        """
+        Records the padding of the positions about to be appended and returns the mask over past + new positions.
+
+        Args:
+            padding_mask (torch.Tensor, optional): Nonzero at padded new positions. Shape: [batch, new_len]
+            new (torch.Tensor): The new inputs, of shape [batch, new_len, ...]; only used for their shape and device.
+
+        Returns:
+            torch.Tensor: Bool mask of shape [batch, past_len + new_len], or None if no cached or new position is padded.
+        """
+        if padding_mask is None and self.padding_mask is None:
+            return None
+        batch_size, new_len = new.shape[:2]
+        if padding_mask is None:
+            padding_mask = torch.zeros(batch_size, new_len, dtype=torch.bool, device=new.device)
+        past = self.padding_mask
+        if past is None:
+            past = torch.zeros(batch_size, self.seq_len, dtype=torch.bool, device=new.device)
+        self.padding_mask = torch.cat([past, padding_mask.bool()], dim=1)
+        return self.padding_mask
+
+    def repeat_interleave(self, repeats):
+        """Repeats every cached row `repeats` times along the batch dimension, e.g. to fan one prefill out to sample paths."""
+        for layer in self.layers:
+            if layer.k is not None:
+                layer.k = layer.k.repeat_interleave(repeats, dim=0)
+                layer.v = layer.v.repeat_interleave(repeats, dim=0)
+        if self.padding_mask is not None:
+            self.padding_mask = self.padding_mask.repeat_interleave(repeats, dim=0)
+
+    def repeated(self, repeats):
+        """Like `repeat_interleave`, but returns a new cache and leaves this one untouched, so it can be fanned out again."""
+        cache = KVCache(len(self.layers))
+        for source, layer in zip(self.layers, cache.layers):
+            if source.k is not None:
+                layer.k = source.k.repeat_interleave(repeats, dim=0)
+                layer.v = source.v.repeat_interleave(repeats, dim=0)
+        if self.padding_mask is not None:
+            cache.padding_mask = self.padding_mask.repeat_interleave(repeats, dim=0)
+        return cache
+
+
+def padded_attention_mask(key_padding_mask, q_len, causal):
+    """
+    Boolean SDPA mask (True = may attend) of shape [batch, 1, q_len, k_len] for keys with padding.
+
+    The queries are the last `q_len` of the k_len key positions. A query left without any key (a padded position
+    under a causal mask) attends to itself only, which keeps its output finite; padded outputs are never used.
+
+    Args:
+        key_padding_mask (torch.Tensor): Nonzero at padded key positions. Shape: [batch, k_len]
+        q_len (int): Number of query positions.
+        causal (bool): Also forbid attending to later positions.
+    """
+    k_len = key_padding_mask.size(-1)
+    device = key_padding_mask.device
+    allowed = (key_padding_mask == 0)[:, None, None, :]
+    q_pos = torch.arange(k_len - q_len, k_len, device=device)[:, None]
+    k_pos = torch.arange(k_len, device=device)[None, :]
+    if causal:
+        allowed = allowed & (k_pos <= q_pos)
+    return allowed | (k_pos == q_pos)
+
+
 class MultiHeadAttentionWithRoPE(nn.Module):
     def __init__(self, d_model, n_heads, attn_dropout_p=0.0, resid_dropout_p=0.0):
         super().__init__()
@@ -327,18 +483,39 @@ class MultiHeadAttentionWithRoPE(nn.Module):
         self.attn_dropout_p = attn_dropout_p
         self.resid_dropout = nn.Dropout(resid_dropout_p)
 
-    def forward(self, x, key_padding_mask=None):
+    def forward(self, x, key_padding_mask=None, kv_cache=None):
+        """
+        Args:
+            x (torch.Tensor): Input of shape [batch, seq_len, d_model].
+            key_padding_mask (torch.Tensor, optional): Nonzero at padded positions. Shape: [batch, seq_len], or
+                [batch, past_len + seq_len] with a KV cache. Padded keys are excluded from attention.
+            kv_cache (LayerKVCache, optional): Cache of this layer's past keys/values. When given, `x` holds only
+                the new positions; their keys/values are appended to the cache and attention covers past + new.
+        """
         batch_size, seq_len, _ = x.shape
 
         q = self.q_proj(x).view(batch_size, seq_len, self.n_heads, self.head_dim).transpose(1, 2)
         k = self.k_proj(x).view(batch_size, seq_len, self.n_heads, self.head_dim).transpose(1, 2)
         v = self.v_proj(x).view(batch_size, seq_len, self.n_heads, self.head_dim).transpose(1, 2)
 
-        q, k = self.rotary(q, k)
+        past_len = kv_cache.seq_len if kv_cache is not None else 0
+        q, k = self.rotary(q, k, offset=past_len)
+        if kv_cache is not None:
+            k, v = kv_cache.update(k, v)
 
+        is_causal = True
         if key_padding_mask is not None:
-            attn_mask = key_padding_mask.unsqueeze(1).unsqueeze(2)  # [batch, 1, 1, seq_len]
-            attn_mask = attn_mask.expand(-1, self.n_heads, seq_len, -1)  # [batch, n_heads, q_len, k_len]
+            # Causal and padding constraints in one explicit mask (SDPA rejects attn_mask together with is_causal)
+            is_causal = False
+            attn_mask = padded_attention_mask(key_padding_mask, seq_len, causal=True)
+        elif past_len > 0:
+            # SDPA's is_causal aligns the mask top-left, which is wrong once q_len != k_len.
+            # A single new query may attend to every cached key; longer chunks need a bottom-right causal mask.
+            is_causal = False
+            if seq_len == 1:
+                attn_mask = None
+            else:
+                attn_mask = torch.ones(seq_len, past_len + seq_len, dtype=torch.bool, device=x.device).tril(diagonal=past_len)
         else:
             attn_mask = None
 
@@ -346,7 +523,7 @@ class MultiHeadAttentionWithRoPE(nn.Module):
             q, k, v,
             attn_mask=attn_mask,
             dropout_p=self.attn_dropout_p if self.training else 0.0,
-            is_causal=True
+            is_causal=is_causal
         )
 
         attn_output = attn_output.transpose(1, 2).contiguous().view(batch_size, seq_len, self.d_model)
@@ -368,7 +545,14 @@ class MultiHeadCrossAttentionWithRoPE(nn.Module):
         self.attn_dropout_p = attn_dropout_p
         self.resid_dropout = nn.Dropout(resid_dropout)
 
-    def forward(self, query, key, value, key_padding_mask=None):
+    def forward(self, query, key, value, key_padding_mask=None, kv_cache=None):
+        """
+        Args:
+            key_padding_mask (torch.Tensor, optional): Nonzero at padded key positions, covering the cached keys too.
+                Shape: [batch, k_len]
+            kv_cache (LayerKVCache, optional): Cache of previously projected keys/values. When given, `key`/`value`
+                hold only new positions, which are projected, appended, and attended together with the cached ones.
+        """
         batch_size, q_len, _ = query.shape
         _, seq_len, _ = key.shape
 
@@ -377,15 +561,16 @@ class MultiHeadCrossAttentionWithRoPE(nn.Module):
         v = self.v_proj(value).view(batch_size, seq_len, self.n_heads, self.head_dim).transpose(1, 2)
 
         q, k = self.rotary(q, k)
+        if kv_cache is not None:
+            k, v = kv_cache.update(k, v)
 
+        is_causal_flag = self.training
         if key_padding_mask is not None:
-            attn_mask = key_padding_mask.unsqueeze(1).unsqueeze(2)
-            attn_mask = attn_mask.expand(-1, self.n_heads, q_len, -1)
+            attn_mask = padded_attention_mask(key_padding_mask, q_len, causal=is_causal_flag)
+            is_causal_flag = False
         else:
             attn_mask = None
 
-        is_causal_flag = self.training
-
         attn_output = F.scaled_dot_product_attention(
             q, k, v,
             attn_mask=attn_mask,
@@ -396,6 +581,17 @@ class MultiHeadCrossAttentionWithRoPE(nn.Module):
         attn_output = attn_output.transpose(1, 2).contiguous().view(batch_size, q_len, self.d_model)
         return self.resid_dropout(self.out_proj(attn_output))
 
+    def extend_cache(self, key, value, kv_cache):
+        """
+        Projects `key`/`value` and appends them to `kv_cache` without attending.
+
+        Keys are stored unrotated, which matches the single-query step where RoPE reduces to position 0.
+        """
+        batch_size, seq_len, _ = key.shape
+        k = self.k_proj(key).view(batch_size, seq_len, self.n_heads, self.head_dim).transpose(1, 2)
+        v = self.v_proj(value).view(batch_size, seq_len, self.n_heads, self.head_dim).transpose(1, 2)
+        kv_cache.update(k, v)
+
 
 class HierarchicalEmbedding(nn.Module):
     def __init__(self, s1_bits, s2_bits, d_model=256):
@@ -461,6 +657,26 @@ class DependencyAwareLayer(nn.Module):
         )
         return self.norm(hidden_states + attn_out)
 
+    def step(self, hidden_states, sibling_embed, key_padding_mask=None, kv_cache=None):
+        """Last-position variant of `forward`, used for autoregressive decoding.
+
+        sibling_embed: [batch, 1, d_model], embedding of the s1 token sampled for the last position
+        hidden_states: [batch, seq_len, d_model], the full context, or only the positions not yet in `kv_cache`
+        Returns the output for the last position only: [batch, 1, d_model]
+        """
+        attn_out = self.cross_attn(
+            query=sibling_embed,
+            key=hidden_states,
+            value=hidden_states,
+            key_padding_mask=key_padding_mask,
+            kv_cache=kv_cache
+        )
+        return self.norm(hidden_states[:, -1:, :] + attn_out)
+
+    def extend_cache(self, hidden_states, kv_cache):
+        """Adds context positions to the cross-attention cache used by `step`, without computing an output."""
+        self.cross_attn.extend_cache(hidden_states, hidden_states, kv_cache)
+
 
 class TransformerBlock(nn.Module):
     def __init__(self, d_model, n_heads, ff_dim=1024, ffn_dropout_p=0.0, attn_dropout_p=0.0, resid_dropout_p=0.0):
@@ -470,10 +686,10 @@ class TransformerBlock(nn.Module):
         self.norm2 = RMSNorm(d_model)
         self.ffn = FeedForward(d_model, ff_dim, ffn_dropout_p)
 
-    def forward(self, x, key_padding_mask=None):
+    def forward(self, x, key_padding_mask=None, kv_cache=None):
         residual = x
         x = self.norm1(x)
-        attn_out = self.self_attn(x, key_padding_mask=key_padding_mask)
+        attn_out = self.self_attn(x, key_padding_mask=key_padding_mask, kv_cache=kv_cache)
         x = residual + attn_out
 
         residual = x
@@ -0,0 +1,211 @@
+"""
+Exports KronosTokenizer and Kronos to ONNX for torch-free serving (see `src/onnx_backend.py`).
+
+Five graphs are written, all with dynamic batch and sequence axes:
+
+    tokenizer_encode.onnx   x [B, T, d_in]                          -> s1_ids, s2_ids [B, T]
+    tokenizer_decode.onnx   s1_ids, s2_ids [B, T]                    -> z [B, T, d_in]
+    kronos_prefill.onnx     s1_ids, s2_ids [B, T], stamp [B, T, 5]   -> s1_logits [B, V1], context [B, 1, D],
+                                                                        present_keys/values [L, B, H, T, Dh],
+                                                                        dep_keys/values [B, Hd, T-1, Dhd]
+    kronos_step_s1.onnx     s1_ids, s2_ids [B, 1], stamp [B, 1, 5],
+                            past_keys/values [L, B, H, P, Dh]        -> s1_logits, context, present_keys/values (P+1)
+    kronos_step_s2.onnx     context [B, 1, D], s1_ids [B, 1],
+                            dep_past_keys/values [B, Hd, P, Dhd]     -> s2_logits [B, V2], dep_present_keys/values (P+1)
+
+The KV caches of `Kronos.prefill` / `Kronos.decode_step` become explicit inputs and outputs, with the Transformer
+layers stacked on the leading axis. Sampling is not part of the graphs; the runtime samples from the logits.
+A `manifest.json` next to the graphs records the dimensions the runtime needs.
+
+Usage:
+    python -m model.onnx_export --out data/onnx
+"""
+import argparse
+import json
+import os
+
+import torch
+import torch.nn as nn
+
+from model.module import KVCache, share_rotary_embeddings
+
+
+MANIFEST = 'manifest.json'
+GRAPHS = ('tokenizer_encode', 'tokenizer_decode', 'kronos_prefill', 'kronos_step_s1', 'kronos_step_s2')
+
+
+def _stack_cache(layers):
+    return torch.stack([layer.k for layer in layers]), torch.stack([layer.v for layer in layers])
+
+
+def _fill_cache(kv_cache, keys, values):
+    for i in range(keys.size(0)):
+        kv_cache[i].k, kv_cache[i].v = keys[i], values[i]
+
+
+class _TokenizerEncode(nn.Module):
+    def __init__(self, tokenizer):
+        super().__init__()
+        self.tokenizer = tokenizer
+
+    def forward(self, x):
+        s1_ids, s2_ids = self.tokenizer.encode(x, half=True)
+        return s1_ids, s2_ids
+
+
+class _TokenizerDecode(nn.Module):
+    def __init__(self, tokenizer):
+        super().__init__()
+        self.tokenizer = tokenizer
+
+    def forward(self, s1_ids, s2_ids):
+        return self.tokenizer.decode([s1_ids, s2_ids], half=True)
+
+
+class _KronosPrefill(nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, s1_ids, s2_ids, stamp):
+        kv_cache = self.model.new_kv_cache()
+        s1_logits, context = self.model.prefill(s1_ids, s2_ids, kv_cache, stamp=stamp)
+        keys, values = _stack_cache(kv_cache.layers[:-1])
+        dep = kv_cache[self.model.n_layers]
+        return s1_logits[:, -1, :], context, keys, values, dep.k, dep.v
+
+
+class _KronosStepS1(nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, s1_ids, s2_ids, stamp, past_keys, past_values):
+        kv_cache = self.model.new_kv_cache()
+        _fill_cache(kv_cache, past_keys, past_values)
+        s1_logits, context = self.model.decode_s1(s1_ids, s2_ids, stamp, kv_cache=kv_cache, last_only=True)
+        keys, values = _stack_cache(kv_cache.layers[:-1])
+        return s1_logits[:, -1, :], context, keys, values
+
+
+class _KronosStepS2(nn.Module):
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, context, s1_ids, dep_past_keys, dep_past_values):
+        kv_cache = KVCache(self.model.n_layers + 1)
+        dep = kv_cache[self.model.n_layers]
+        dep.k, dep.v = dep_past_keys, dep_past_values
+        s2_logits = self.model.decode_s2(context, s1_ids, last_only=True, kv_cache=kv_cache)
+        return s2_logits[:, -1, :], dep.k, dep.v
+
+
+def _export(module, args, path, input_names, output_names, dynamic_shapes, opset):
+    torch.onnx.export(
+        module.eval(), args, path, verbose=False,
+        input_names=list(input_names), output_names=list(output_names),
+        dynamic_shapes=dynamic_shapes, opset_version=opset, external_data=False,
+    )
+
+
+def export_onnx(model, tokenizer, out_dir, max_context=512, opset=18):
+    """
+    Writes the tokenizer and model graphs plus `manifest.json` to `out_dir`.
+
+    Args:
+        model (Kronos): Model in fp32 (quantized or bf16 models are not exportable).
+        tokenizer (KronosTokenizer): Matching tokenizer.
+        out_dir (str): Output directory, created if missing.
+        max_context (int): Longest sequence the graphs will be run on; the RoPE tables are baked in up to this length.
+        opset (int): ONNX opset version.
+
+    Returns:
+        dict: The manifest.
+    """
+    from torch.export import Dim
+
+    os.makedirs(out_dir, exist_ok=True)
+    model, tokenizer = model.eval(), tokenizer.eval()
+    share_rotary_embeddings(model, max_len=max_context)
+    share_rotary_embeddings(tokenizer, max_len=max_context)
+
+    attn = model.transformer[0].self_attn
+    dep_attn = model.dep_layer.cross_attn
+    s1_vocab, s2_vocab = 2 ** model.s1_bits, 2 ** model.s2_bits
+    # Example sizes are kept distinct (and > 1) so the exporter does not specialise or equate them
+    batch, seq, past = 3, 6, 5
+    B = Dim('batch', min=1, max=4096)
+    T = Dim('seq', min=2, max=max_context)
+    P = Dim('past', min=1, max=max_context - 1)
+
+    s1_ids = torch.randint(0, s1_vocab, (batch, seq))
+    s2_ids = torch.randint(0, s2_vocab, (batch, seq))
+    stamp = torch.zeros(batch, seq, 5)
+    with torch.no_grad():
+        _export(_TokenizerEncode(tokenizer), (torch.randn(batch, seq, tokenizer.d_in),),
+                os.path.join(out_dir, 'tokenizer_encode.onnx'), ['x'], ['s1_ids', 's2_ids'],
+                {'x': {0: B, 1: T}}, opset)
+        _export(_TokenizerDecode(tokenizer), (s1_ids, s2_ids),
+                os.path.join(out_dir, 'tokenizer_decode.onnx'), ['s1_ids', 's2_ids'], ['z'],
+                {'s1_ids': {0: B, 1: T}, 's2_ids': {0: B, 1: T}}, opset)
+        _export(_KronosPrefill(model), (s1_ids, s2_ids, stamp),
+                os.path.join(out_dir, 'kronos_prefill.onnx'), ['s1_ids', 's2_ids', 'stamp'],
+                ['s1_logits', 'context', 'present_keys', 'present_values', 'dep_keys', 'dep_values'],
+                {'s1_ids': {0: B, 1: T}, 's2_ids': {0: B, 1: T}, 'stamp': {0: B, 1: T}}, opset)
+
+        past_kv = torch.randn(model.n_layers, batch, attn.n_heads, past, attn.head_dim)
+        _export(_KronosStepS1(model), (s1_ids[:, :1], s2_ids[:, :1], stamp[:, :1], past_kv, past_kv.clone()),
+                os.path.join(out_dir, 'kronos_step_s1.onnx'),
+                ['s1_ids', 's2_ids', 'stamp', 'past_keys', 'past_values'],
+                ['s1_logits', 'context', 'present_keys', 'present_values'],
+                {'s1_ids': {0: B}, 's2_ids': {0: B}, 'stamp': {0: B},
+                 'past_keys': {1: B, 3: P}, 'past_values': {1: B, 3: P}}, opset)
+
+        dep_kv = torch.randn(batch, dep_attn.n_heads, past, dep_attn.head_dim)
+        _export(_KronosStepS2(model), (torch.randn(batch, 1, model.d_model), s1_ids[:, :1], dep_kv, dep_kv.clone()),
+                os.path.join(out_dir, 'kronos_step_s2.onnx'),
+                ['context', 's1_ids', 'dep_past_keys', 'dep_past_values'],
+                ['s2_logits', 'dep_present_keys', 'dep_present_values'],
+                {'context': {0: B}, 's1_ids': {0: B},
+                 'dep_past_keys': {0: B, 2: P}, 'dep_past_values': {0: B, 2: P}}, opset)
+
+    manifest = {
+        'graphs': {name: f'{name}.onnx' for name in GRAPHS},
+        'max_context': max_context,
+        'd_in': tokenizer.d_in,
+        's1_bits': model.s1_bits,
+        's2_bits': model.s2_bits,
+        'n_layers': model.n_layers,
+        'n_heads': attn.n_heads,
+        'head_dim': attn.head_dim,
+        'dep_n_heads': dep_attn.n_heads,
+        'dep_head_dim': dep_attn.head_dim,
+    }
+    with open(os.path.join(out_dir, MANIFEST), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def main():
+    import sys
+    sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+    from model.kronos import Kronos, KronosTokenizer
+    from src.config import MAX_CONTEXT, MODEL_NAME, ONNX_MODEL_DIR, TOKENIZER_NAME
+
+    parser = argparse.ArgumentParser(description="Export Kronos and its tokenizer to ONNX.")
+    parser.add_argument('--model', default=MODEL_NAME, help="Hugging Face repo or local path of the Kronos model")
+    parser.add_argument('--tokenizer', default=TOKENIZER_NAME, help="Hugging Face repo or local path of the tokenizer")
+    parser.add_argument('--out', default=str(ONNX_MODEL_DIR), help="Output directory")
+    parser.add_argument('--max-context', type=int, default=MAX_CONTEXT)
+    parser.add_argument('--opset', type=int, default=18)
+    args = parser.parse_args()
+
+    tokenizer = KronosTokenizer.from_pretrained(args.tokenizer)
+    model = Kronos.from_pretrained(args.model)
+    manifest = export_onnx(model, tokenizer, args.out, max_context=args.max_context, opset=args.opset)
+    print(f"Exported {len(manifest['graphs'])} graphs to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
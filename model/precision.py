@@ -0,0 +1,157 @@
+import time
+import warnings
+
+import numpy as np
+import torch
+import torch.nn as nn
+
+from model.module import DualHead, FeedForward, HierarchicalEmbedding, RotaryPositionalEmbedding, TransformerBlock
+
+
+PRECISIONS = ('fp32', 'bf16', 'int8')
+
+
+def bf16_supported():
+    """Whether this CPU has native bfloat16 support (AVX512-BF16 / AMX) through oneDNN."""
+    try:
+        return bool(torch.ops.mkldnn._is_mkldnn_bf16_supported())
+    except (AttributeError, RuntimeError):
+        return False
+
+
+def resolve_precision(precision):
+    """
+    Validates `precision` and returns the precision that will actually be used.
+
+    "bf16" falls back to "fp32" with a warning when the CPU lacks native bfloat16 support, because emulated bf16
+    matmuls are several times slower than fp32.
+
+    Raises:
+        ValueError: If `precision` is not one of `PRECISIONS`.
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}.")
+    if precision == 'bf16' and not bf16_supported():
+        warnings.warn("bf16 requested but this CPU has no native bfloat16 support, falling back to fp32.")
+        return 'fp32'
+    return precision
+
+
+def _quantizable_linear_names(module):
+    """Names of the nn.Linear layers inside TransformerBlock, FeedForward, DualHead and HierarchicalEmbedding.fusion_proj."""
+    names = set()
+    for parent_name, parent in module.named_modules():
+        if isinstance(parent, (TransformerBlock, FeedForward, DualHead)):
+            prefix = f"{parent_name}." if parent_name else ""
+            names.update(prefix + name for name, child in parent.named_modules() if isinstance(child, nn.Linear))
+        elif isinstance(parent, HierarchicalEmbedding):
+            names.add(f"{parent_name}.fusion_proj" if parent_name else "fusion_proj")
+    return names
+
+
+def quantize_dynamic_int8(module):
+    """
+    Applies dynamic int8 quantization (CPU only) to the compute-heavy Linear layers of a Kronos model or tokenizer.
+
+    Weights are stored as int8 and activations are quantized on the fly, which roughly quarters the weight traffic of
+    the Transformer blocks, feed-forward networks, output heads and the hierarchical embedding's fusion projection.
+    Other layers (quantizer projections, attention in the dependency-aware layer) stay in fp32.
+
+    Args:
+        module (nn.Module): Kronos or KronosTokenizer, modified in place.
+
+    Returns:
+        nn.Module: The quantized module.
+    """
+    from torch.ao.quantization import default_dynamic_qconfig, quantize_dynamic
+
+    qconfig_spec = {name: default_dynamic_qconfig for name in _quantizable_linear_names(module)}
+    with warnings.catch_warnings():
+        # torch.ao dynamic quantization is deprecated in favour of torchao but is still the built-in CPU path
+        warnings.simplefilter("ignore")
+        return quantize_dynamic(module.eval(), qconfig_spec, dtype=torch.qint8, inplace=True)
+
+
+def cast_bf16(module):
+    """
+    Casts the weights of a Kronos model or tokenizer to bfloat16, in place.
+
+    The RoPE inverse frequencies stay in fp32 so that positions are encoded exactly; the cos/sin table is cast to the
+    activations' dtype when it is applied.
+
+    Returns:
+        nn.Module: The converted module.
+    """
+    rotary = {m: m.inv_freq for m in module.modules() if isinstance(m, RotaryPositionalEmbedding)}
+    module.to(torch.bfloat16)
+    for m, inv_freq in rotary.items():
+        m.inv_freq = inv_freq
+        m.seq_len_cached = None # Rebuild the cos/sin table in fp32 on next use
+    return module.eval()
+
+
+def apply_precision(model, tokenizer, precision):
+    """
+    Converts a Kronos model and its tokenizer to the requested inference precision, in place.
+
+    Args:
+        precision (str): One of `PRECISIONS`. "bf16" should be passed through `resolve_precision` first if the
+            CPU's bfloat16 support is unknown.
+
+    Returns:
+        Tuple[nn.Module, nn.Module]: (model, tokenizer)
+    """
+    if precision not in PRECISIONS:
+        raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}.")
+    if precision == 'bf16':
+        model = cast_bf16(model)
+        tokenizer = cast_bf16(tokenizer)
+    elif precision == 'int8':
+        model = quantize_dynamic_int8(model)
+        tokenizer = quantize_dynamic_int8(tokenizer)
+    return model, tokenizer
+
+
+def precision_report(reference, candidate, df, x_timestamp, y_timestamp, pred_len, seed=0, repeat=3, **predict_kwargs):
+    """
+    Compares a candidate predictor (e.g. int8) against a reference one (fp32) on the same window and seed.
+
+    Both predictors are run `repeat` times with `torch.manual_seed(seed)` before every run, so the sampling noise is
+    identical and the remaining difference comes from the numerics.
+
+    Args:
+        reference (KronosPredictor): Baseline predictor.
+        candidate (KronosPredictor): Predictor to evaluate.
+        df, x_timestamp, y_timestamp, pred_len: Arguments of `KronosPredictor.predict`.
+        seed (int): Random seed used for every run.
+        repeat (int): Number of timed runs; the fastest one is reported.
+        **predict_kwargs: Extra arguments for `KronosPredictor.predict` (T, top_p, sample_count, ...).
+
+    Returns:
+        dict: `close_mape` / `ohlc_mape` (mean absolute percentage error of the candidate's forecast, in %),
+              `max_abs_err`, `reference_seconds`, `candidate_seconds` and `speedup`.
+    """
+    predict_kwargs.setdefault('verbose', False)
+
+    def run(predictor):
+        best, pred_df = float('inf'), None
+        for _ in range(repeat):
+            torch.manual_seed(seed)
+            start = time.perf_counter()
+            pred_df = predictor.predict(df, x_timestamp, y_timestamp, pred_len, **predict_kwargs)
+            best = min(best, time.perf_counter() - start)
+        return pred_df, best
+
+    ref_df, ref_seconds = run(reference)
+    cand_df, cand_seconds = run(candidate)
+
+    ohlc = ['open', 'high', 'low', 'close']
+    rel_err = np.abs(cand_df[ohlc].values - ref_df[ohlc].values) / np.abs(ref_df[ohlc].values)
+    return {
+        'close_mape': float(rel_err[:, ohlc.index('close')].mean() * 100),
+        'ohlc_mape': float(rel_err.mean() * 100),
+        'max_abs_err': float(np.abs(cand_df.values - ref_df.values).max()),
+        'reference_seconds': ref_seconds,
+        'candidate_seconds': cand_seconds,
+        'speedup': ref_seconds / cand_seconds,
+    }
@@ -0,0 +1,179 @@
+"""
+Token sampling for autoregressive decoding.
+
+`sample_tokens` is a drop-in replacement for `sample_from_logits` + `top_k_top_p_filtering` that avoids sorting the
+whole vocabulary on every step:
+
+* top-k only looks at the `torch.topk` candidates;
+* top-p takes the `candidates` most likely tokens with a partial `torch.topk`, normalises them against the full
+  log-partition function and finds the nucleus among them. Rows whose nucleus does not fit into the candidates
+  (flat distributions) retry with more candidates and finally fall back to the full sort, so the result is exact;
+* temperature scaling is a single division shared by the candidate search and the partition function.
+
+Tokens are drawn by inverse-CDF lookup of uniform numbers, which is much cheaper than `torch.multinomial`. The
+numbers either come from the global RNG or are passed in, typically from a `RowGenerator` that gives every row its own seeded
+`torch.Generator`: a row's samples then depend only on its seed, not on the other rows of the batch, which makes
+forecasts reproducible and cacheable.
+"""
+import numpy as np
+import torch
+import torch.nn.functional as F
+
+
+DEFAULT_CANDIDATES = 64
+CANDIDATE_GROWTH = 4  # Rows whose nucleus does not fit retry with 4x the candidates (if that can suffice) before a full sort
+
+
+class RowGenerator:
+    """
+    One seeded `torch.Generator` per batch row.
+
+    Args:
+        seeds (Sequence[int]): One seed per row.
+        device (str or torch.device): Device of the generated numbers.
+    """
+
+    def __init__(self, seeds, device='cpu'):
+        self.device = torch.device(device)
+        # CPU generators: drawing a handful of numbers per step is cheaper than a device round trip
+        self.generators = [torch.Generator().manual_seed(int(seed)) for seed in seeds]
+
+    @classmethod
+    def for_paths(cls, seeds, sample_count, device='cpu', first_path=0):
+        """
+        Generators for the `len(seeds) * sample_count` rows of `auto_regressive_inference`, ordered series-major.
+
+        Path `j` of a series with seed `s` is seeded from `(s, j)`, so it is the same whatever else is in the batch.
+        `first_path` numbers the paths from there on, for drawing further paths of the same series later.
+        """
+        row_seeds = [
+            np.random.SeedSequence([int(seed), path]).generate_state(1, dtype=np.uint64)[0]
+            for seed in seeds for path in range(first_path, first_path + sample_count)
+        ]
+        return cls(row_seeds, device)
+
+    def __len__(self):
+        return len(self.generators)
+
+    def uniform(self, n=1):
+        """Returns a (rows, n) float32 tensor of uniform numbers in [0, 1), drawn row by row."""
+        return torch.stack([torch.rand(n, generator=g) for g in self.generators]).to(self.device)
+
+
+def _draw(probs, uniform):
+    """Inverse-CDF lookup: one column index per row of the (unnormalised) `probs`, for `uniform` of shape (batch, 1)."""
+    cdf = probs.cumsum(dim=-1)
+    target = uniform.to(cdf.dtype) * cdf[:, -1:]
+    return (cdf <= target).sum(dim=-1, keepdim=True).clamp_max(probs.size(-1) - 1)
+
+
+def _nucleus_full(logits, temperature, top_p, uniform):
+    """Reference path for rows whose nucleus is larger than every candidate set: sort the whole vocabulary."""
+    sorted_logits, sorted_indices = torch.sort(logits / temperature, descending=True)
+    probs = F.softmax(sorted_logits, dim=-1)
+    cumulative = probs.cumsum(dim=-1)
+    keep = (cumulative - probs) <= top_p
+    return sorted_indices.gather(-1, _draw(probs * keep, uniform))
+
+
+def _nucleus_candidates(logits, temperature, top_p, uniform, k):
+    """
+    Nucleus sampling among the `k` most likely tokens.
+
+    Returns:
+        Tuple[torch.Tensor, torch.Tensor, torch.Tensor]: Token IDs (batch, 1), the probability mass of the candidates
+        (batch, 1) and the probability of the least likely candidate (batch, 1). A token is only valid where the mass
+        exceeds `top_p`, i.e. where the nucleus fits into the candidates.
+    """
+    scaled = logits / temperature
+    values, indices = torch.topk(scaled, k, dim=-1)
+    # Candidate probabilities are normalised by the full partition function, so they are exact
+    probs = torch.exp(values - torch.logsumexp(scaled, dim=-1, keepdim=True))
+    cumulative = probs.cumsum(dim=-1)
+    keep = (cumulative - probs) <= top_p
+    return indices.gather(-1, _draw(probs * keep, uniform)), cumulative[:, -1:], probs[:, -1:]
+
+
+def _select(rows, *values):
+    return tuple(v[rows] if torch.is_tensor(v) else v for v in values)
+
+
+def _resample_incomplete(tokens, mass, floor, logits, temperature, top_p, uniform, k):
+    """
+    Redoes the rows whose nucleus did not fit into `k` candidates, with `CANDIDATE_GROWTH` times as many or, when
+    that cannot be enough, with a full sort. Data-dependent, so kept out of compiled graphs, see
+    `exclude_fallback_from_graphs`.
+    """
+    incomplete = (mass <= top_p).reshape(-1)
+    if not bool(incomplete.any()):
+        return tokens
+    next_k = k * CANDIDATE_GROWTH
+    # Every token outside the candidates is at most as likely as the last one, which bounds the mass of next_k
+    reachable = (mass + (next_k - k) * floor > top_p).reshape(-1) & incomplete
+    if next_k >= logits.size(-1):
+        reachable = torch.zeros_like(reachable)
+
+    rows = reachable.nonzero(as_tuple=True)[0]
+    if rows.numel():
+        sub = _select(rows, logits, temperature, top_p, uniform)
+        sub_tokens, sub_mass, sub_floor = _nucleus_candidates(*sub, next_k)
+        tokens[rows] = _resample_incomplete(sub_tokens, sub_mass, sub_floor, *sub, next_k)
+    rows = (incomplete & ~reachable).nonzero(as_tuple=True)[0]
+    if rows.numel():
+        tokens[rows] = _nucleus_full(*_select(rows, logits, temperature, top_p, uniform))
+    return tokens
+
+
+def exclude_fallback_from_graphs():
+    """
+    Wraps the data-dependent fallback of `sample_tokens` in `torch.compiler.disable`, so that compiled graphs call it
+    eagerly instead of breaking around it. Called by `model.compiled.compile_decode_step`; it is not applied at import
+    because `torch.compiler.disable` loads `torch._dynamo`, which takes seconds that eager-only users never need.
+    """
+    global _resample_incomplete
+    if not getattr(_resample_incomplete, '_excluded_from_graphs', False):
+        _resample_incomplete = torch.compiler.disable(_resample_incomplete)
+        _resample_incomplete._excluded_from_graphs = True
+
+
+def sample_tokens(logits, temperature=1.0, top_k=0, top_p=1.0, uniform=None, candidates=DEFAULT_CANDIDATES):
+    """
+    Samples one token per row with temperature, top-k or nucleus (top-p) filtering.
+
+    The filtering matches `model.kronos.top_k_top_p_filtering`: top-k takes precedence over top-p, and the nucleus
+    is the shortest prefix of the sorted distribution whose probability exceeds `top_p` (the first token is always
+    kept).
+
+    Args:
+        logits (torch.Tensor): Float logits of shape (batch, vocab).
+        temperature (float or torch.Tensor): Scalar or per-row values of shape (batch, 1).
+        top_k (int): Keep the `top_k` most likely tokens if > 0.
+        top_p (float or torch.Tensor): Scalar or per-row thresholds of shape (batch, 1); values >= 1 disable it.
+        uniform (torch.Tensor, optional): (batch,) or (batch, 1) numbers in [0, 1) used for the draw, e.g. from
+            `RowGenerator.uniform`. If None, they are drawn from the global RNG.
+        candidates (int): Size of the first partial top-k used to find the nucleus.
+
+    Returns:
+        torch.Tensor: Token IDs of shape (batch, 1).
+    """
+    vocab = logits.size(-1)
+    if uniform is None:
+        uniform = torch.rand(logits.size(0), 1, device=logits.device)
+    uniform = uniform.reshape(-1, 1)
+
+    if top_k > 0:
+        values, indices = torch.topk(logits, min(top_k, vocab), dim=-1)
+        probs = F.softmax(values / temperature, dim=-1)
+        return indices.gather(-1, _draw(probs, uniform))
+
+    if not torch.is_tensor(top_p):
+        if top_p >= 1.0:
+            return _draw(F.softmax(logits / temperature, dim=-1), uniform)
+    else:
+        # Rows with top_p >= 1 keep their whole distribution (and always end up in the full sort)
+        top_p = torch.where(top_p < 1.0, top_p, torch.full_like(top_p, float('inf')))
+
+    if candidates >= vocab:
+        return _nucleus_full(logits, temperature, top_p, uniform)
+    tokens, mass, floor = _nucleus_candidates(logits, temperature, top_p, uniform, candidates)
+    return _resample_incomplete(tokens, mass, floor, logits, temperature, top_p, uniform, candidates)
@@ -2,8 +2,11 @@
 Crypto-Pilot 主应用程序。
 Streamlit 入口文件，负责 UI 布局、状态管理与核心流程串联。
 """
+import atexit
 import sys
 import os
+from contextlib import contextmanager
+from dataclasses import dataclass
 
 # 将项目根目录添加到 python path，确保能导入 src
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
@@ -18,12 +21,18 @@ from src.config import (
     DEFAULT_TEMPERATURE,
     DEFAULT_TOP_P,
     DEFAULT_SAMPLE_COUNT,
+    FORECAST_POLL_INTERVAL,
+    SAMPLE_COUNT_MAX,
+    STREAM_FEED,
 )
-from src.data_feed import DataFeed
+from src.async_feed import AsyncDataFeed
+from src.stream_feed import StreamingDataFeed
+from src.batch_scheduler import ForecastFuture
 from src.model_engine import ModelEngine
 from src.strategy import StrategyEngine, UserConfig, SamplingConfig, SignalResult
 from src.chart_renderer import ChartRenderer
 from src.exceptions import CryptoPilotError
+from src.rate_limiter import shared_scheduler
 
 
 # ──────────── 初始化与配置 ────────────
@@ -56,12 +65,16 @@ def init_session_state():
         st.session_state.hist_df = None
     if "pred_df" not in st.session_state:
         st.session_state.pred_df = None
+    if "band_df" not in st.session_state:
+        st.session_state.band_df = None  # 多路径预测区间 (timestamp, lower, upper)
     if "signal_result" not in st.session_state:
         st.session_state.signal_result = None  # type: SignalResult | None
     
     # 状态标记
     if "is_predicting" not in st.session_state:
         st.session_state.is_predicting = False
+    if "pending_forecast" not in st.session_state:
+        st.session_state.pending_forecast = None  # type: PendingForecast | None
 
 
 # ──────────── UI 组件渲染 ────────────
@@ -97,13 +110,22 @@ def render_sidebar() -> UserConfig:
     with st.sidebar.expander("🛠️ 高级模型设置 (Advanced)"):
         temperature = st.slider("Temperature", 0.1, 2.0, DEFAULT_TEMPERATURE, 0.1)
         top_p = st.slider("Top P", 0.1, 1.0, DEFAULT_TOP_P, 0.05)
-        sample_count = st.number_input("采样次数 (Samples)", 1, 10, DEFAULT_SAMPLE_COUNT)
+        sample_count = st.number_input(
+            "采样次数 (Samples)", 1, SAMPLE_COUNT_MAX, DEFAULT_SAMPLE_COUNT,
+            help="路径越多分布越准; 超出内存预算时分块解码, 只增加耗时"
+        )
+        adaptive = st.checkbox(
+            "自适应采样 (Adaptive)",
+            value=False,
+            help="以采样次数为上限分批追加路径, 24h 收盘价估计收敛后提前停止"
+        )
 
     # 组装配置对象
     sampling_config = SamplingConfig(
         temperature=temperature,
         top_p=top_p,
-        sample_count=sample_count
+        sample_count=sample_count,
+        adaptive=adaptive
     )
     
     user_config = UserConfig(
@@ -157,64 +179,184 @@ def render_kpi_cards(result: SignalResult):
             value=sl_text
         )
 
+    if result.prob_bullish is not None:
+        st.caption(
+            f"多路径概率: 🟢 看多 {result.prob_bullish:.0%} · 🔴 看空 {result.prob_bearish:.0%}"
+        )
+
+
+def render_model_status():
+    """侧边栏底部显示模型冷启动状态与耗时。"""
+    timings = ModelEngine.timings
+    if timings.error:
+        st.sidebar.caption(f"⚠️ 模型预热失败: {timings.error}")
+    elif timings.ready:
+        st.sidebar.caption(f"✅ 模型就绪 · 加载 {timings.load_seconds:.1f}s · 预热 {timings.warmup_seconds:.1f}s")
+    else:
+        st.sidebar.caption("⏳ 模型后台加载中…")
+
+
+def render_feed_status():
+    """侧边栏显示交易所请求调度状态: 熔断提示, 或排队深度与交互式请求的等待时间。"""
+    metrics = shared_scheduler().metrics()
+    if metrics["circuit_open"]:
+        st.sidebar.caption("⚠️ 交易所连续请求失败, 数据拉取已暂停, 稍后自动恢复")
+        return
+    interactive = metrics["wait"]["INTERACTIVE"]
+    if interactive["granted"] or metrics["queue_depth"]:
+        st.sidebar.caption(
+            f"📡 数据请求 · 排队 {metrics['queue_depth']} · 等待 p95 {interactive['p95_ms']:.0f}ms"
+        )
+
+
+# ──────────── 预测流程 ────────────
+
+@dataclass
+class PendingForecast:
+    """已提交、尚未取回结果的预测 (存于 session_state, 跨 rerun 轮询)。"""
+
+    future: ForecastFuture
+    user_config: UserConfig
+    x_df: pd.DataFrame
+    x_timestamp: pd.Series
+    y_timestamp: pd.Series
+
+    def history_frame(self) -> pd.DataFrame:
+        """用于绘图的历史数据: preprocess 返回的 x_df 没有 timestamp 列 (被分离了)，这里还原一下。"""
+        viz_hist_df = self.x_df.copy()
+        viz_hist_df["timestamp"] = self.x_timestamp.values  # .values 避免 index 不对齐
+        return viz_hist_df
+
+
+@contextmanager
+def show_errors():
+    """把流程中的异常显示在页面上 (开发阶段对未知异常附带堆栈)。"""
+    try:
+        yield
+    except CryptoPilotError as e:
+        st.error(f"分析过程中发生错误: {e}")
+    except Exception as e:
+        st.error(f"未知错误: {e}")
+        # 在开发阶段通过 st.exception 显示堆栈
+        st.exception(e)
+
+
+@st.cache_resource
+def get_data_feed() -> AsyncDataFeed:
+    """
+    进程内共用的数据采集引擎: 交易所客户端及其连接池跨会话、跨 rerun 复用, 不再每次点击重建。
+    STREAM_FEED=True 时为 StreamingDataFeed, 订阅的交易对由推送维护内存窗口。
+    """
+    data_feed = StreamingDataFeed() if STREAM_FEED else AsyncDataFeed()
+    atexit.register(data_feed.close)
+    return data_feed
+
+
+def submit_forecast(user_config: UserConfig) -> PendingForecast:
+    """获取并预处理数据, 异步提交推理 (多路径采样时同一次推理同时给出分布)。"""
+    data_feed = get_data_feed()
+    raw_df = data_feed.fetch_ohlcv(user_config.symbol)
+    x_df, x_timestamp, y_timestamp = data_feed.preprocess(raw_df)
+    future = ModelEngine().submit(
+        x_df,
+        x_timestamp,
+        y_timestamp,
+        sampling=user_config.sampling,
+        return_distribution=user_config.sampling.sample_count > 1,
+        stream=True,  # 逐步回传部分预测, 等待期间即可绘制前几个小时
+    )
+    return PendingForecast(future, user_config, x_df, x_timestamp, y_timestamp)
+
+
+def finish_forecast(pending: PendingForecast):
+    """取回推理结果, 完成策略分析并写入 Session State。"""
+    user_config, x_df, y_timestamp = pending.user_config, pending.x_df, pending.y_timestamp
+    distribution = None
+    band_df = None
+    if user_config.sampling.sample_count > 1:
+        distribution = pending.future.result()
+        pred_df = distribution.mean_df
+        if user_config.sampling.adaptive:
+            st.caption(f"自适应采样: 实际使用 {distribution.sample_count} / {user_config.sampling.sample_count} 条路径")
+        low_q, high_q = min(distribution.quantiles), max(distribution.quantiles)
+        band_df = pd.DataFrame({
+            "timestamp": y_timestamp.values,
+            "lower": distribution.quantiles[low_q]["close"].values,
+            "upper": distribution.quantiles[high_q]["close"].values,
+        })
+    else:
+        pred_df = pending.future.result()
+    pred_df["timestamp"] = y_timestamp.values  # .values 避免 index 不对齐导致 NaN
+
+    # 策略分析
+    current_price = x_df["close"].iloc[-1]
+
+    viz_hist_df = pending.history_frame()
+
+    result = StrategyEngine.analyze(
+        current_price, pred_df, user_config, distribution=distribution
+    )
+
+    st.session_state.hist_df = viz_hist_df
+    st.session_state.pred_df = pred_df
+    st.session_state.band_df = band_df
+    st.session_state.signal_result = result
+
+
+@st.fragment(run_every=FORECAST_POLL_INTERVAL)
+def render_forecast_progress():
+    """
+    预测进行中: 只有本片段每 FORECAST_POLL_INTERVAL 秒重跑一次, 刷新进度并绘制已解码的前几个小时,
+    完成后触发整页 rerun 渲染结果。等待期间侧边栏等交互照常响应。
+    """
+    pending = st.session_state.pending_forecast
+    if pending is None:
+        return
+    if pending.future.done():
+        st.rerun()
+    progress = pending.future.progress
+    st.progress(progress, text=f"正在预测 {pending.user_config.symbol} ... {progress:.0%}")
+
+    partial = pending.future.partial
+    if partial is not None:
+        fig = ChartRenderer.render(
+            pending.history_frame(),
+            partial.assign(timestamp=partial.index),
+            horizon_end=pending.y_timestamp.iloc[-1],
+        )
+        st.plotly_chart(fig, use_container_width=True)
+
 
 def main():
     setup_page()
     init_session_state()
+    ModelEngine.start_warmup()  # 后台加载 + 预热, 首次点击预测时模型通常已就绪
     
     user_config = render_sidebar()
+    if STREAM_FEED:
+        get_data_feed().subscribe([user_config.symbol])  # 选中交易对即开始推送, 点击预测时窗口已在内存中
+    render_model_status()
+    render_feed_status()
 
     # 主区域
     st.title(f"📊 {user_config.symbol} 市场预测")
 
-    # 处理预测逻辑
+    # 处理预测逻辑: 点击后只取数据并提交推理, 不在本次运行中等待结果
     if st.session_state.is_predicting:
         st.session_state.is_predicting = False  # Reset flag
-        
-        with st.spinner(f"正在分析 {user_config.symbol} 市场数据..."):
-            try:
-                # 1. 实例化引擎
-                data_feed = DataFeed()
-                model_engine = ModelEngine()
-                
-                # 2. 获取数据
-                raw_df = data_feed.fetch_ohlcv(user_config.symbol)
-                x_df, x_timestamp, y_timestamp = data_feed.preprocess(raw_df)
-                
-                # 3. 模型推理
-                pred_df = model_engine.predict(
-                    x_df, 
-                    x_timestamp, 
-                    y_timestamp, 
-                    sampling=user_config.sampling
-                )
-                pred_df["timestamp"] = y_timestamp.values  # .values 避免 index 不对齐导致 NaN
-                
-                # 4. 策略分析
-                current_price = x_df["close"].iloc[-1]
-                
-                # 重新构建用于图表显示的历史数据 (含 timestamp)
-                # preprocess 返回的 x_df 没有 timestamp 列 (被分离了)，这里需要还原一下用于绘图
-                # 或者直接使用 raw_df，但 raw_df 可能包含多余数据，且列名标准化是在 preprocess 中做的
-                # 最简单是重新组合一下，或者直接用 preprocess 返回的部件
-                viz_hist_df = x_df.copy()
-                viz_hist_df["timestamp"] = x_timestamp.values  # .values 避免 index 不对齐
-                
-                result = StrategyEngine.analyze(current_price, pred_df, user_config)
-                
-                # 5. 更新 Session State
-                st.session_state.hist_df = viz_hist_df
-                st.session_state.pred_df = pred_df
-                st.session_state.signal_result = result
-                
+        with show_errors(), st.spinner(f"正在获取 {user_config.symbol} 市场数据..."):
+            st.session_state.pending_forecast = submit_forecast(user_config)
+
+    # 轮询进行中的预测: 完成则汇总结果, 否则显示进度
+    pending = st.session_state.pending_forecast
+    if pending is not None:
+        if pending.future.done():
+            st.session_state.pending_forecast = None
+            with show_errors():
+                finish_forecast(pending)
                 st.success("预测完成！")
-                
-            except CryptoPilotError as e:
-                st.error(f"分析过程中发生错误: {e}")
-            except Exception as e:
-                st.error(f"未知错误: {e}")
-                # 在开发阶段通过 st.exception 显示堆栈
-                st.exception(e)
+        else:
+            render_forecast_progress()
 
     # 渲染结果 (如果有)
     if st.session_state.signal_result is not None:
@@ -225,7 +367,8 @@ def main():
         if st.session_state.hist_df is not None and st.session_state.pred_df is not None:
             fig = ChartRenderer.render(
                 st.session_state.hist_df,
-                st.session_state.pred_df
+                st.session_state.pred_df,
+                band_df=st.session_state.band_df,
             )
             st.plotly_chart(fig, use_container_width=True)
             
@@ -0,0 +1,199 @@
+"""
+异步多交易对数据采集。
+基于 ccxt.async_support: 每个进程共用一个长连接的交易所客户端 (aiohttp 连接池, markets 只加载一次),
+运行在后台事件循环线程上; fetch_many() 在进程级限频 (src.rate_limiter) 内并发拉取多个交易对, backfill() 的各页同样并发请求。
+缓存、增量拉取与合并逻辑与 DataFeed 相同, 同步调用方 (Streamlit 脚本) 无需感知事件循环。
+"""
+import asyncio
+import threading
+from typing import Dict, Iterable, List, Optional, Union
+
+import pandas as pd
+
+from src.cache_manager import CacheManager
+from src.config import EXCHANGE_ID, FETCH_CONCURRENCY, FETCH_LIMIT, MAX_RETRIES, OHLCV_REQUEST_WEIGHT, TIMEFRAME
+from src.data_feed import DataFeed
+from src.exceptions import DataFeedError
+from src.history_store import HistoryStore
+from src.lazy_import import lazy_module
+from src.rate_limiter import Priority, RequestScheduler, shared_scheduler
+
+ccxt = lazy_module("ccxt")
+ccxt_async = lazy_module("ccxt.async_support")  # 首次请求时才导入 (含 aiohttp)
+
+
+class AsyncDataFeed(DataFeed):
+    """
+    并发数据采集引擎 (线程安全)。
+
+    所有请求都在自有的事件循环线程上执行, 共用同一个异步交易所客户端;
+    同时在途的请求数不超过 concurrency, 请求速率与重试由进程级 RequestScheduler 控制 (等待不阻塞事件循环)。
+    不再使用时调用 close() 关闭连接池与事件循环。
+    """
+
+    def __init__(
+        self,
+        cache_manager: CacheManager | None = None,
+        exchange=None,
+        concurrency: int = FETCH_CONCURRENCY,
+        scheduler: RequestScheduler | None = None,
+    ):
+        """
+        Args:
+            cache_manager: L2 磁盘缓存 (默认新建)
+            exchange: 兼容 ccxt.async_support 接口的交易所对象 (测试可传入本地模拟交易所),
+                默认在首次请求时按 EXCHANGE_ID 创建
+            concurrency: 同时在途的请求数上限
+            scheduler: 请求调度器, 默认为进程内共用的 shared_scheduler()
+        """
+        self.cache_manager = cache_manager or CacheManager()
+        self.scheduler = scheduler or shared_scheduler()
+        self.exchange = exchange
+        self.concurrency = concurrency
+        self._semaphore: asyncio.Semaphore | None = None
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="async-feed", daemon=True)
+        self._thread.start()
+
+    # ──────────── 同步接口 ────────────
+
+    def fetch_many(
+        self,
+        symbols: Iterable[str],
+        timeframe: str = TIMEFRAME,
+        limit: int = FETCH_LIMIT,
+        return_exceptions: bool = False,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> Dict[str, Union[pd.DataFrame, DataFeedError]]:
+        """
+        并发拉取多个交易对的 OHLCV 数据 (阻塞直到全部完成)。
+
+        Args:
+            symbols: 交易对列表, 重复项只请求一次
+            timeframe / limit / priority: 同 DataFeed.fetch_ohlcv
+            return_exceptions: True 时失败的交易对以 DataFeedError 作为值返回, 不影响其余交易对
+
+        Returns:
+            {symbol: 原始 OHLCV DataFrame}, 顺序与 symbols 一致
+
+        Raises:
+            DataFeedError: return_exceptions=False 且任一交易对失败时 (其余请求照常完成并写入缓存)
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self.afetch_many(symbols, timeframe, limit, return_exceptions, priority), self._loop
+        )
+        return future.result()
+
+    def fetch_ohlcv(
+        self, symbol: str, timeframe: str = TIMEFRAME, limit: int = FETCH_LIMIT,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> pd.DataFrame:
+        """单个交易对的拉取, 接口同 DataFeed.fetch_ohlcv (经共用的异步客户端)。"""
+        return self.fetch_many([symbol], timeframe, limit, priority=priority)[symbol]
+
+    def close(self, timeout: float = 5.0):
+        """关闭交易所客户端的连接池并停止事件循环 (可重复调用)。"""
+        if self._loop.is_closed():
+            return
+        if self.exchange is not None and hasattr(self.exchange, "close"):
+            try:
+                asyncio.run_coroutine_threadsafe(self.exchange.close(), self._loop).result(timeout)
+            except Exception:
+                pass
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout)
+        self._loop.close()
+
+    # ──────────── 协程接口 (在事件循环线程上运行) ────────────
+
+    async def afetch_many(
+        self,
+        symbols: Iterable[str],
+        timeframe: str = TIMEFRAME,
+        limit: int = FETCH_LIMIT,
+        return_exceptions: bool = False,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> Dict[str, Union[pd.DataFrame, DataFeedError]]:
+        """fetch_many 的协程版本。"""
+        symbols = list(dict.fromkeys(symbols))
+        results = await asyncio.gather(
+            *(self.afetch_ohlcv(symbol, timeframe, limit, priority) for symbol in symbols), return_exceptions=True
+        )
+        if not return_exceptions:
+            for result in results:
+                if isinstance(result, BaseException):
+                    raise result
+        return dict(zip(symbols, results))
+
+    async def afetch_ohlcv(
+        self, symbol: str, timeframe: str = TIMEFRAME, limit: int = FETCH_LIMIT,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> pd.DataFrame:
+        """带限频、重试与 L2 磁盘缓存的单交易对拉取 (协程版本, 语义同 DataFeed.fetch_ohlcv)。"""
+        cached_df, stale_df, since = self._plan(symbol, timeframe, limit)
+        if cached_df is not None:
+            return cached_df
+
+        ohlcv = await self._arequest(symbol, timeframe, since, limit, priority)
+        return self._store(symbol, timeframe, limit, ohlcv, stale_df, since)
+
+    async def _arequest(
+        self, symbol: str, timeframe: str, since: Optional[int], limit: int,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> list:
+        """经调度器限频、带抖动指数退避重试的单次交易所请求 (协程版本的 DataFeed._request)。"""
+        self.scheduler.check(symbol)
+        exchange = self._client()
+        last_error: Exception | None = None
+        for attempt in range(MAX_RETRIES):
+            await self.scheduler.aacquire(OHLCV_REQUEST_WEIGHT, priority)
+            try:
+                async with self._slots():
+                    ohlcv = await exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+                self.scheduler.record_success()
+                return ohlcv
+
+            except ccxt.BadSymbol as e:
+                self.scheduler.record_success()  # 交易所正常应答, 不计入熔断
+                raise DataFeedError(f"无效的交易对: {symbol}") from e
+            except Exception as e:
+                last_error = e
+                if attempt < MAX_RETRIES - 1:
+                    await asyncio.sleep(self.scheduler.backoff(attempt))  # 等待期间不占用并发名额
+
+        self.scheduler.record_failure()
+        raise DataFeedError(f"无法获取 {symbol} 数据（重试 {MAX_RETRIES} 次后失败）: {last_error}")
+
+    def _fetch_pages(self, symbol: str, timeframe: str, pages: List[int], store: HistoryStore) -> List[DataFeedError]:
+        """历史回补的各页在事件循环上并发拉取, 与 fetch_many 共用并发名额与客户端。"""
+        future = asyncio.run_coroutine_threadsafe(self._afetch_pages(symbol, timeframe, pages, store), self._loop)
+        return future.result()
+
+    async def _afetch_pages(
+        self, symbol: str, timeframe: str, pages: List[int], store: HistoryStore
+    ) -> List[DataFeedError]:
+        async def fetch_page(page_start: int):
+            ohlcv = await self._arequest(symbol, timeframe, page_start, store.page_size, Priority.BACKGROUND)
+            store.write_page(symbol, timeframe, page_start, ohlcv, self._page_complete(timeframe, page_start, store))
+
+        results = await asyncio.gather(*(fetch_page(page_start) for page_start in pages), return_exceptions=True)
+        errors = []
+        for result in results:
+            if isinstance(result, DataFeedError) and isinstance(result.__cause__, ccxt.BadSymbol):
+                raise result
+            if isinstance(result, BaseException):
+                errors.append(result)
+        return errors
+
+    # ──────────── 内部实现 ────────────
+
+    def _client(self):
+        """共用的异步交易所客户端, 首次调用时在事件循环线程上创建。"""
+        if self.exchange is None:
+            self.exchange = getattr(ccxt_async, EXCHANGE_ID)({"enableRateLimit": False})  # 限频见 RequestScheduler
+        return self.exchange
+
+    def _slots(self) -> asyncio.Semaphore:
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.concurrency)
+        return self._semaphore
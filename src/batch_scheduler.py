@@ -0,0 +1,266 @@
+"""
+连续批处理推理调度器。
+汇总所有会话 (及后台任务) 的预测请求, 在短暂的收集窗口内把可合批的请求
+合并为一次 predict_batch 调用, 每个请求通过 Future 取回自己的结果 (推理过程中可读取进度与已解码的部分预测)。
+"""
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from src.config import ADAPTIVE_PATH_INCREMENT, BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS
+
+
+class ForecastFuture(Future):
+    """
+    预测请求的 Future。
+    推理过程中 progress 随解码进度更新 (已完成比例, 0~1); 流式请求的 partial 为目前已解码的部分预测
+    (前 k 小时的 DataFrame), 逐步增长到完整预测长度。
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.progress = 0.0
+        self.partial: Optional[pd.DataFrame] = None
+        self._progress_listeners: List[Callable[[float], None]] = []
+        self._partial_listeners: List[Callable[[pd.DataFrame], None]] = []
+
+    def add_progress_listener(self, listener: Callable[[float], None]):
+        """每次进度更新时以新进度调用 listener (在推理线程中执行, 应尽快返回)。"""
+        self._progress_listeners.append(listener)
+
+    def set_progress(self, fraction: float):
+        self.progress = fraction
+        for listener in list(self._progress_listeners):
+            listener(fraction)
+
+    def add_partial_listener(self, listener: Callable[[pd.DataFrame], None]):
+        """每解码一步以新的部分预测调用 listener (在推理线程中执行, 应尽快返回)。"""
+        self._partial_listeners.append(listener)
+
+    def set_partial(self, pred_df: pd.DataFrame):
+        self.partial = pred_df
+        for listener in list(self._partial_listeners):
+            listener(pred_df)
+
+
+@dataclass
+class ForecastRequest:
+    """一条排队中的预测请求。"""
+
+    x_df: pd.DataFrame
+    x_timestamp: pd.Series
+    y_timestamp: pd.Series
+    pred_len: int
+    temperature: float
+    top_p: float
+    sample_count: int
+    return_paths: bool = False
+    tolerance: Optional[float] = None  # 自适应采样容差, None 表示固定 sample_count 条路径
+    stream: bool = False               # 逐步回传部分预测 (future.partial)
+    future: ForecastFuture = field(default_factory=ForecastFuture)
+
+    def batch_key(self) -> Tuple:
+        """
+        键相同的请求可以放进同一个 predict_batch。
+        历史长度不同时由 predict_batch 左填充; 温度、top_p 与自适应容差按序列逐行传入, 也不影响合批。
+        自适应请求与固定路径数的请求分开执行。
+        """
+        return (self.pred_len, self.sample_count, self.return_paths, self.tolerance is not None)
+
+
+def _per_series(values: List[float]):
+    """组内取值相同时退化为标量 (走标量采样路径), 否则逐序列传入。"""
+    return values[0] if len(set(values)) == 1 else values
+
+
+def _adaptive_kwargs(tolerance) -> dict:
+    """只有自适应请求才传容差参数, 固定路径数的请求对预测器接口没有额外要求。"""
+    if tolerance is None:
+        return {}
+    return {"tolerance": tolerance, "path_increment": ADAPTIVE_PATH_INCREMENT}
+
+
+def _broadcast(futures: List[ForecastFuture]) -> Callable[[float], None]:
+    """同一批次的请求共享解码进度。"""
+    def progress(fraction: float):
+        for future in futures:
+            future.set_progress(fraction)
+    return progress
+
+
+def _partial_kwargs(group: List[ForecastRequest], batched: bool) -> dict:
+    """
+    组内有流式请求时才逐步解码并传 partial 回调, 其余请求对预测器接口没有额外要求。
+    predict_batch 的回调收到每个序列一份部分预测, 只转给流式请求。
+    """
+    if not any(r.stream for r in group):
+        return {}
+    if not batched:
+        return {"partial": group[0].future.set_partial}
+
+    def partial(pred_dfs: List[pd.DataFrame]):
+        for r, pred_df in zip(group, pred_dfs):
+            if r.stream:
+                r.future.set_partial(pred_df)
+    return {"partial": partial}
+
+
+class BatchScheduler:
+    """
+    预测请求调度器 (线程安全)。
+
+    后台工作线程取到第一条请求后再等待至多 max_wait_ms 收集后续请求 (或凑满 max_batch_size),
+    按 batch_key 分组后逐组执行: 单条请求走 predictor.predict, 多条走 predictor.predict_batch;
+    合批失败时组内请求改为逐条执行, 一条请求的错误不会连累同组的其他请求。
+    工作线程按需启动, 空闲 idle_timeout 秒后自动退出。
+    """
+
+    def __init__(
+        self,
+        load_predictor: Callable[[], object],
+        max_batch_size: int = BATCH_MAX_SIZE,
+        max_wait_ms: float = BATCH_MAX_WAIT_MS,
+        idle_timeout: float = 30.0,
+    ):
+        """
+        Args:
+            load_predictor: 返回 KronosPredictor (或接口兼容、接受 progress 回调的预测器) 的函数, 在执行批次时调用
+            max_batch_size: 单批最多请求数
+            max_wait_ms: 收集窗口 (毫秒)
+            idle_timeout: 工作线程空闲退出时间 (秒)
+        """
+        self.load_predictor = load_predictor
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.idle_timeout = idle_timeout
+        self._queue: "queue.Queue[ForecastRequest]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker: threading.Thread | None = None
+        self.batches_run = 0  # 已执行的批次数 (含单条请求), 便于监控
+
+    def submit(
+        self,
+        x_df: pd.DataFrame,
+        x_timestamp: pd.Series,
+        y_timestamp: pd.Series,
+        pred_len: int,
+        temperature: float,
+        top_p: float,
+        sample_count: int,
+        return_paths: bool = False,
+        tolerance: Optional[float] = None,
+        stream: bool = False,
+    ) -> ForecastFuture:
+        """
+        提交一条预测请求。
+        tolerance 不为 None 时自适应采样: 最多 sample_count 条路径, 收敛后提前停止,
+        实际路径数见 pred_df.attrs["sample_count"]。
+        stream=True 时逐步解码, 每一步把已解码的部分预测写入 future.partial (见 KronosPredictor.predict_stream)。
+
+        Returns:
+            ForecastFuture: result() 为 pred_df; return_paths=True 时为 (pred_df, paths); progress 为推理进度
+        """
+        request = ForecastRequest(
+            x_df, x_timestamp, y_timestamp, pred_len, temperature, top_p, sample_count, return_paths, tolerance, stream
+        )
+        self._queue.put(request)
+        self._ensure_worker()
+        return request.future
+
+    # ──────────── 内部实现 ────────────
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name="forecast-batcher", daemon=True)
+                self._worker.start()
+
+    def _collect(self) -> List[ForecastRequest]:
+        """阻塞等待第一条请求, 再在收集窗口内尽量多取; 空闲超时返回空列表。"""
+        try:
+            requests = [self._queue.get(timeout=self.idle_timeout)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_wait
+        while len(requests) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                requests.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return requests
+
+    def _run(self):
+        while True:
+            requests = self._collect()
+            if not requests:
+                with self._lock:
+                    # 退出前再确认一次, 避免与 submit 竞争丢失请求
+                    if self._queue.empty():
+                        self._worker = None
+                        return
+                continue
+
+            groups: Dict[Tuple, List[ForecastRequest]] = defaultdict(list)
+            for request in requests:
+                groups[request.batch_key()].append(request)
+            for group in groups.values():
+                self._execute(group)
+
+    def _execute(self, group: List[ForecastRequest]):
+        first = group[0]
+        try:
+            predictor = self.load_predictor()
+            if len(group) == 1 or not hasattr(predictor, "predict_batch"):
+                # 逐条执行: 每条请求单独成败, 一条失败不影响组内其余请求
+                for r in group:
+                    self._execute_one(predictor, r)
+                return
+            try:
+                results = predictor.predict_batch(
+                    [r.x_df for r in group], [r.x_timestamp for r in group], [r.y_timestamp for r in group],
+                    pred_len=first.pred_len,
+                    T=_per_series([r.temperature for r in group]),
+                    top_p=_per_series([r.top_p for r in group]),
+                    sample_count=first.sample_count, verbose=False, return_paths=first.return_paths,
+                    progress=_broadcast([r.future for r in group]),
+                    **_adaptive_kwargs(_per_series([r.tolerance for r in group])),
+                    **_partial_kwargs(group, batched=True),
+                )
+            except Exception:
+                # 合批失败时逐条重跑: 只有出错的请求 (如输入含 NaN) 收到异常, 其余请求照常出结果
+                for r in group:
+                    self._execute_one(predictor, r)
+                return
+        except Exception as e:
+            for r in group:
+                r.future.set_exception(e)
+        else:
+            for r, result in zip(group, results):
+                r.future.set_result(result)
+        finally:
+            self.batches_run += 1
+
+    @staticmethod
+    def _execute_one(predictor, r: ForecastRequest):
+        try:
+            result = predictor.predict(
+                df=r.x_df, x_timestamp=r.x_timestamp, y_timestamp=r.y_timestamp, pred_len=r.pred_len,
+                T=r.temperature, top_p=r.top_p, sample_count=r.sample_count,
+                verbose=False, return_paths=r.return_paths, progress=r.future.set_progress,
+                **_adaptive_kwargs(r.tolerance), **_partial_kwargs([r], batched=False),
+            )
+        except Exception as e:
+            r.future.set_exception(e)
+        else:
+            r.future.set_result(result)
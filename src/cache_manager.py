@@ -36,33 +36,57 @@ class CacheManager:
         safe_key = key.replace("/", "_").replace(" ", "_")
         return self.ohlcv_dir / f"{safe_key}.json"
 
-    def _is_expired(self, cache_path: Path) -> bool:
-        """检查缓存文件是否过期。"""
+    def _read(self, key: str) -> Optional[dict]:
+        """读取缓存文件, 不存在或损坏时返回 None。"""
+        cache_path = self._cache_path(key)
         if not cache_path.exists():
-            return True
+            return None
         try:
             with open(cache_path, "r", encoding="utf-8") as f:
                 meta = json.load(f)
-            fetched_at = meta.get("fetched_at", 0)
-            return (time.time() - fetched_at) > self.ttl_seconds
-        except (json.JSONDecodeError, KeyError, TypeError):
+            float(meta["fetched_at"])
+            return meta
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+            return None
+
+    def _is_expired(self, fetched_at: float, period_ms: Optional[int] = None) -> bool:
+        """
+        检查缓存是否过期: 超过 TTL, 或 (给定 K 线周期时) 拉取之后已跨过 K 线边界 —
+        新 K 线开盘后缓存立即失效, 不必等满 TTL。
+        """
+        now = time.time()
+        if (now - fetched_at) > self.ttl_seconds:
             return True
+        if period_ms is not None:
+            return int(now * 1000) // period_ms != int(fetched_at * 1000) // period_ms
+        return False
 
-    def get(self, key: str) -> Optional[pd.DataFrame]:
+    def get(self, key: str, period_ms: Optional[int] = None) -> Optional[pd.DataFrame]:
         """
         从磁盘缓存读取 OHLCV 数据。
 
+        Args:
+            key: 缓存 key
+            period_ms: K 线周期 (毫秒), 给定时跨过 K 线边界即视为过期
+
         Returns:
             DataFrame if cache hit and valid; None otherwise.
         """
-        cache_path = self._cache_path(key)
-        if self._is_expired(cache_path):
+        meta = self._read(key)
+        if meta is None or self._is_expired(float(meta["fetched_at"]), period_ms):
             return None
         try:
-            with open(cache_path, "r", encoding="utf-8") as f:
-                meta = json.load(f)
-            df = pd.DataFrame(meta["data"])
-            return df
+            return pd.DataFrame(meta["data"])
+        except Exception:
+            return None
+
+    def get_stale(self, key: str) -> Optional[pd.DataFrame]:
+        """读取缓存数据而不检查是否过期 (增量拉取以此为基础, 只补齐缺少的 K 线)。"""
+        meta = self._read(key)
+        if meta is None:
+            return None
+        try:
+            return pd.DataFrame(meta["data"])
         except Exception:
             return None
 
@@ -2,11 +2,16 @@
 图表渲染模块。
 使用 Plotly 绘制专业 K 线图，展示历史数据、预测数据及回测对比。
 """
+from __future__ import annotations
+
 from typing import Optional
 
 import pandas as pd
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+
+from src.lazy_import import lazy_module
+
+go = lazy_module("plotly.graph_objects")  # 首次绘图时才导入
+plotly_subplots = lazy_module("plotly.subplots")
 
 
 class ChartRenderer:
@@ -17,6 +22,8 @@ class ChartRenderer:
         hist_df: pd.DataFrame,
         pred_df: pd.DataFrame,
         backtest_df: Optional[pd.DataFrame] = None,
+        band_df: Optional[pd.DataFrame] = None,
+        horizon_end: Optional[pd.Timestamp] = None,
     ) -> go.Figure:
         """
         绘制混合 K 线图。
@@ -25,12 +32,15 @@ class ChartRenderer:
             hist_df: 历史 OHLCV 数据 (DataFrame)
             pred_df: 预测 OHLCV 数据 (DataFrame)
             backtest_df: 回测/昨日预测数据 (可选, DataFrame)
+            band_df: 多路径预测的 close 分位数区间 (可选, 列: timestamp, lower, upper)
+            horizon_end: 预测终点时间 (可选)。流式预测逐步绘制部分结果时传入, x 轴固定显示到终点,
+                预测 K 线随解码向右生长而不是每一步重新缩放
 
         Returns:
             go.Figure: Plotly 图表对象
         """
         # 创建子图（未来可扩展成交量等）
-        fig = make_subplots(
+        fig = plotly_subplots.make_subplots(
             rows=1,
             cols=1,
             shared_xaxes=True,
@@ -72,6 +82,30 @@ class ChartRenderer:
             )
         )
 
+        # 2.1 绘制预测区间 (扇形图, 多路径采样时)
+        if band_df is not None and not band_df.empty:
+            fig.add_trace(
+                go.Scatter(
+                    x=band_df["timestamp"],
+                    y=band_df["upper"],
+                    mode="lines",
+                    line=dict(width=0),
+                    showlegend=False,
+                    hoverinfo="skip",
+                )
+            )
+            fig.add_trace(
+                go.Scatter(
+                    x=band_df["timestamp"],
+                    y=band_df["lower"],
+                    mode="lines",
+                    line=dict(width=0),
+                    fill="tonexty",
+                    fillcolor="rgba(31, 119, 180, 0.2)",
+                    name="预测区间",
+                )
+            )
+
         # 3. 绘制预测连接线 (可选优化视觉)
         # 如果需要更强的连接感，可以添加一条线连接 History Last Close -> Pred First Open
         # 但标准 Candlestick 图通常不需要，除非时间轴不连续
@@ -111,6 +145,8 @@ class ChartRenderer:
             ),
             margin=dict(l=20, r=20, t=60, b=20),
         )
+        if horizon_end is not None:
+            fig.update_xaxes(range=[hist_df["timestamp"].iloc[0], horizon_end])
 
         # 添加垂直分割线 (当前时间)
         # 必须转为毫秒级 Unix 时间戳，避免 Pandas 2.x Timestamp 与整数运算的兼容性问题
@@ -10,6 +10,9 @@ DATA_DIR = PROJECT_ROOT / "data"
 CACHE_DIR = DATA_DIR / "cache"
 OHLCV_CACHE_DIR = CACHE_DIR / "ohlcv"
 PREDICTION_CACHE_DIR = CACHE_DIR / "predictions"
+HISTORY_DIR = DATA_DIR / "history"  # 历史回补的分页 K 线 (DataFeed.backfill), 按交易对与周期分目录
+COMPILE_CACHE_DIR = CACHE_DIR / "compile"  # torch.compile 产物缓存 (重启免编译)
+ONNX_MODEL_DIR = DATA_DIR / "onnx"  # ONNX 导出目录 (python -m model.onnx_export)
 LOG_DIR = DATA_DIR / "logs"
 
 # ──────────────── 模型配置 ────────────────
@@ -18,28 +21,51 @@ TOKENIZER_NAME = "NeoQuasar/Kronos-Tokenizer-base"
 INPUT_WINDOW = 488          # 历史数据行数
 OUTPUT_WINDOW = 24          # 预测数据行数 (24 小时)
 MAX_CONTEXT = 512           # Kronos 最大上下文 token 长度
+MODEL_PRECISION = "fp32"    # 推理精度: "fp32" | "bf16" (需 CPU 原生 bf16, 否则回退 fp32) | "int8" (Linear 层动态 int8 量化, 仅 CPU)
+INFERENCE_BACKEND = "eager"  # 推理后端: "eager" | "compiled" (加载时 torch.compile 解码步, 失败回退 eager) | "onnx" (onnxruntime, 不加载 torch)
+BATCH_MAX_SIZE = 32         # 推理调度器单批最多合并的请求数
+BATCH_MAX_WAIT_MS = 20      # 推理调度器收集窗口 (毫秒), 窗口内到达的兼容请求合并为一次 predict_batch
+INFERENCE_WORKER = False    # True: 模型常驻独立推理进程 (管道收发请求与进度), 推理不占用 Streamlit 进程的 CPU 与 GIL
+FORECAST_POLL_INTERVAL = 0.5  # 页面轮询预测进度的间隔 (秒), 等待期间不阻塞 rerun
 
 # ──────────────── 采样参数 ────────────────
 DEFAULT_TEMPERATURE = 1.0   # 采样温度
 DEFAULT_TOP_P = 0.9         # 核采样概率
 DEFAULT_SAMPLE_COUNT = 1    # 生成路径数 (1 = 单次确定性预测)
+SAMPLE_COUNT_MAX = 256      # Sidebar 可选的最大路径数 (风险评估 / VaR 用)
+MAX_INFERENCE_MEMORY_MB = 1024  # 单次推理的内存预算 (MB), 路径数超出时分块解码, 只增加耗时不增加内存
 TEMPERATURE_MIN = 0.1
 TEMPERATURE_MAX = 2.0
 TOP_P_MIN = 0.1
 TOP_P_MAX = 1.0
+FORECAST_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)  # 多路径预测输出的分位数
+ADAPTIVE_TOLERANCE = 0.005  # 自适应采样: 24h close 均值的标准误 ≤ 当前价 × 该比例时停止追加路径 (0.005 = 0.5%)
+ADAPTIVE_PATH_INCREMENT = 4  # 自适应采样每轮追加的路径数 (首轮即需 ≥ 2 条才能估计标准误)
 
 # ──────────────── 数据源配置 ────────────────
 DEFAULT_SYMBOL = "BTC/USDT"
 TIMEFRAME = "1h"
 EXCHANGE_ID = "binance"
 FETCH_LIMIT = 500           # 每次拉取的 K 线条数上限
+OHLCV_COLUMNS = ["timestamp", "open", "high", "low", "close", "volume"]  # ccxt 返回的 K 线字段顺序
+FETCH_CONCURRENCY = 8       # fetch_many 同时在途的请求数上限 (请求速率另由 RequestScheduler 的令牌桶限制)
+OHLCV_REQUEST_WEIGHT = 2    # 单次 K 线请求消耗的交易所权重 (Binance /api/v3/klines)
+
+# ──────────────── 实时 K 线推送 ────────────────
+STREAM_FEED = True          # True: 经 websocket 订阅 K 线, 内存中常驻最近 INPUT_WINDOW 根 (StreamingDataFeed); 不可用时回退 REST
+STREAM_WS_URL = "wss://stream.binance.com:9443/ws"  # Binance K 线推送地址 (<symbol>@kline_<interval>)
+STREAM_STALE_SECONDS = 30   # 超过该时长未收到推送时视为断流, fetch_ohlcv 回退 REST
+STREAM_MAX_SYMBOLS = 20     # 同时订阅的交易对上限, 超出时退订最久未使用的
 
 # ──────────────── 网络与重试 ────────────────
 MAX_RETRIES = 3             # API 最大重试次数
-RETRY_BASE_DELAY = 1        # 重试基础延迟 (秒), 实际 = 2^attempt
+RETRY_BASE_DELAY = 1        # 重试基础延迟 (秒), 第 n 次重试等待 [0, RETRY_BASE_DELAY × 2^n) 内的随机值
+RATE_LIMIT_WEIGHT = 2400    # 进程级令牌桶容量与每分钟补充的请求权重; 任意 60s 至多消耗 2 倍, 低于 Binance 6000/分钟上限
+BREAKER_FAILURES = 3        # 连续多少次请求最终失败 (重试耗尽) 后熔断
+BREAKER_COOLDOWN = 30       # 熔断持续时间 (秒), 之后放行一次试探请求
 
 # ──────────────── 缓存配置 ────────────────
-OHLCV_CACHE_TTL = 300       # OHLCV 缓存有效期 (秒), 5 分钟
+OHLCV_CACHE_TTL = 300       # OHLCV 缓存有效期 (秒), 5 分钟, 即未收盘 K 线的最长陈旧时间; 跨过 TIMEFRAME 边界时立即失效
 
 # ──────────────── UI 默认参数 ────────────────
 DEFAULT_THRESHOLD = 2.0     # 信号触发阈值 (%)
@@ -1,32 +1,83 @@
 """
 数据采集与预处理模块。
 通过 ccxt 获取 Binance OHLCV 数据，实施缓存策略，执行数据预处理流水线。
+缓存过期后增量拉取: 只向交易所请求最后一根缓存 K 线 (拉取时尚未收盘) 及之后的 K 线, 与缓存合并去重。
+长时间范围的历史数据经 backfill() 分页并发回补到本地存储 (src.history_store), 支持断点续传。
 """
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import timedelta
-from typing import Tuple
+from typing import List, Optional, Tuple
 
-import ccxt
+import numpy as np
 import pandas as pd
 
 from src.cache_manager import CacheManager
 from src.config import (
     EXCHANGE_ID,
+    FETCH_CONCURRENCY,
     FETCH_LIMIT,
     INPUT_WINDOW,
     MAX_RETRIES,
+    OHLCV_COLUMNS,
+    OHLCV_REQUEST_WEIGHT,
     OUTPUT_WINDOW,
     TIMEFRAME,
 )
 from src.exceptions import DataFeedError
+from src.history_store import HistoryStore
+from src.lazy_import import lazy_module
+from src.rate_limiter import Priority, RequestScheduler, shared_scheduler
+
+ccxt = lazy_module("ccxt")  # 首次创建 DataFeed 时才导入 (~0.5s)
+
+_TIMEFRAME_UNITS_MS = {"m": 60_000, "h": 3_600_000, "d": 86_400_000, "w": 604_800_000}
+
+
+def timeframe_ms(timeframe: str) -> int:
+    """K 线周期 → 毫秒, 例: "1h" → 3600000 (支持 m / h / d / w)。"""
+    try:
+        return int(timeframe[:-1]) * _TIMEFRAME_UNITS_MS[timeframe[-1]]
+    except (KeyError, ValueError) as e:
+        raise DataFeedError(f"不支持的 K 线周期: {timeframe}") from e
+
+
+def _to_ms(value) -> int:
+    """毫秒时间戳, 或 pd.Timestamp 可解析的时间 (无时区按 UTC) → 毫秒时间戳。"""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    ts = pd.Timestamp(value)
+    if ts.tzinfo is None:
+        ts = ts.tz_localize("UTC")
+    return int(ts.value // 10**6)
+
+
+def merge_candles(cached_df: pd.DataFrame, new_df: pd.DataFrame, limit: int) -> pd.DataFrame:
+    """按 timestamp 合并去重 (同一根 K 线以新数据为准), 升序排列后保留最近 limit 根。"""
+    merged = pd.concat([cached_df, new_df], ignore_index=True)
+    merged = merged.drop_duplicates(subset="timestamp", keep="last").sort_values("timestamp")
+    return merged.tail(limit).reset_index(drop=True)
 
 
 class DataFeed:
     """数据采集与预处理引擎。"""
 
-    def __init__(self, cache_manager: CacheManager | None = None):
-        self.exchange = getattr(ccxt, EXCHANGE_ID)({"enableRateLimit": True})
+    def __init__(
+        self,
+        cache_manager: CacheManager | None = None,
+        exchange=None,
+        scheduler: RequestScheduler | None = None,
+    ):
+        """
+        Args:
+            cache_manager: L2 磁盘缓存 (默认新建)
+            exchange: 兼容 ccxt 接口的交易所对象 (测试可传入本地模拟交易所), 默认按 EXCHANGE_ID 创建
+            scheduler: 请求调度器 (限频 / 退避 / 熔断), 默认为进程内共用的 shared_scheduler()
+        """
+        # 限频由 RequestScheduler 统一负责, 关闭 ccxt 自带的按实例节流
+        self.exchange = exchange if exchange is not None else getattr(ccxt, EXCHANGE_ID)({"enableRateLimit": False})
         self.cache_manager = cache_manager or CacheManager()
+        self.scheduler = scheduler or shared_scheduler()
 
     # ──────────── 数据拉取 ────────────
 
@@ -35,50 +86,168 @@ class DataFeed:
         symbol: str,
         timeframe: str = TIMEFRAME,
         limit: int = FETCH_LIMIT,
+        priority: Priority = Priority.INTERACTIVE,
     ) -> pd.DataFrame:
         """
-        带指数退避重试与 L2 磁盘缓存的 OHLCV 数据拉取。
+        带限频、抖动指数退避重试与 L2 磁盘缓存的 OHLCV 数据拉取。
+
+        缓存在跨过 K 线边界 (新 K 线开盘) 或超过 OHLCV_CACHE_TTL 时过期。过期后增量拉取:
+        以最后一根缓存 K 线 (拉取时尚未收盘, 需重新校验) 为 since, 只请求它及之后的 K 线,
+        按 timestamp 合并去重; 无缓存或缺口超过 limit 根时整段重新拉取。
 
         Args:
             symbol: 交易对, e.g. "BTC/USDT"
             timeframe: K 线周期, 默认 "1h"
             limit: 拉取条数上限, 默认 500
+            priority: 请求优先级 (后台刷新传 Priority.BACKGROUND, 让位于用户触发的拉取)
 
         Returns:
             原始 OHLCV DataFrame (列: timestamp, open, high, low, close, volume)
 
         Raises:
-            DataFeedError: 无效的交易对 / 网络/API 错误
+            DataFeedError: 无效的交易对 / 网络/API 错误 / 连续失败后熔断中
         """
-        cache_key = f"{symbol}_{timeframe}"
-
-        # L2 缓存检查
-        cached_df = self.cache_manager.get(cache_key)
+        cached_df, stale_df, since = self._plan(symbol, timeframe, limit)
         if cached_df is not None:
             return cached_df
 
-        # 网络请求（指数退避重试）
+        ohlcv = self._request(symbol, timeframe, since, limit, priority)
+        return self._store(symbol, timeframe, limit, ohlcv, stale_df, since)
+
+    def backfill(
+        self,
+        symbol: str,
+        start,
+        end=None,
+        timeframe: str = TIMEFRAME,
+        store: HistoryStore | None = None,
+    ) -> pd.DataFrame:
+        """
+        分页回补 [start, end) 范围内的历史 K 线, 直接写入本地存储。
+
+        时间范围按 store.page_size (默认 FETCH_LIMIT) 根 K 线切页, 各页以后台优先级并发请求 (同时在途不超过
+        FETCH_CONCURRENCY, 速率受进程级令牌桶限制), 每页拉取后立即落盘;
+        已完整保存的页直接跳过, 中断后再次调用即从缺失的页继续。
+
+        Args:
+            symbol: 交易对
+            start / end: 起止时间 (毫秒时间戳或 pd.Timestamp 可解析的值, 无时区按 UTC); end 默认为当前时间
+            timeframe: K 线周期
+            store: 本地存储 (默认 data/history)
+
+        Returns:
+            范围内的原始 OHLCV DataFrame (列同 fetch_ohlcv)
+
+        Raises:
+            DataFeedError: 无效的交易对, 或部分页重试后仍失败 (已成功的页保留, 可再次调用续传)
+        """
+        store = store or HistoryStore()
+        period_ms = timeframe_ms(timeframe)
+        start_ms = _to_ms(start)
+        end_ms = _to_ms(end) if end is not None else int(time.time() * 1000)
+        pages = store.missing_pages(symbol, timeframe, period_ms, start_ms, end_ms)
+        errors = self._fetch_pages(symbol, timeframe, pages, store)
+        if errors:
+            raise DataFeedError(f"{symbol} 历史回补有 {len(errors)}/{len(pages)} 页失败, 再次调用可续传: {errors[0]}")
+        return store.load(symbol, timeframe, start_ms, end_ms)
+
+    def _request(
+        self, symbol: str, timeframe: str, since: Optional[int], limit: int,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> list:
+        """经调度器限频、带抖动指数退避重试的单次交易所请求, 返回 ccxt 格式的 K 线列表。"""
+        self.scheduler.check(symbol)
         last_error: Exception | None = None
         for attempt in range(MAX_RETRIES):
+            self.scheduler.acquire(OHLCV_REQUEST_WEIGHT, priority)
             try:
-                ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, limit=limit)
-                df = pd.DataFrame(
-                    ohlcv,
-                    columns=["timestamp", "open", "high", "low", "close", "volume"],
-                )
-                # 写入 L2 缓存
-                self.cache_manager.set(cache_key, df)
-                return df
+                ohlcv = self.exchange.fetch_ohlcv(symbol, timeframe, since=since, limit=limit)
+                self.scheduler.record_success()
+                return ohlcv
 
             except ccxt.BadSymbol as e:
+                self.scheduler.record_success()  # 交易所正常应答, 不计入熔断
                 raise DataFeedError(f"无效的交易对: {symbol}") from e
             except Exception as e:
                 last_error = e
                 if attempt < MAX_RETRIES - 1:
-                    time.sleep(2**attempt)  # 1s, 2s, 4s
+                    time.sleep(self.scheduler.backoff(attempt))
 
+        self.scheduler.record_failure()
         raise DataFeedError(f"无法获取 {symbol} 数据（重试 {MAX_RETRIES} 次后失败）: {last_error}")
 
+    def _fetch_pages(self, symbol: str, timeframe: str, pages: List[int], store: HistoryStore) -> List[DataFeedError]:
+        """用线程池并发拉取各页并逐页写入 store, 返回失败页的错误 (无效交易对直接抛出)。"""
+        errors = []
+        with ThreadPoolExecutor(max_workers=FETCH_CONCURRENCY, thread_name_prefix="backfill") as pool:
+            futures = [
+                pool.submit(self._fetch_page, symbol, timeframe, page_start, store) for page_start in pages
+            ]
+            for future in futures:
+                try:
+                    future.result()
+                except DataFeedError as e:
+                    if isinstance(e.__cause__, ccxt.BadSymbol):
+                        raise
+                    errors.append(e)
+        return errors
+
+    def _fetch_page(self, symbol: str, timeframe: str, page_start: int, store: HistoryStore) -> None:
+        ohlcv = self._request(symbol, timeframe, page_start, store.page_size, Priority.BACKGROUND)
+        store.write_page(symbol, timeframe, page_start, ohlcv, self._page_complete(timeframe, page_start, store))
+
+    @staticmethod
+    def _page_complete(timeframe: str, page_start: int, store: HistoryStore) -> bool:
+        """页内最后一根 K 线在请求时已收盘 (即该页不含未收盘 K 线)。"""
+        period_ms = timeframe_ms(timeframe)
+        return page_start + store.page_size * period_ms <= int(time.time() * 1000) // period_ms * period_ms
+
+    def _plan(
+        self, symbol: str, timeframe: str, limit: int
+    ) -> Tuple[Optional[pd.DataFrame], Optional[pd.DataFrame], Optional[int]]:
+        """
+        查询 L2 缓存, 决定本次拉取方式。
+
+        Returns:
+            (cached_df, stale_df, since): 缓存有效时 cached_df 非 None, 无需请求;
+            否则 since 为增量拉取起点 (None 表示整段拉取), stale_df 为待合并的过期缓存
+        """
+        cache_key = f"{symbol}_{timeframe}"
+        period_ms = timeframe_ms(timeframe)
+
+        # L2 缓存检查
+        cached_df = self.cache_manager.get(cache_key, period_ms=period_ms)
+        if cached_df is not None:
+            return cached_df, None, None
+
+        # 过期缓存作为增量拉取的基础
+        stale_df = self.cache_manager.get_stale(cache_key)
+        return None, stale_df, self._resume_from(stale_df, period_ms, limit)
+
+    def _store(
+        self, symbol: str, timeframe: str, limit: int, ohlcv: list, stale_df: Optional[pd.DataFrame],
+        since: Optional[int],
+    ) -> pd.DataFrame:
+        """把交易所返回的 K 线 (增量拉取时与过期缓存合并) 写入 L2 缓存并返回。"""
+        df = pd.DataFrame(ohlcv, columns=OHLCV_COLUMNS)
+        if since is not None:
+            df = merge_candles(stale_df, df, limit)
+        # 写入 L2 缓存
+        self.cache_manager.set(f"{symbol}_{timeframe}", df)
+        return df
+
+    @staticmethod
+    def _resume_from(stale_df: Optional[pd.DataFrame], period_ms: int, limit: int) -> Optional[int]:
+        """
+        增量拉取的起点: 最后一根缓存 K 线的时间戳。
+        无缓存, 或缺口 (含重新校验的那根) 一次请求补不齐时返回 None, 整段重新拉取。
+        """
+        if stale_df is None or stale_df.empty or list(stale_df.columns) != OHLCV_COLUMNS:
+            return None
+        last_ts = int(stale_df["timestamp"].iloc[-1])
+        missing = (int(time.time() * 1000) - last_ts) // period_ms + 1
+        return last_ts if missing <= limit else None
+
     # ──────────── 数据预处理 ────────────
 
     def preprocess(
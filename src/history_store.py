@@ -0,0 +1,87 @@
+"""
+历史 K 线本地存储 — 供 DataFeed.backfill 分页回补使用。
+
+按 (交易对, 周期) 分目录, 每页一个 JSON 文件, 文件名为页起始时间戳 (毫秒)。
+页边界按 page_size 根 K 线对齐到 Unix 纪元, 同一时间范围每次切出相同的页, 中断后可按文件判断哪些页已完成;
+包含未收盘 K 线的页标记为未完成, 下次回补时重新拉取。写入先落临时文件再替换, 中断不会留下损坏的页。
+"""
+import json
+import os
+from pathlib import Path
+from typing import List
+
+import pandas as pd
+
+from src.config import FETCH_LIMIT, HISTORY_DIR, OHLCV_COLUMNS
+
+
+class HistoryStore:
+    """分页 K 线存储。"""
+
+    def __init__(self, root: Path = HISTORY_DIR, page_size: int = FETCH_LIMIT):
+        """
+        Args:
+            root: 存储根目录
+            page_size: 每页 K 线根数, 即单次请求的条数上限
+        """
+        self.root = Path(root)
+        self.page_size = page_size
+
+    def _dir(self, symbol: str, timeframe: str) -> Path:
+        safe_symbol = symbol.replace("/", "_").replace(" ", "_")
+        return self.root / f"{safe_symbol}_{timeframe}"
+
+    def _page_path(self, symbol: str, timeframe: str, page_start: int) -> Path:
+        return self._dir(symbol, timeframe) / f"{page_start}.json"
+
+    def page_starts(self, period_ms: int, start_ms: int, end_ms: int) -> List[int]:
+        """覆盖 [start_ms, end_ms) 的各页起始时间戳 (对齐到页边界)。"""
+        span = self.page_size * period_ms
+        first = start_ms // span * span
+        return list(range(first, end_ms, span))
+
+    def is_complete(self, symbol: str, timeframe: str, page_start: int) -> bool:
+        """该页已保存且拉取时所有 K 线均已收盘。"""
+        try:
+            with open(self._page_path(symbol, timeframe, page_start), "r", encoding="utf-8") as f:
+                return bool(json.load(f)["complete"])
+        except (OSError, json.JSONDecodeError, KeyError, TypeError):
+            return False
+
+    def missing_pages(self, symbol: str, timeframe: str, period_ms: int, start_ms: int, end_ms: int) -> List[int]:
+        """[start_ms, end_ms) 范围内尚需拉取的页 (未保存或未完成)。"""
+        return [
+            page_start for page_start in self.page_starts(period_ms, start_ms, end_ms)
+            if not self.is_complete(symbol, timeframe, page_start)
+        ]
+
+    def write_page(self, symbol: str, timeframe: str, page_start: int, ohlcv: list, complete: bool) -> None:
+        """原子写入一页 ccxt 格式的 K 线 ([[timestamp, open, high, low, close, volume], ...])。"""
+        path = self._page_path(symbol, timeframe, page_start)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"complete": complete, "data": ohlcv}, f)
+        os.replace(tmp_path, path)
+
+    def load(self, symbol: str, timeframe: str, start_ms: int, end_ms: int) -> pd.DataFrame:
+        """
+        读取 [start_ms, end_ms) 范围内已保存的 K 线。
+
+        Returns:
+            原始 OHLCV DataFrame (列: timestamp, open, high, low, close, volume), 按 timestamp 升序去重
+        """
+        rows = []
+        for path in sorted(self._dir(symbol, timeframe).glob("*.json")):
+            page_start = int(path.stem)
+            if page_start >= end_ms:
+                continue
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    rows.extend(json.load(f)["data"])
+            except (OSError, json.JSONDecodeError, KeyError):
+                continue
+        df = pd.DataFrame(rows, columns=OHLCV_COLUMNS)
+        df = df[(df["timestamp"] >= start_ms) & (df["timestamp"] < end_ms)]
+        df = df.drop_duplicates(subset="timestamp", keep="last").sort_values("timestamp")
+        return df.reset_index(drop=True)
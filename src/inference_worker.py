@@ -0,0 +1,243 @@
+"""
+独立推理进程。
+常驻子进程持有已加载的预测器, 经 multiprocessing 管道接收预测请求, 并把解码进度与结果回传;
+Streamlit 进程只负责收发消息, 推理占用 CPU 与 GIL 期间页面 rerun 与交互不受影响。
+
+消息格式 (元组):
+  主进程 → 子进程: ("predict", request_id, submit 参数 dict) | ("stop",)
+  子进程 → 主进程: ("ready", 耗时 dict) | ("progress", request_id, 比例) | ("partial", request_id, 部分预测)
+                  | ("result", request_id, 结果) | ("error", request_id, 异常)
+"""
+from __future__ import annotations
+
+import itertools
+import multiprocessing
+import pickle
+import threading
+import time
+from typing import Callable, Dict, Optional, Tuple
+
+import pandas as pd
+
+from src.batch_scheduler import BatchScheduler, ForecastFuture
+from src.config import BATCH_MAX_SIZE, BATCH_MAX_WAIT_MS
+from src.exceptions import ModelError
+
+
+def _picklable(error: BaseException) -> BaseException:
+    """异常原样回传; 无法序列化的 (如引用了模型对象) 以 ModelError 携带其描述。"""
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return ModelError(f"{type(error).__name__}: {error}")
+
+
+def _serve(conn, load_predictor: Callable[[], object], warmup: Optional[Tuple], max_batch_size: int,
+           max_wait_ms: float):
+    """子进程主循环: 加载并预热预测器, 之后把请求交给进程内的 BatchScheduler 合批执行。"""
+    send_lock = threading.Lock()  # 主循环、调度线程与进度回调都会发送消息
+
+    def send(*message):
+        with send_lock:
+            conn.send(message)
+
+    timings = {"load_seconds": None, "warmup_seconds": None, "error": None}
+    predictor = None
+    try:
+        start = time.perf_counter()
+        predictor = load_predictor()
+        timings["load_seconds"] = time.perf_counter() - start
+        if warmup is not None:
+            x_df, x_timestamp, y_timestamp = warmup
+            start = time.perf_counter()
+            predictor.predict(df=x_df, x_timestamp=x_timestamp, y_timestamp=y_timestamp, pred_len=len(y_timestamp),
+                              verbose=False)
+            timings["warmup_seconds"] = time.perf_counter() - start
+    except Exception as e:
+        timings["error"] = str(e)
+    send("ready", timings)
+
+    def get_predictor():
+        if predictor is None:
+            raise ModelError(f"推理进程加载模型失败: {timings['error']}")
+        return predictor
+
+    scheduler = BatchScheduler(get_predictor, max_batch_size=max_batch_size, max_wait_ms=max_wait_ms)
+
+    def reply(request_id: int, done: ForecastFuture):
+        error = done.exception()
+        if error is None:
+            send("result", request_id, done.result())
+        else:
+            send("error", request_id, _picklable(error))
+
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break  # 主进程已退出
+        if message[0] == "stop":
+            break
+        _, request_id, kwargs = message
+        future = scheduler.submit(**kwargs)
+        future.add_progress_listener(lambda fraction, request_id=request_id: send("progress", request_id, fraction))
+        if kwargs.get("stream"):
+            future.add_partial_listener(lambda pred_df, request_id=request_id: send("partial", request_id, pred_df))
+        future.add_done_callback(lambda done, request_id=request_id: reply(request_id, done))
+
+
+class InferenceWorker:
+    """
+    常驻推理进程的客户端 (线程安全)。
+
+    submit() 与 BatchScheduler.submit 接口一致, 返回的 ForecastFuture 由后台读线程按消息更新进度、部分预测与结果,
+    调用方可轮询 done() / progress / partial, 也可阻塞等待 result()。
+    子进程以 spawn 方式启动 (不继承主进程的线程与 torch 状态), 首次 submit 时按需启动, 退出后自动重启;
+    进程退出时未完成的请求以 ModelError 失败。
+    """
+
+    def __init__(
+        self,
+        load_predictor: Callable[[], object],
+        warmup: Optional[Tuple[pd.DataFrame, pd.Series, pd.Series]] = None,
+        timings=None,
+        max_batch_size: int = BATCH_MAX_SIZE,
+        max_wait_ms: float = BATCH_MAX_WAIT_MS,
+    ):
+        """
+        Args:
+            load_predictor: 在子进程中调用、返回预测器的函数 (须为模块级函数, 以便按名称传给子进程)
+            warmup: 加载后用于预热的 (x_df, x_timestamp, y_timestamp), None 表示不预热
+            timings: 可选, 具有 load_seconds / warmup_seconds / error 属性的对象 (如 LoadTimings),
+                子进程就绪后写入其加载与预热耗时
+            max_batch_size / max_wait_ms: 子进程内调度器的合批参数
+        """
+        self.load_predictor = load_predictor
+        self.warmup = warmup
+        self.timings = timings
+        self.max_batch_size = max_batch_size
+        self.max_wait_ms = max_wait_ms
+        self._context = multiprocessing.get_context("spawn")
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._pending: Dict[int, Tuple[object, ForecastFuture]] = {}  # request_id → (所在连接, Future)
+        self._process = None
+        self._conn = None
+        self.ready = threading.Event()  # 子进程完成加载与预热 (或加载失败) 后置位
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def start(self):
+        """启动子进程 (已在运行时不做任何事)。"""
+        with self._lock:
+            self._start_locked()
+
+    def submit(
+        self,
+        x_df: pd.DataFrame,
+        x_timestamp: pd.Series,
+        y_timestamp: pd.Series,
+        pred_len: int,
+        temperature: float,
+        top_p: float,
+        sample_count: int,
+        return_paths: bool = False,
+        tolerance: Optional[float] = None,
+        stream: bool = False,
+    ) -> ForecastFuture:
+        """提交一条预测请求, 参数与返回值同 BatchScheduler.submit。"""
+        kwargs = dict(
+            x_df=x_df, x_timestamp=x_timestamp, y_timestamp=y_timestamp, pred_len=pred_len, temperature=temperature,
+            top_p=top_p, sample_count=sample_count, return_paths=return_paths, tolerance=tolerance, stream=stream,
+        )
+        future = ForecastFuture()
+        with self._lock:
+            self._start_locked()
+            request_id = next(self._ids)
+            self._pending[request_id] = (self._conn, future)
+            try:
+                self._conn.send(("predict", request_id, kwargs))
+            except (OSError, ValueError) as e:
+                del self._pending[request_id]
+                future.set_exception(ModelError(f"推理进程不可用: {e}"))
+        return future
+
+    def close(self, timeout: float = 5.0):
+        """通知子进程退出并等待; 超时则强制终止。"""
+        with self._lock:
+            process, conn = self._process, self._conn
+            self._process = None
+        if process is None:
+            return
+        try:
+            conn.send(("stop",))
+        except (OSError, ValueError):
+            pass
+        process.join(timeout)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+        conn.close()
+
+    # ──────────── 内部实现 ────────────
+
+    def _start_locked(self):
+        if self.alive:
+            return
+        self.ready.clear()
+        conn, child_conn = self._context.Pipe()
+        process = self._context.Process(
+            target=_serve,
+            args=(child_conn, self.load_predictor, self.warmup, self.max_batch_size, self.max_wait_ms),
+            name="kronos-inference",
+            daemon=True,
+        )
+        process.start()
+        child_conn.close()  # 子进程退出后读端才能收到 EOF
+        self._process, self._conn = process, conn
+        threading.Thread(target=self._read, args=(conn,), name="inference-reader", daemon=True).start()
+
+    def _read(self, conn):
+        """后台读线程: 把子进程消息分发到对应的 Future; 连接断开时让未完成的请求失败。"""
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                break
+            kind = message[0]
+            if kind == "ready":
+                if self.timings is not None:
+                    for name, value in message[1].items():
+                        setattr(self.timings, name, value)
+                self.ready.set()
+                continue
+
+            _, request_id, payload = message
+            if kind in ("progress", "partial"):
+                entry = self._pending.get(request_id)
+                if entry is not None and kind == "progress":
+                    entry[1].set_progress(payload)
+                elif entry is not None:
+                    entry[1].set_partial(payload)
+                continue
+            with self._lock:
+                entry = self._pending.pop(request_id, None)
+            if entry is None:
+                continue
+            future = entry[1]
+            if kind == "result":
+                future.set_result(payload)
+            else:
+                future.set_exception(payload)
+
+        with self._lock:
+            # 只清理发往这条连接的请求 (重启后的新进程使用新连接)
+            lost = [request_id for request_id, (owner, _) in self._pending.items() if owner is conn]
+            futures = [self._pending.pop(request_id)[1] for request_id in lost]
+            if self._conn is conn:
+                self.ready.set()
+        for future in futures:
+            future.set_exception(ModelError("推理进程已退出"))
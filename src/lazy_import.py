@@ -0,0 +1,35 @@
+"""
+重量级依赖的惰性导入。
+模块级的 `ccxt = lazy_module("ccxt")` 只登记模块名, 首次访问其属性时才真正 import,
+Streamlit 脚本启动与测试导入不再为本次用不到的依赖付费。
+"""
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """首次访问属性时才导入的模块占位对象 (线程安全由 import 锁保证)。"""
+
+    def _load(self) -> types.ModuleType:
+        module = self.__dict__.get("_module")
+        if module is None:
+            module = importlib.import_module(self.__name__)
+            self.__dict__["_module"] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        # 仅在占位对象自身没有该属性时调用
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+
+def lazy_module(name: str) -> types.ModuleType:
+    """
+    返回模块 name 的惰性占位对象; 已导入时直接返回真实模块。
+
+    用法与普通模块相同 (ccxt.binance(...)、except ccxt.BadSymbol), 测试中也可照常 patch 模块属性。
+    """
+    return sys.modules.get(name) or LazyModule(name)
@@ -4,49 +4,304 @@
 """
 from __future__ import annotations
 
+import queue
+import threading
+import time
 from dataclasses import dataclass
-from typing import Optional
+from typing import Dict, Iterator, Optional, Sequence, Tuple, Union
 
+import numpy as np
 import pandas as pd
 import streamlit as st
 
+from src.batch_scheduler import BatchScheduler, ForecastFuture
 from src.config import (
+    BATCH_MAX_SIZE,
+    BATCH_MAX_WAIT_MS,
+    COMPILE_CACHE_DIR,
+    INFERENCE_BACKEND,
+    INFERENCE_WORKER,
     INPUT_WINDOW,
     MAX_CONTEXT,
+    MAX_INFERENCE_MEMORY_MB,
     MODEL_NAME,
+    MODEL_PRECISION,
+    ONNX_MODEL_DIR,
     OUTPUT_WINDOW,
     TOKENIZER_NAME,
     DEFAULT_TEMPERATURE,
     DEFAULT_TOP_P,
     DEFAULT_SAMPLE_COUNT,
+    FORECAST_QUANTILES,
+    ADAPTIVE_TOLERANCE,
 )
 from src.exceptions import ModelError
+from src.inference_worker import InferenceWorker
+
+
+@dataclass
+class LoadTimings:
+    """模型冷启动各阶段耗时 (秒), 尚未完成的阶段为 None。"""
+
+    load_seconds: Optional[float] = None     # 构建 Tokenizer + 模型 (mmap 加载权重, 含编译 / 量化)
+    warmup_seconds: Optional[float] = None   # 合成数据预热预测 (首次前向, 权重换入内存)
+    error: Optional[str] = None              # 后台加载或预热失败的原因
+
+    @property
+    def ready(self) -> bool:
+        return self.warmup_seconds is not None
+
+
+def _synthetic_window() -> Tuple[pd.DataFrame, pd.Series, pd.Series]:
+    """预热用的合成窗口 (正弦走势), 形状与 DataFeed.preprocess() 输出一致。"""
+    close = 100 + np.sin(np.linspace(0, 12, INPUT_WINDOW))
+    x_df = pd.DataFrame({
+        "open": close, "high": close + 0.5, "low": close - 0.5, "close": close,
+        "volume": np.full(INPUT_WINDOW, 10.0), "amount": close * 10.0,
+    })
+    timestamps = pd.Series(pd.date_range("2025-01-01", periods=INPUT_WINDOW + OUTPUT_WINDOW, freq="h"))
+    return x_df, timestamps[:INPUT_WINDOW].reset_index(drop=True), timestamps[INPUT_WINDOW:].reset_index(drop=True)
+
+
+def load_predictor():
+    """
+    加载 Kronos 模型与 Tokenizer, 返回预测器。
+    按 MODEL_PRECISION 选择推理精度 (bf16 / int8 动态量化), CPU 不支持 bf16 时自动回退 fp32。
+    INFERENCE_BACKEND="compiled" 时在加载阶段编译单步解码 (产物缓存于 COMPILE_CACHE_DIR), 编译失败回退 eager。
+    INFERENCE_BACKEND="onnx" 时改用 ONNX_MODEL_DIR 中的导出图与 onnxruntime, 不导入 torch。
+    模块级函数: INFERENCE_WORKER=True 时由推理进程按名称调用。
+
+    Raises:
+        ModelError: 模型加载失败
+    """
+    try:
+        if INFERENCE_BACKEND == "onnx":
+            from src.onnx_backend import OnnxKronosPredictor
+
+            return OnnxKronosPredictor(ONNX_MODEL_DIR, max_memory_mb=MAX_INFERENCE_MEMORY_MB)
+
+        from model import Kronos, KronosPredictor, KronosTokenizer
+        from model.loading import load_pretrained
+
+        # 权重以只读映射 (copy-on-write) 方式加载, 不做随机初始化与整份拷贝
+        tokenizer = load_pretrained(KronosTokenizer, TOKENIZER_NAME)
+        model = load_pretrained(Kronos, MODEL_NAME)
+        predictor = KronosPredictor(
+            model,
+            tokenizer,
+            device="cpu",               # 强制 CPU (PRD §2.3.3)
+            max_context=MAX_CONTEXT,     # 512
+            precision=MODEL_PRECISION,
+            max_memory_mb=MAX_INFERENCE_MEMORY_MB,  # 大路径数分块解码
+        )
+        if INFERENCE_BACKEND == "compiled":
+            from model.compiled import compile_decode_step
+
+            compile_decode_step(predictor.model, cache_dir=str(COMPILE_CACHE_DIR), max_len=MAX_CONTEXT)
+        return predictor
+    except Exception as e:
+        raise ModelError(f"模型加载失败: {e}") from e
+
+
+@dataclass
+class ForecastDistribution:
+    """
+    一次多路径推理得到的预测分布。
+    均值、分位数与信号概率均由同一批采样路径计算, 无需重复推理。
+    """
+
+    mean_df: pd.DataFrame                  # (24, 6) 路径均值, 与 predict() 默认返回值相同
+    paths: np.ndarray                      # (sample_count, 24, 6) 各采样路径, 列顺序同 mean_df
+    quantiles: Dict[float, pd.DataFrame]   # 分位数 → (24, 6) DataFrame
+
+    @classmethod
+    def from_paths(
+        cls,
+        mean_df: pd.DataFrame,
+        paths: np.ndarray,
+        quantiles: Sequence[float] = FORECAST_QUANTILES,
+    ) -> "ForecastDistribution":
+        """由采样路径一次性 (向量化) 计算全部分位数。"""
+        q_values = np.quantile(paths, list(quantiles), axis=0)  # (Q, 24, 6)
+        q_dfs = {
+            q: pd.DataFrame(v, columns=mean_df.columns, index=mean_df.index)
+            for q, v in zip(quantiles, q_values)
+        }
+        return cls(mean_df=mean_df, paths=paths, quantiles=q_dfs)
+
+    @property
+    def sample_count(self) -> int:
+        return self.paths.shape[0]
+
+    def final_close(self) -> np.ndarray:
+        """每条路径在预测终点 (24h) 的 close 价格, shape (sample_count,)。"""
+        close_idx = list(self.mean_df.columns).index("close")
+        return self.paths[:, -1, close_idx]
+
+    def prob_close_above(self, price: float) -> float:
+        """预测终点 close > price 的路径占比。"""
+        return float(np.mean(self.final_close() > price))
+
+    def prob_close_below(self, price: float) -> float:
+        """预测终点 close < price 的路径占比。"""
+        return float(np.mean(self.final_close() < price))
+
+    def signal_probabilities(
+        self, current_price: float, threshold_pct: float
+    ) -> Tuple[float, float]:
+        """
+        StrategyEngine 使用的信号概率。
+
+        Returns:
+            (prob_bullish, prob_bearish): 终点收益率超过 +threshold / 低于 -threshold 的概率
+        """
+        threshold = threshold_pct / 100.0
+        return (
+            self.prob_close_above(current_price * (1 + threshold)),
+            self.prob_close_below(current_price * (1 - threshold)),
+        )
 
 
 class ModelEngine:
     """Kronos 模型推理引擎（全局单例，基于 st.cache_resource）。"""
 
+    timings = LoadTimings()                         # 进程级冷启动耗时, 见 start_warmup()
+    _warmup_lock = threading.Lock()
+    _warmup_thread: Optional[threading.Thread] = None
+
     @staticmethod
     @st.cache_resource
     def _load_model():
         """
-        懒加载 Kronos 模型与 Tokenizer。
+        懒加载 Kronos 预测器 (见 load_predictor)。
         使用 st.cache_resource 确保跨 rerun 保持单例。
         """
+        start = time.perf_counter()
+        predictor = load_predictor()
+        ModelEngine.timings.load_seconds = time.perf_counter() - start
+        return predictor
+
+    @classmethod
+    def start_warmup(cls) -> threading.Thread:
+        """
+        在后台线程中加载模型并跑一次合成数据预测, 耗时记录在 ModelEngine.timings。
+        app 启动时调用, 每个进程只启动一次; 预热完成前到达的用户请求会等待同一次加载,
+        不会重复加载 (st.cache_resource 对同一资源的计算加锁)。
+        INFERENCE_WORKER=True 时只启动推理进程, 加载与预热在其中完成并回报耗时。
+        """
+        with cls._warmup_lock:
+            if cls._warmup_thread is None:
+                cls._warmup_thread = threading.Thread(target=cls._warmup, name="model-warmup", daemon=True)
+                cls._warmup_thread.start()
+            return cls._warmup_thread
+
+    @classmethod
+    def _warmup(cls):
         try:
-            from model import Kronos, KronosPredictor, KronosTokenizer
-
-            tokenizer = KronosTokenizer.from_pretrained(TOKENIZER_NAME)
-            model = Kronos.from_pretrained(MODEL_NAME)
-            predictor = KronosPredictor(
-                model,
-                tokenizer,
-                device="cpu",               # 强制 CPU (PRD §2.3.3)
-                max_context=MAX_CONTEXT,     # 512
-            )
-            return predictor
+            if INFERENCE_WORKER:
+                cls._get_worker().start()
+                return
+            cls._load_model()
+            start = time.perf_counter()
+            cls().predict(*_synthetic_window())
+            cls.timings.warmup_seconds = time.perf_counter() - start
         except Exception as e:
-            raise ModelError(f"模型加载失败: {e}") from e
+            cls.timings.error = str(e)
+
+    @staticmethod
+    @st.cache_resource
+    def _get_scheduler() -> BatchScheduler:
+        """
+        全局推理调度器 (跨会话单例)。
+        所有会话的预测请求在 BATCH_MAX_WAIT_MS 窗口内合并, 同一批最多 BATCH_MAX_SIZE 条。
+        """
+        return BatchScheduler(
+            lambda: ModelEngine._load_model(),
+            max_batch_size=BATCH_MAX_SIZE,
+            max_wait_ms=BATCH_MAX_WAIT_MS,
+        )
+
+    @staticmethod
+    @st.cache_resource
+    def _get_worker() -> InferenceWorker:
+        """
+        全局推理进程客户端 (跨会话单例, INFERENCE_WORKER=True 时使用)。
+        模型只在推理进程中加载, 请求在进程内同样按 BATCH_MAX_WAIT_MS 窗口合批。
+        """
+        return InferenceWorker(
+            load_predictor,
+            warmup=_synthetic_window(),
+            timings=ModelEngine.timings,
+            max_batch_size=BATCH_MAX_SIZE,
+            max_wait_ms=BATCH_MAX_WAIT_MS,
+        )
+
+    def submit(
+        self,
+        x_df: pd.DataFrame,
+        x_timestamp: pd.Series,
+        y_timestamp: pd.Series,
+        sampling=None,
+        return_distribution: bool = False,
+        stream: bool = False,
+    ) -> ForecastFuture:
+        """
+        异步提交预测请求, 参数同 predict()。
+        INFERENCE_WORKER=True 时请求发往常驻推理进程, 否则由本进程的全局调度器执行。
+        stream=True 时逐步解码, future.partial 随之更新为已解码的前 k 小时预测 (路径均值)。
+
+        Returns:
+            ForecastFuture: result() 为 predict() 的返回值, progress 为推理进度 (0~1), partial 为部分预测,
+                供页面轮询; 推理异常以 ModelError 抛出
+        """
+        # 采样参数
+        temperature = DEFAULT_TEMPERATURE
+        top_p = DEFAULT_TOP_P
+        sample_count = DEFAULT_SAMPLE_COUNT
+        tolerance = None
+        if sampling is not None:
+            temperature = getattr(sampling, "temperature", DEFAULT_TEMPERATURE)
+            top_p = getattr(sampling, "top_p", DEFAULT_TOP_P)
+            sample_count = getattr(sampling, "sample_count", DEFAULT_SAMPLE_COUNT)
+            if getattr(sampling, "adaptive", False):
+                tolerance = getattr(sampling, "tolerance", ADAPTIVE_TOLERANCE)
+
+        backend = self._get_worker() if INFERENCE_WORKER else self._get_scheduler()
+        raw = backend.submit(
+            x_df,
+            x_timestamp,
+            y_timestamp,
+            pred_len=OUTPUT_WINDOW,             # 24
+            temperature=temperature,
+            top_p=top_p,
+            sample_count=sample_count,
+            return_paths=return_distribution,
+            tolerance=tolerance,
+            stream=stream,
+        )
+
+        # 在调度线程 (或推理进程的读线程) 内完成结果转换, 调用方拿到的 Future 与 predict() 返回值一致
+        future = ForecastFuture()
+        raw.add_progress_listener(future.set_progress)
+        raw.add_partial_listener(future.set_partial)
+
+        def _finish(done: ForecastFuture):
+            try:
+                pred_df = done.result()
+                if return_distribution:
+                    mean_df, paths = pred_df
+                    future.set_result(ForecastDistribution.from_paths(mean_df, paths))
+                else:
+                    future.set_result(pred_df)
+            except ModelError as e:
+                future.set_exception(e)
+            except Exception as e:
+                error = ModelError(f"模型推理失败: {e}")
+                error.__cause__ = e
+                future.set_exception(error)
+
+        raw.add_done_callback(_finish)
+        return future
 
     def predict(
         self,
@@ -54,43 +309,55 @@ class ModelEngine:
         x_timestamp: pd.Series,
         y_timestamp: pd.Series,
         sampling=None,
-    ) -> pd.DataFrame:
+        return_distribution: bool = False,
+    ) -> Union[pd.DataFrame, ForecastDistribution]:
         """
-        执行价格预测。
+        执行价格预测 (阻塞)。
+        请求经全局调度器排队, 与同一收集窗口内其他会话的兼容请求合并为一次批量推理。
 
         Args:
             x_df: 预处理后的 (488, 6) DataFrame
             x_timestamp: 历史时间戳 Series (488,)
             y_timestamp: 未来时间戳 Series (24,)
-            sampling: SamplingConfig 对象 (可选, 使用默认值)
+            sampling: SamplingConfig 对象 (可选, 使用默认值)。adaptive=True 时自适应采样:
+                分批追加路径, 24h close 估计的标准误低于 tolerance × 当前价即停止, sample_count 为上限
+            return_distribution: 为 True 时返回完整的 ForecastDistribution (路径 + 分位数)
 
         Returns:
-            pred_df: (24, 6) DataFrame [open, high, low, close, volume, amount]
+            pred_df: (24, 6) DataFrame [open, high, low, close, volume, amount], 实际路径数见 pred_df.attrs["sample_count"];
+            return_distribution=True 时为 ForecastDistribution (实际路径数即 sample_count 属性)
 
         Raises:
-            ModelError: 推理过程异常
+            ModelError: 模型加载或推理过程异常
         """
-        predictor = self._load_model()
+        return self.submit(x_df, x_timestamp, y_timestamp, sampling, return_distribution).result()
 
-        # 采样参数
-        temperature = DEFAULT_TEMPERATURE
-        top_p = DEFAULT_TOP_P
-        sample_count = DEFAULT_SAMPLE_COUNT
-        if sampling is not None:
-            temperature = getattr(sampling, "temperature", DEFAULT_TEMPERATURE)
-            top_p = getattr(sampling, "top_p", DEFAULT_TOP_P)
-            sample_count = getattr(sampling, "sample_count", DEFAULT_SAMPLE_COUNT)
+    def predict_stream(
+        self,
+        x_df: pd.DataFrame,
+        x_timestamp: pd.Series,
+        y_timestamp: pd.Series,
+        sampling=None,
+        return_distribution: bool = False,
+    ) -> Iterator[Union[pd.DataFrame, ForecastDistribution]]:
+        """
+        流式预测: 每解码一步产出一次已解码的部分预测, 最后产出与 predict() 相同的完整结果。
 
-        try:
-            pred_df = predictor.predict(
-                df=x_df,
-                x_timestamp=x_timestamp,
-                y_timestamp=y_timestamp,
-                pred_len=OUTPUT_WINDOW,         # 24
-                T=temperature,
-                top_p=top_p,
-                sample_count=sample_count,
-            )
-            return pred_df
-        except Exception as e:
-            raise ModelError(f"模型推理失败: {e}") from e
+        部分预测为前 k 小时的 (k, 6) DataFrame (索引为 y_timestamp 的前 k 个时间), k 逐步增长到 24;
+        最后一项为 predict() 的返回值 (return_distribution=True 时为 ForecastDistribution)。
+        请求同样经全局调度器 (或推理进程) 合批执行。
+
+        Raises:
+            ModelError: 模型加载或推理过程异常 (在迭代到完整结果时抛出)
+        """
+        future = self.submit(x_df, x_timestamp, y_timestamp, sampling, return_distribution, stream=True)
+        updates: "queue.Queue[Optional[pd.DataFrame]]" = queue.Queue()
+        future.add_partial_listener(updates.put)
+        future.add_done_callback(lambda _: updates.put(None))
+
+        while True:
+            pred_df = updates.get()
+            if pred_df is None:
+                break
+            yield pred_df
+        yield future.result()
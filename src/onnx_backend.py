@@ -0,0 +1,293 @@
+"""
+ONNX Runtime 推理后端。
+执行 model/onnx_export.py 导出的 Kronos / Tokenizer 计算图 (CPUExecutionProvider),
+对外接口与 KronosPredictor.predict 一致。整条服务路径只依赖 numpy / pandas / onnxruntime, 不导入 torch。
+"""
+from __future__ import annotations
+
+import json
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from src.exceptions import ModelError
+
+PRICE_COLS = ["open", "high", "low", "close"]
+VOL_COL = "volume"
+AMT_COL = "amount"
+
+
+def calc_time_stamps(x_timestamp: pd.Series) -> pd.DataFrame:
+    """时间特征 (minute, hour, weekday, day, month), 与 model.kronos.calc_time_stamps 相同。"""
+    return pd.DataFrame({
+        "minute": x_timestamp.dt.minute,
+        "hour": x_timestamp.dt.hour,
+        "weekday": x_timestamp.dt.weekday,
+        "day": x_timestamp.dt.day,
+        "month": x_timestamp.dt.month,
+    })
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+def sample_from_logits(
+    logits: np.ndarray,
+    rng: np.random.Generator,
+    temperature: float = 1.0,
+    top_k: int = 0,
+    top_p: float = 1.0,
+) -> np.ndarray:
+    """
+    numpy 版 model.kronos.sample_from_logits: 温度缩放 → top-k 或 nucleus 过滤 → 按概率采样。
+
+    Args:
+        logits: (batch, vocab)
+
+    Returns:
+        (batch,) int64 token id
+    """
+    logits = logits.astype(np.float64) / temperature
+    if top_k > 0:
+        k = min(top_k, logits.shape[-1])
+        kth = np.partition(logits, -k, axis=-1)[:, -k:].min(axis=-1, keepdims=True)
+        logits = np.where(logits < kth, -np.inf, logits)
+    elif top_p < 1.0:
+        order = np.argsort(-logits, axis=-1, kind="stable")
+        cumulative = np.cumsum(_softmax(np.take_along_axis(logits, order, axis=-1)), axis=-1)
+        # 保留累计概率首次超过 top_p 的那个 token
+        remove_sorted = np.zeros_like(cumulative, dtype=bool)
+        remove_sorted[:, 1:] = cumulative[:, :-1] > top_p
+        remove = np.zeros_like(remove_sorted)
+        np.put_along_axis(remove, order, remove_sorted, axis=-1)
+        logits = np.where(remove, -np.inf, logits)
+
+    cdf = np.cumsum(_softmax(logits), axis=-1)
+    u = rng.random((logits.shape[0], 1)) * cdf[:, -1:]
+    return np.minimum((cdf < u).sum(axis=-1), logits.shape[-1] - 1).astype(np.int64)
+
+
+class OnnxKronosPredictor:
+    """
+    基于 onnxruntime 的 Kronos 预测器, 可替代 KronosPredictor 用于 ModelEngine。
+
+    自回归流程与 model.kronos.auto_regressive_inference 相同: 历史只编码与预填充一次,
+    再复制到各采样路径; 每步只把新 token 送入 step 图, KV 缓存作为图的输入/输出在 numpy 中传递。
+    序列超过 max_context 后改为对滑动窗口整体预填充。设置 max_memory_mb 时路径按内存预算分块解码。
+    """
+
+    def __init__(self, model_dir, clip: float = 5, num_threads: Optional[int] = None, seed: Optional[int] = None,
+                 max_memory_mb: Optional[float] = None):
+        """
+        Args:
+            model_dir: 导出目录 (含 manifest.json 与 5 个 .onnx 文件)
+            clip: 标准化后输入的截断范围
+            num_threads: onnxruntime 算子内线程数, None 为默认
+            seed: 采样随机种子
+            max_memory_mb: 单次预测的内存预算 (MB), 路径数超出时分块解码; None 为不限
+
+        Raises:
+            ModelError: 导出目录缺失或 onnxruntime 不可用
+        """
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ModelError("ONNX 后端需要安装 onnxruntime") from e
+
+        model_dir = Path(model_dir)
+        manifest_path = model_dir / "manifest.json"
+        if not manifest_path.exists():
+            raise ModelError(f"未找到 ONNX 导出: {manifest_path} (先运行 python -m model.onnx_export)")
+        self.manifest = json.loads(manifest_path.read_text())
+        self.max_context = self.manifest["max_context"]
+        self.clip = clip
+        self.max_memory_mb = max_memory_mb
+        self.rng = np.random.default_rng(seed)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        self.sessions = {
+            name: ort.InferenceSession(str(model_dir / filename), options, providers=["CPUExecutionProvider"])
+            for name, filename in self.manifest["graphs"].items()
+        }
+
+    def _run(self, graph: str, **inputs: np.ndarray):
+        return self.sessions[graph].run(None, inputs)
+
+    def path_memory_bytes(self, seq_len: int) -> int:
+        """
+        单个序列的一条采样路径占用内存的粗略上界 (字节), 同 model.kronos.path_memory_bytes 的估算口径:
+        解码窗口上的 KV 缓存 (含依赖层), 加上整窗口前向 (滑动窗口预填充 / Tokenizer 解码) 的注意力分数与前馈激活。
+        """
+        m = self.manifest
+        window = min(seq_len, self.max_context)
+        d_model = m["n_heads"] * m["head_dim"]
+        cache = 2 * window * 4 * (d_model * m["n_layers"] + m["dep_n_heads"] * m["dep_head_dim"])
+        activations = 4 * window * (m["n_heads"] * window + 8 * d_model)
+        tokens = seq_len * (2 * 8 + 5 * 4)  # token id 与时间特征
+        return cache + activations + tokens
+
+    def generate(self, x, x_stamp, y_stamp, pred_len, T=1.0, top_k=0, top_p=0.99, sample_count=1, return_paths=False,
+                 progress=None, tolerance=None, path_increment=4, target_index=3):
+        """
+        标准化后的输入 → 标准化空间的预测。
+
+        Args:
+            x: (batch, seq_len, 6) float32, 已标准化并截断
+            x_stamp / y_stamp: (batch, seq_len, 5) / (batch, pred_len, 5) 时间特征
+            progress: 可选回调, 每个解码步后传入已完成比例 (0~1, 相对 sample_count 条路径)
+            tolerance: 自适应采样容差 (标量或每序列一个值, 标准化单位); 每轮追加 path_increment 条路径,
+                直到每个序列第 target_index 个特征 (close) 末步均值的标准误不超过容差, sample_count 为上限
+
+        Returns:
+            (batch, pred_len, 6) 路径均值; return_paths=True 时为 (batch, 实际路径数, pred_len, 6)
+        """
+        s1_ids, s2_ids = self._run("tokenizer_encode", x=x.astype(np.float32))
+        batch_size, history_len = s1_ids.shape
+        chunk_paths = sample_count
+        if self.max_memory_mb is not None:
+            # 每条路径各自携带缓存: 按内存预算分块解码, 峰值内存与 sample_count 无关
+            series_bytes = batch_size * self.path_memory_bytes(history_len + pred_len)
+            chunk_paths = max(1, int(self.max_memory_mb * 2 ** 20 // series_bytes))
+        rounds = []
+
+        def draw(path_count):
+            """追加 path_count 条路径 (按 chunk_paths 分块), 返回累计路径数。"""
+            done = sum(r.shape[1] for r in rounds)
+            end = done + path_count
+            while done < end:
+                count = min(chunk_paths, end - done)
+                step = None
+                if progress is not None:
+                    def step(fraction, first=done, count=count):
+                        progress(min(1.0, (first + count * fraction) / sample_count))
+                rounds.append(self._sample_paths(s1_ids, s2_ids, x_stamp, y_stamp, pred_len, T, top_k, top_p,
+                                                 count, step))
+                done += count
+            return done
+
+        if tolerance is None:
+            draw(sample_count)
+        else:
+            tolerance = np.broadcast_to(np.asarray(tolerance, dtype=np.float64), (x.shape[0],))
+            # 标准误至少需要两条路径
+            increment = max(2, path_increment)
+            drawn = draw(min(increment, sample_count))
+            while drawn < sample_count:
+                last = np.concatenate(rounds, axis=1)[:, :, -1, target_index].astype(np.float64)
+                if np.all(last.std(axis=1, ddof=1) / np.sqrt(drawn) <= tolerance):
+                    break
+                drawn = draw(min(increment, sample_count - drawn))
+            if progress is not None:
+                progress(1.0)
+
+        z = np.concatenate(rounds, axis=1)
+        return z if return_paths else z.mean(axis=1)
+
+    def _sample_paths(self, s1_ids, s2_ids, x_stamp, y_stamp, pred_len, T, top_k, top_p, sample_count, progress):
+        """对已编码的历史采样 sample_count 条路径, 返回 (batch, sample_count, pred_len, 6)。"""
+        batch_size, history_len = s1_ids.shape
+        total_len = history_len + pred_len
+        rows = batch_size * sample_count
+
+        pre = np.zeros((rows, total_len), dtype=np.int64)
+        post = np.zeros((rows, total_len), dtype=np.int64)
+        pre[:, :history_len] = np.repeat(s1_ids, sample_count, axis=0)
+        post[:, :history_len] = np.repeat(s2_ids, sample_count, axis=0)
+        stamp = np.repeat(np.concatenate([x_stamp, y_stamp], axis=1), sample_count, axis=0).astype(np.float32)
+
+        keys = values = None
+        for i in range(pred_len):
+            seq_len = history_len + i
+            if seq_len > self.max_context:
+                # 滑动窗口: 缓存失效, 对整个窗口重新预填充
+                start = seq_len - self.max_context
+                s1_logits, context, _, _, dep_keys, dep_values = self._run(
+                    "kronos_prefill", s1_ids=pre[:, start:seq_len], s2_ids=post[:, start:seq_len],
+                    stamp=stamp[:, start:seq_len],
+                )
+            elif keys is None:
+                # 历史对所有采样路径相同: 每个序列预填充一次后复制
+                outputs = self._run("kronos_prefill", s1_ids=s1_ids, s2_ids=s2_ids,
+                                    stamp=x_stamp.astype(np.float32))
+                s1_logits, context, keys, values, dep_keys, dep_values = (
+                    np.repeat(o, sample_count, axis=1 if j in (2, 3) else 0) for j, o in enumerate(outputs)
+                )
+            else:
+                new = slice(seq_len - 1, seq_len)
+                s1_logits, context, keys, values = self._run(
+                    "kronos_step_s1", s1_ids=pre[:, new], s2_ids=post[:, new], stamp=stamp[:, new],
+                    past_keys=keys, past_values=values,
+                )
+
+            sample_pre = sample_from_logits(s1_logits, self.rng, T, top_k, top_p)
+            s2_logits, dep_keys, dep_values = self._run(
+                "kronos_step_s2", context=context, s1_ids=sample_pre[:, None],
+                dep_past_keys=dep_keys, dep_past_values=dep_values,
+            )
+            sample_post = sample_from_logits(s2_logits, self.rng, T, top_k, top_p)
+            pre[:, seq_len] = sample_pre
+            post[:, seq_len] = sample_post
+            if progress is not None:
+                progress((i + 1) / pred_len)
+
+        start = max(0, total_len - self.max_context)
+        (z,) = self._run("tokenizer_decode", s1_ids=pre[:, start:], s2_ids=post[:, start:])
+        return z[:, -pred_len:].reshape(batch_size, sample_count, pred_len, -1)
+
+    def predict(self, df, x_timestamp, y_timestamp, pred_len, T=1.0, top_k=0, top_p=0.9, sample_count=1,
+                verbose=False, return_paths=False, progress=None, partial=None, tolerance=None, path_increment=4):
+        """
+        单序列预测, 参数与返回值同 KronosPredictor.predict
+        (verbose 仅为兼容保留; 导出图没有逐步解码的 Tokenizer 缓存, partial 只在完成时收到一次完整预测)。
+
+        tolerance 为相对最后收盘价的容差 (如 0.005 = 0.5%): 每轮追加 path_increment 条路径,
+        直到 24h close 均值的标准误不超过容差或达到 sample_count 条。
+
+        Returns:
+            pred_df: (pred_len, 6) 路径均值 DataFrame, 索引为 y_timestamp, 实际路径数记录在 pred_df.attrs['sample_count'];
+            return_paths=True 时为 (pred_df, paths), paths 形状 (实际路径数, pred_len, 6)
+        """
+        if not isinstance(df, pd.DataFrame):
+            raise ValueError("Input must be a pandas DataFrame.")
+        if not all(col in df.columns for col in PRICE_COLS):
+            raise ValueError(f"Price columns {PRICE_COLS} not found in DataFrame.")
+
+        df = df.copy()
+        if VOL_COL not in df.columns:
+            df[VOL_COL] = 0.0
+            df[AMT_COL] = 0.0
+        if AMT_COL not in df.columns:
+            df[AMT_COL] = df[VOL_COL] * df[PRICE_COLS].mean(axis=1)
+        columns = PRICE_COLS + [VOL_COL, AMT_COL]
+        if df[columns].isnull().values.any():
+            raise ValueError("Input DataFrame contains NaN values in price or volume columns.")
+
+        x = df[columns].values.astype(np.float32)
+        x_mean, x_std = np.mean(x, axis=0), np.std(x, axis=0)
+        close_idx = PRICE_COLS.index("close")
+        if tolerance is not None:
+            # 相对容差 → 标准化单位, 与 KronosPredictor._normalised_tolerance 相同
+            tolerance = tolerance * abs(float(x[-1, close_idx])) / (x_std[close_idx] + 1e-5)
+        x = np.clip((x - x_mean) / (x_std + 1e-5), -self.clip, self.clip)
+        x_stamp = calc_time_stamps(x_timestamp).values.astype(np.float32)
+        y_stamp = calc_time_stamps(y_timestamp).values.astype(np.float32)
+
+        preds = self.generate(x[np.newaxis], x_stamp[np.newaxis], y_stamp[np.newaxis], pred_len,
+                              T, top_k, top_p, sample_count, return_paths=True, progress=progress,
+                              tolerance=tolerance, path_increment=path_increment, target_index=close_idx)
+        paths = preds.squeeze(0) * (x_std + 1e-5) + x_mean
+
+        pred_df = pd.DataFrame(paths.mean(axis=0), columns=columns, index=y_timestamp)
+        pred_df.attrs["sample_count"] = paths.shape[0]
+        if partial is not None:
+            partial(pred_df)
+        if return_paths:
+            return pred_df, paths
+        return pred_df
@@ -0,0 +1,262 @@
+"""
+交易所请求调度 — 进程级令牌桶限频、抖动指数退避与熔断。
+
+同一进程内的所有 DataFeed / AsyncDataFeed (同步线程与事件循环均可) 共用 shared_scheduler():
+  - 令牌桶按交易所请求权重计量, 容量与每分钟补充量为 RATE_LIMIT_WEIGHT;
+  - 等待令牌的请求按优先级排队, 交互式拉取 (Priority.INTERACTIVE) 先于后台刷新 / 历史回补;
+  - 重试间隔为 full-jitter 指数退避, 避免多个请求同时重试;
+  - 连续 BREAKER_FAILURES 次请求最终失败 (DataFeedError) 后熔断, BREAKER_COOLDOWN 秒内直接报错,
+    冷却结束后放行一次试探请求, 成功即恢复。
+metrics() 返回排队深度与等待时间统计。
+"""
+import asyncio
+import heapq
+import itertools
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Callable, Deque, Dict, List, Optional
+
+import numpy as np
+
+from src.config import (
+    BREAKER_COOLDOWN,
+    BREAKER_FAILURES,
+    RATE_LIMIT_WEIGHT,
+    RETRY_BASE_DELAY,
+)
+from src.exceptions import DataFeedError
+
+
+class Priority(IntEnum):
+    """请求优先级, 数值越小越先获得令牌。"""
+
+    INTERACTIVE = 0  # 用户点击触发的拉取
+    BACKGROUND = 1   # 后台刷新、历史回补
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    seq: int
+    weight: float = field(compare=False)
+    enqueued_at: float = field(compare=False)
+    wake: Callable[[], None] = field(compare=False, default=None)
+
+
+class RequestScheduler:
+    """
+    令牌桶限频 + 优先级排队 + 熔断 (线程安全, 同步与协程接口共用同一个令牌桶)。
+
+    令牌只发给队首 (优先级最高、最早排队) 的请求; 队首令牌不足时按补充速率计算等待时间,
+    获得令牌后唤醒新的队首。
+    """
+
+    def __init__(
+        self,
+        weight_per_minute: float = RATE_LIMIT_WEIGHT,
+        failure_threshold: int = BREAKER_FAILURES,
+        cooldown: float = BREAKER_COOLDOWN,
+        base_delay: float = RETRY_BASE_DELAY,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            weight_per_minute: 令牌桶容量, 也是每分钟补充的权重
+            failure_threshold: 连续失败多少次后熔断
+            cooldown: 熔断持续时间 (秒)
+            base_delay: 重试退避的基础延迟 (秒)
+            clock: 单调时钟 (测试可替换)
+        """
+        self.capacity = float(weight_per_minute)
+        self.rate = self.capacity / 60.0
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.base_delay = base_delay
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._tokens = self.capacity
+        self._refilled_at = clock()
+        self._queue: List[_Waiter] = []
+        self._seq = itertools.count()
+        self._waits: Dict[int, Deque[float]] = {p: deque(maxlen=1000) for p in Priority}  # 最近的等待时间 (秒)
+        self._granted = {p: 0 for p in Priority}
+        self._failures = 0
+        self._open_until: Optional[float] = None
+        self._trial_in_flight = False
+        self.rejected = 0  # 熔断期间直接拒绝的请求数
+
+    # ──────────── 令牌桶 ────────────
+
+    def acquire(self, weight: float = 1, priority: Priority = Priority.INTERACTIVE) -> float:
+        """阻塞直到获得 weight 个令牌, 返回排队等待的秒数。"""
+        event = threading.Event()
+        waiter = self._enqueue(weight, priority, event.set)
+        granted = False
+        try:
+            while True:
+                event.clear()
+                delay = self._try_grant(waiter)
+                if delay == 0:
+                    granted = True
+                    return self.clock() - waiter.enqueued_at
+                event.wait(delay)
+        finally:
+            if not granted:
+                self._dequeue(waiter)
+
+    async def aacquire(self, weight: float = 1, priority: Priority = Priority.INTERACTIVE) -> float:
+        """acquire 的协程版本: 等待期间不阻塞事件循环。"""
+        loop = asyncio.get_running_loop()
+        event = asyncio.Event()
+        waiter = self._enqueue(weight, priority, lambda: loop.call_soon_threadsafe(event.set))
+        granted = False
+        try:
+            while True:
+                event.clear()
+                delay = self._try_grant(waiter)
+                if delay == 0:
+                    granted = True
+                    return self.clock() - waiter.enqueued_at
+                try:
+                    await asyncio.wait_for(event.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            if not granted:
+                self._dequeue(waiter)
+
+    def _enqueue(self, weight: float, priority: Priority, wake: Callable[[], None]) -> _Waiter:
+        waiter = _Waiter(int(priority), next(self._seq), min(float(weight), self.capacity), self.clock(), wake)
+        with self._lock:
+            heapq.heappush(self._queue, waiter)
+        return waiter
+
+    def _dequeue(self, waiter: _Waiter):
+        """放弃排队 (线程中断 / 协程取消), 唤醒新的队首。"""
+        with self._lock:
+            if waiter in self._queue:
+                self._queue.remove(waiter)
+                heapq.heapify(self._queue)
+                self._wake_head()
+
+    def _try_grant(self, waiter: _Waiter) -> Optional[float]:
+        """
+        尝试为 waiter 发放令牌。
+
+        Returns:
+            0 — 已获得令牌; 正数 — 位于队首, 需等待令牌补充的秒数; None — 不在队首, 等待被唤醒
+        """
+        with self._lock:
+            now = self.clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._refilled_at) * self.rate)
+            self._refilled_at = now
+            if self._queue[0] is not waiter:
+                return None
+            if self._tokens < waiter.weight:
+                return max((waiter.weight - self._tokens) / self.rate, 1e-3)
+            self._tokens -= waiter.weight
+            heapq.heappop(self._queue)
+            priority = Priority(waiter.priority)
+            self._granted[priority] += 1
+            self._waits[priority].append(now - waiter.enqueued_at)
+            self._wake_head()
+            return 0
+
+    def _wake_head(self):
+        if self._queue:
+            self._queue[0].wake()
+
+    # ──────────── 重试与熔断 ────────────
+
+    def backoff(self, attempt: int) -> float:
+        """第 attempt 次 (从 0 计) 失败后的重试等待: [0, base_delay × 2^attempt) 内均匀抖动。"""
+        return random.uniform(0, self.base_delay * 2**attempt)
+
+    def check(self, symbol: str = ""):
+        """
+        请求前检查熔断状态。
+
+        Raises:
+            DataFeedError: 熔断中 (冷却期内, 或冷却结束后已有一个试探请求在途)
+        """
+        with self._lock:
+            if self._open_until is None:
+                return
+            remaining = self._open_until - self.clock()
+            if remaining <= 0 and not self._trial_in_flight:
+                self._trial_in_flight = True  # 半开: 放行一个试探请求
+                return
+            self.rejected += 1
+        wait = f", 约 {remaining:.0f}s 后重试" if remaining > 0 else ", 正在试探恢复"
+        raise DataFeedError(f"交易所连续请求失败, 已暂停数据拉取{wait} ({symbol})")
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self._open_until = None
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        """记录一次最终失败 (重试耗尽); 连续失败达到阈值或试探失败时 (重新) 熔断。"""
+        with self._lock:
+            self._failures += 1
+            if self._trial_in_flight or self._failures >= self.failure_threshold:
+                self._open_until = self.clock() + self.cooldown
+            self._trial_in_flight = False
+
+    @property
+    def circuit_open(self) -> bool:
+        with self._lock:
+            return self._open_until is not None
+
+    # ──────────── 指标 ────────────
+
+    def metrics(self) -> dict:
+        """
+        调度指标快照。
+
+        Returns:
+            queue_depth: 当前排队请求数; queue_by_priority: 按优先级的排队数;
+            tokens: 当前可用令牌; circuit_open / rejected: 熔断状态与熔断期间拒绝的请求数;
+            wait: {优先级名: {granted, mean_ms, p95_ms, max_ms}} (最近 1000 次的等待时间)
+        """
+        with self._lock:
+            depth = {p.name: 0 for p in Priority}
+            for waiter in self._queue:
+                depth[Priority(waiter.priority).name] += 1
+            waits = {p: np.array(self._waits[p]) for p in Priority}
+            granted = dict(self._granted)
+            snapshot = dict(
+                queue_depth=len(self._queue),
+                queue_by_priority=depth,
+                tokens=self._tokens,
+                circuit_open=self._open_until is not None,
+                rejected=self.rejected,
+            )
+        snapshot["wait"] = {
+            p.name: dict(
+                granted=granted[p],
+                mean_ms=float(waits[p].mean() * 1000) if len(waits[p]) else 0.0,
+                p95_ms=float(np.percentile(waits[p], 95) * 1000) if len(waits[p]) else 0.0,
+                max_ms=float(waits[p].max() * 1000) if len(waits[p]) else 0.0,
+            )
+            for p in Priority
+        }
+        return snapshot
+
+
+_shared: Optional[RequestScheduler] = None
+_shared_lock = threading.Lock()
+
+
+def shared_scheduler() -> RequestScheduler:
+    """进程内共用的请求调度器 (首次调用时创建)。"""
+    global _shared
+    with _shared_lock:
+        if _shared is None:
+            _shared = RequestScheduler()
+        return _shared
@@ -10,6 +10,7 @@ from typing import Optional
 import pandas as pd
 
 from src.config import (
+    ADAPTIVE_TOLERANCE,
     DEFAULT_SAMPLE_COUNT,
     DEFAULT_STOP_LOSS,
     DEFAULT_SYMBOL,
@@ -29,6 +30,8 @@ class SamplingConfig:
     temperature: float = DEFAULT_TEMPERATURE
     top_p: float = DEFAULT_TOP_P
     sample_count: int = DEFAULT_SAMPLE_COUNT
+    adaptive: bool = False                  # 自适应采样: sample_count 作为路径上限, 收敛后提前停止
+    tolerance: float = ADAPTIVE_TOLERANCE   # 自适应采样的标准误容差 (相对当前价)
 
 
 @dataclass
@@ -51,6 +54,8 @@ class SignalResult:
     signal: str            # "Bullish" | "Bearish" | "Neutral"
     signal_emoji: str      # "🟢" | "🔴" | "🟡"
     stop_loss_price: Optional[float]
+    prob_bullish: Optional[float] = None   # 多路径预测中终点收益 > +阈值 的概率
+    prob_bearish: Optional[float] = None   # 多路径预测中终点收益 < -阈值 的概率
 
 
 # ──────────── 策略引擎 ────────────
@@ -64,6 +69,7 @@ class StrategyEngine:
         current_price: float,
         pred_df: pd.DataFrame,
         config: UserConfig,
+        distribution=None,
     ) -> SignalResult:
         """
         策略分析主逻辑。
@@ -72,6 +78,7 @@ class StrategyEngine:
             current_price: 历史数据最后一行的 close 价格
             pred_df: 模型输出的 24 行预测 DataFrame
             config: 用户配置 (含 threshold, stop_loss_pct)
+            distribution: 可选的 ForecastDistribution, 提供时附带信号概率
 
         Returns:
             SignalResult: 完整的信号分析结果
@@ -105,6 +112,13 @@ class StrategyEngine:
         else:
             stop_loss_price = None
 
+        # Step 5: 信号概率 (仅多路径预测)
+        prob_bullish = prob_bearish = None
+        if distribution is not None:
+            prob_bullish, prob_bearish = distribution.signal_probabilities(
+                current_price, config.threshold
+            )
+
         return SignalResult(
             current_price=current_price,
             predicted_price=predicted_price,
@@ -112,4 +126,6 @@ class StrategyEngine:
             signal=signal,
             signal_emoji=signal_emoji,
             stop_loss_price=stop_loss_price,
+            prob_bullish=prob_bullish,
+            prob_bearish=prob_bearish,
         )
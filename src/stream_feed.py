@@ -0,0 +1,297 @@
+"""
+实时 K 线推送数据源。
+StreamingDataFeed 经 websocket 订阅交易对的 K 线推送, 在内存环形缓冲区中常驻最近 INPUT_WINDOW 根 K 线;
+fetch_ohlcv() 直接返回缓冲区中的窗口, 点击预测时无需等待网络。未订阅、尚未就绪或断流时回退 REST (AsyncDataFeed)。
+
+推送来源可替换: 任何提供 `stream(symbol, timeframe)` 异步迭代器 (逐条产出 ccxt 格式 K 线) 的对象均可,
+默认为 Binance websocket; 测试中将 BinanceKlineSource 指向本地回放服务器。
+"""
+import asyncio
+import contextlib
+import json
+import threading
+import time
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from src.async_feed import AsyncDataFeed
+from src.cache_manager import CacheManager
+from src.config import (
+    FETCH_CONCURRENCY,
+    FETCH_LIMIT,
+    INPUT_WINDOW,
+    OHLCV_COLUMNS,
+    STREAM_MAX_SYMBOLS,
+    STREAM_STALE_SECONDS,
+    STREAM_WS_URL,
+    TIMEFRAME,
+)
+from src.data_feed import timeframe_ms
+from src.exceptions import DataFeedError
+from src.lazy_import import lazy_module
+from src.rate_limiter import Priority, RequestScheduler
+
+ccxt = lazy_module("ccxt")
+websockets = lazy_module("websockets")  # 首次订阅时才导入
+
+
+class BinanceKlineSource:
+    """Binance 现货 K 线推送 (单流: <base_url>/<symbol>@kline_<interval>)。"""
+
+    def __init__(self, base_url: str = STREAM_WS_URL):
+        self.base_url = base_url.rstrip("/")
+
+    @staticmethod
+    def stream_name(symbol: str, timeframe: str) -> str:
+        """"BTC/USDT", "1h" → "btcusdt@kline_1h"。"""
+        return f"{symbol.replace('/', '').lower()}@kline_{timeframe}"
+
+    async def stream(self, symbol: str, timeframe: str) -> AsyncIterator[list]:
+        """连接并逐条产出 K 线 [timestamp, open, high, low, close, volume]; 连接断开时结束或抛出异常。"""
+        url = f"{self.base_url}/{self.stream_name(symbol, timeframe)}"
+        async with websockets.connect(url, open_timeout=10) as ws:
+            async for raw in ws:
+                kline = json.loads(raw).get("k")
+                if kline is None:
+                    continue
+                yield [int(kline["t"]), float(kline["o"]), float(kline["h"]), float(kline["l"]),
+                       float(kline["c"]), float(kline["v"])]
+
+
+class CandleRing:
+    """
+    最近 maxlen 根 K 线的环形缓冲区 (线程安全: 事件循环线程写入, 脚本线程读取)。
+
+    同一时间戳的推送覆盖该根 (未收盘 K 线的更新), 下一周期的推送追加; 跳过一根以上视为缺口, 由调用方重新同步。
+    """
+
+    def __init__(self, period_ms: int, maxlen: int = INPUT_WINDOW):
+        self.period_ms = period_ms
+        self._candles: deque = deque(maxlen=maxlen)
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._candles)
+
+    def reset(self, rows: Iterable):
+        """以 REST 拉取的 K 线 (升序, 每行 timestamp, open, high, low, close, volume) 重建缓冲区。"""
+        candles = [[int(row[0]), *map(float, row[1:])] for row in rows]
+        with self._lock:
+            self._candles.clear()
+            self._candles.extend(candles)
+
+    def apply(self, candle: list) -> bool:
+        """应用一条推送, 出现缺口时返回 False (缓冲区不变)。"""
+        with self._lock:
+            if not self._candles:
+                self._candles.append(candle)
+                return True
+            last_ts = self._candles[-1][0]
+            if candle[0] == last_ts:
+                self._candles[-1] = candle
+            elif candle[0] == last_ts + self.period_ms:
+                self._candles.append(candle)
+            elif candle[0] > last_ts:
+                return False
+            # 早于最后一根的迟到推送直接忽略
+            return True
+
+    def frame(self) -> pd.DataFrame:
+        with self._lock:
+            rows = list(self._candles)
+        return pd.DataFrame(rows, columns=OHLCV_COLUMNS)
+
+
+@dataclass
+class Subscription:
+    """一个 (交易对, 周期) 的订阅状态。"""
+
+    symbol: str
+    timeframe: str
+    ring: CandleRing
+    task: Optional[asyncio.Task] = None
+    connected: bool = False
+    updated_at: float = 0.0          # 最近一次收到推送的时间 (time.time())
+    resyncs: int = 0                 # 以 REST 重新同步的次数 (首次填充 + 缺口 / 重连)
+    error: Optional[str] = None
+    failed: bool = False             # 交易对无效, 订阅任务已结束且不再重试
+    _ready: threading.Event = field(default_factory=threading.Event)
+
+    @property
+    def live(self) -> bool:
+        """已填充、连接正常且推送未中断。"""
+        return (
+            self.connected and len(self.ring) > 0
+            and time.time() - self.updated_at <= STREAM_STALE_SECONDS
+        )
+
+
+class StreamingDataFeed(AsyncDataFeed):
+    """
+    websocket K 线推送 + 内存窗口的数据采集引擎 (接口同 DataFeed)。
+
+    每个订阅在事件循环上运行一个任务: 先以 REST (后台优先级, 经增量缓存) 填充缓冲区, 再连接推送逐条更新;
+    出现缺口或断线时按抖动退避重新同步。fetch_ohlcv() 会自动订阅所请求的交易对。
+    """
+
+    def __init__(
+        self,
+        cache_manager: CacheManager | None = None,
+        exchange=None,
+        concurrency: int = FETCH_CONCURRENCY,
+        scheduler: RequestScheduler | None = None,
+        source=None,
+        window: int = INPUT_WINDOW,
+        max_symbols: int = STREAM_MAX_SYMBOLS,
+    ):
+        """
+        Args:
+            cache_manager / exchange / concurrency / scheduler: 同 AsyncDataFeed (REST 填充与回退)
+            source: K 线推送来源, 默认 BinanceKlineSource()
+            window: 每个交易对常驻内存的 K 线根数
+            max_symbols: 同时订阅的交易对上限, 超出时退订最久未使用的
+        """
+        super().__init__(cache_manager, exchange, concurrency, scheduler)
+        self.source = source or BinanceKlineSource()
+        self.window = window
+        self.max_symbols = max_symbols
+        self._subscriptions: "OrderedDict[Tuple[str, str], Subscription]" = OrderedDict()
+        self._subscriptions_lock = threading.Lock()
+
+    # ──────────── 订阅管理 ────────────
+
+    def subscribe(self, symbols: Iterable[str], timeframe: str = TIMEFRAME) -> List[Subscription]:
+        """订阅 (已订阅的只刷新使用时间), 立即返回; 缓冲区在后台填充。"""
+        subscriptions, evicted = [], []
+        with self._subscriptions_lock:
+            for symbol in symbols:
+                key = (symbol, timeframe)
+                subscription = self._subscriptions.get(key)
+                if subscription is None:
+                    subscription = Subscription(symbol, timeframe, CandleRing(timeframe_ms(timeframe), self.window))
+                    self._subscriptions[key] = subscription
+                    self._loop.call_soon_threadsafe(self._start, subscription)
+                self._subscriptions.move_to_end(key)
+                subscriptions.append(subscription)
+            while len(self._subscriptions) > self.max_symbols:
+                evicted.append(self._subscriptions.popitem(last=False)[1])
+        for subscription in evicted:
+            self._cancel(subscription)
+        return subscriptions
+
+    def unsubscribe(self, symbol: str, timeframe: str = TIMEFRAME):
+        with self._subscriptions_lock:
+            subscription = self._subscriptions.pop((symbol, timeframe), None)
+        if subscription is not None:
+            self._cancel(subscription)
+
+    def wait_ready(self, symbol: str, timeframe: str = TIMEFRAME, timeout: float = None) -> bool:
+        """阻塞直到该订阅首次完成 REST 填充并连上推送 (测试与预热用); 交易对无效时立即返回 False。"""
+        with self._subscriptions_lock:
+            subscription = self._subscriptions.get((symbol, timeframe))
+        return subscription is not None and subscription._ready.wait(timeout) and not subscription.failed
+
+    def status(self) -> Dict[str, dict]:
+        """各订阅的状态: live / connected / candles / lag_seconds / resyncs / error / failed。"""
+        with self._subscriptions_lock:
+            subscriptions = list(self._subscriptions.values())
+        now = time.time()
+        return {
+            f"{s.symbol}_{s.timeframe}": dict(
+                live=s.live, connected=s.connected, candles=len(s.ring),
+                lag_seconds=now - s.updated_at if s.updated_at else None, resyncs=s.resyncs, error=s.error,
+                failed=s.failed,
+            )
+            for s in subscriptions
+        }
+
+    # ──────────── 数据读取 ────────────
+
+    def latest_window(self, symbol: str, timeframe: str = TIMEFRAME) -> Optional[pd.DataFrame]:
+        """推送正常时返回内存中的最近 window 根 K 线 (原始 OHLCV DataFrame), 否则返回 None。"""
+        with self._subscriptions_lock:
+            subscription = self._subscriptions.get((symbol, timeframe))
+        if subscription is None or not subscription.live:
+            return None
+        return subscription.ring.frame()
+
+    def fetch_ohlcv(
+        self, symbol: str, timeframe: str = TIMEFRAME, limit: int = FETCH_LIMIT,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> pd.DataFrame:
+        """
+        优先返回内存窗口 (至多 window 根, 即使 limit 更大); 未就绪时经 REST 拉取。
+        请求的交易对会被自动订阅, 之后的调用即可命中内存。
+        """
+        self.subscribe([symbol], timeframe)
+        df = self.latest_window(symbol, timeframe)
+        if df is not None and len(df) >= min(limit, self.window):
+            return df.tail(limit).reset_index(drop=True)
+        return super().fetch_ohlcv(symbol, timeframe, limit, priority)
+
+    def close(self, timeout: float = 5.0):
+        """退订全部交易对, 关闭推送连接与 REST 客户端。"""
+        with self._subscriptions_lock:
+            subscriptions = list(self._subscriptions.values())
+            self._subscriptions.clear()
+        for subscription in subscriptions:
+            self._cancel(subscription, timeout)
+        super().close(timeout)
+
+    # ──────────── 内部实现 (事件循环线程) ────────────
+
+    def _start(self, subscription: Subscription):
+        with self._subscriptions_lock:
+            if self._subscriptions.get((subscription.symbol, subscription.timeframe)) is not subscription:
+                return  # 启动前已被退订
+        subscription.task = self._loop.create_task(self._run(subscription))
+
+    def _cancel(self, subscription: Subscription, timeout: float = 5.0):
+        if self._loop.is_closed():
+            return
+
+        async def cancel():
+            if subscription.task is not None:
+                subscription.task.cancel()
+                await asyncio.gather(subscription.task, return_exceptions=True)
+
+        try:
+            asyncio.run_coroutine_threadsafe(cancel(), self._loop).result(timeout)
+        except Exception:
+            pass
+
+    async def _run(self, subscription: Subscription):
+        """订阅主循环: REST 填充 → 消费推送; 缺口或断线后退避并重新同步, 交易对无效时结束 (不再重试)。"""
+        attempt = 0
+        symbol, timeframe = subscription.symbol, subscription.timeframe
+        while True:
+            try:
+                seeded = await self.afetch_ohlcv(symbol, timeframe, FETCH_LIMIT, Priority.BACKGROUND)
+                subscription.ring.reset(seeded.itertuples(index=False))
+                subscription.resyncs += 1
+                async with contextlib.aclosing(self.source.stream(symbol, timeframe)) as stream:
+                    async for candle in stream:
+                        if not subscription.ring.apply(candle):
+                            break  # 缺口: 关闭连接, 重新以 REST 同步
+                        subscription.connected, subscription.error = True, None
+                        subscription.updated_at = time.time()
+                        subscription._ready.set()
+                        attempt = 0
+            except asyncio.CancelledError:
+                subscription.connected = False
+                raise
+            except DataFeedError as e:
+                subscription.error = f"{type(e).__name__}: {e}"
+                if isinstance(e.__cause__, ccxt.BadSymbol):
+                    # 重试不会成功, 且每次都消耗请求配额; fetch_ohlcv 回退 REST 时照常报错
+                    subscription.connected, subscription.failed = False, True
+                    subscription._ready.set()  # 唤醒 wait_ready
+                    return
+            except Exception as e:
+                subscription.error = f"{type(e).__name__}: {e}"
+            subscription.connected = False
+            await asyncio.sleep(self.scheduler.backoff(attempt))
+            attempt = min(attempt + 1, 5)
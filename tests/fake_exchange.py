@@ -0,0 +1,86 @@
+"""
+本地模拟交易所 — 测试与基准脚本用, 不发起网络请求。
+
+实现 ccxt 的 fetch_ohlcv(symbol, timeframe, since, limit) 语义:
+  - 行情由 (交易对, 时间戳) 确定性生成, 同一根已收盘 K 线每次返回相同数值;
+  - 最新一根 K 线尚未收盘, 其 close / high / low / volume 随当前时间变化;
+  - since 为 None 时返回最近 limit 根, 否则返回 since 起 (含) 的至多 limit 根。
+每次调用记录在 calls 中, 便于断言请求次数与返回行数; since 属于 fail_since 的请求抛出 ccxt.NetworkError (模拟中断)。
+AsyncFakeExchange 是 ccxt.async_support 风格的版本, 可模拟网络延迟并记录同时在途的请求数。
+"""
+import asyncio
+import time
+from typing import Callable, Dict, List, Optional
+
+import ccxt
+
+from src.data_feed import timeframe_ms
+
+
+class FakeExchange:
+    """确定性行情的 ccxt 兼容交易所。"""
+
+    def __init__(self, symbols=("BTC/USDT", "ETH/USDT"), clock: Callable[[], float] = None):
+        """
+        Args:
+            symbols: 可用的交易对, 其余交易对抛出 ccxt.BadSymbol
+            clock: 返回当前时间 (秒) 的函数, 默认 time.time (测试中 patch time.time 即可控制)
+        """
+        self.symbols = set(symbols)
+        self.clock = clock or (lambda: time.time())
+        self.calls: List[Dict] = []  # 每次请求: symbol / timeframe / since / limit / rows
+        self.fail_since = set()  # 这些 since 的请求失败
+
+    def candle(self, symbol: str, ts: int, period_ms: int, now_ms: int) -> list:
+        """时间戳 ts 处的 K 线; ts 所在周期尚未结束时按已过去的比例生成未收盘数值。"""
+        base = 100.0 + (sum(map(ord, symbol)) % 50) * 10
+        step = ts // period_ms
+        open_ = base + (step % 97) * 0.5
+        elapsed = min(1.0, (now_ms - ts) / period_ms)
+        close = open_ + ((step * 7919) % 13 - 6) * 0.1 * elapsed
+        high = max(open_, close) + 0.2 * elapsed
+        low = min(open_, close) - 0.2 * elapsed
+        volume = (10.0 + step % 11) * elapsed
+        return [ts, open_, high, low, close, volume]
+
+    def fetch_ohlcv(self, symbol: str, timeframe: str = "1h", since: Optional[int] = None, limit: int = 500):
+        if symbol not in self.symbols:
+            raise ccxt.BadSymbol(f"binance does not have market symbol {symbol}")
+        if since is not None and since in self.fail_since:
+            raise ccxt.NetworkError(f"simulated network error (since={since})")
+        period_ms = timeframe_ms(timeframe)
+        now_ms = int(self.clock() * 1000)
+        current = now_ms // period_ms * period_ms  # 未收盘 K 线的开盘时间
+        if since is None:
+            start = current - (limit - 1) * period_ms
+        else:
+            start = -(-since // period_ms) * period_ms  # 向上取整到 K 线边界
+        rows = [
+            self.candle(symbol, ts, period_ms, now_ms)
+            for ts in range(start, min(current, start + (limit - 1) * period_ms) + 1, period_ms)
+        ]
+        self.calls.append(dict(symbol=symbol, timeframe=timeframe, since=since, limit=limit, rows=len(rows)))
+        return rows
+
+
+class AsyncFakeExchange(FakeExchange):
+    """异步版本: fetch_ohlcv 为协程, 每次请求等待 latency 秒。"""
+
+    def __init__(self, symbols=("BTC/USDT", "ETH/USDT"), clock: Callable[[], float] = None, latency: float = 0.0):
+        super().__init__(symbols, clock)
+        self.latency = latency
+        self.in_flight = 0
+        self.max_in_flight = 0  # 观察到的最大并发请求数
+        self.closed = False
+
+    async def fetch_ohlcv(self, symbol: str, timeframe: str = "1h", since: Optional[int] = None, limit: int = 500):
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.latency)
+            return super().fetch_ohlcv(symbol, timeframe, since, limit)
+        finally:
+            self.in_flight -= 1
+
+    async def close(self):
+        self.closed = True
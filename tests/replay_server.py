@@ -0,0 +1,74 @@
+"""
+本地 K 线推送回放服务器 — 测试与基准脚本用, 不访问网络。
+
+以 Binance 单流格式 (路径 /<symbol>@kline_<interval>, 消息 {"e": "kline", "s": ..., "k": {...}}) 推送预先给定的 K 线,
+配合 BinanceKlineSource(base_url=server.url) 即可在本地走通完整的 websocket 链路。
+服务器运行在自有的事件循环线程上; 待回放的 K 线按流依次发出 (已发出的重连后不再重发), 发完后连接保持空闲。
+"""
+import asyncio
+import json
+import threading
+from typing import Dict, List
+
+from websockets.asyncio.server import serve
+
+
+class KlineReplayServer:
+    """按流名回放 K 线的 websocket 服务器。"""
+
+    def __init__(self, interval: float = 0.01):
+        """
+        Args:
+            interval: 相邻两条消息的间隔 (秒)
+        """
+        self.interval = interval
+        self.scripts: Dict[str, List[list]] = {}  # 流名 → 待回放的 K 线 [timestamp, o, h, l, c, v]
+        self.connections: Dict[str, int] = {}  # 流名 → 累计连接次数
+        self.url = None
+        self._loop = asyncio.new_event_loop()
+        self._server = None
+        self._thread = threading.Thread(target=self._loop.run_forever, name="kline-replay", daemon=True)
+
+    def start(self) -> "KlineReplayServer":
+        self._thread.start()
+        async def listen():
+            return await serve(self._handle, "127.0.0.1", 0)
+
+        self._server = asyncio.run_coroutine_threadsafe(listen(), self._loop).result(5)
+        port = self._server.sockets[0].getsockname()[1]
+        self.url = f"ws://127.0.0.1:{port}"
+        return self
+
+    def push(self, stream: str, candles: List[list]):
+        """追加待回放的 K 线 (流尚未连接时在连接后发送)。"""
+        self.scripts.setdefault(stream, []).extend(candles)
+
+    def close(self):
+        async def shutdown():
+            self._server.close()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+
+    async def _handle(self, ws):
+        stream = ws.request.path.strip("/")
+        self.connections[stream] = self.connections.get(stream, 0) + 1
+        symbol, interval = stream.split("@kline_")
+        while True:
+            script = self.scripts.get(stream, [])
+            if not script:
+                try:
+                    await asyncio.wait_for(ws.wait_closed(), self.interval)
+                    return  # 客户端断开或服务器关闭
+                except asyncio.TimeoutError:
+                    continue
+            ts, o, h, low, c, v = script.pop(0)
+            message = {
+                "e": "kline", "s": symbol.upper(),
+                "k": {"t": ts, "i": interval, "o": str(o), "h": str(h), "l": str(low), "c": str(c), "v": str(v),
+                      "x": False},
+            }
+            await ws.send(json.dumps(message))
+            await asyncio.sleep(self.interval)
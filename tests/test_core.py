@@ -8,14 +8,46 @@ Crypto-Pilot Phase 3 — 核心测试套件。
   Test 1: DataFeed 数据清洗 — 列名小写化 + amount 计算
   Test 2: StrategyEngine 信号判定 — 5% 涨幅 + 2% 阈值 → Bullish
   Test 3: ModelEngine 数据切片 — 500→488 输入切片 + 24 输出
+  Test 4: Kronos KV-cache 增量解码 — 与全窗口重算结果一致
+  Test 5: Kronos 单位置 step 模式 — 与全序列 logits 最后一行一致
+  Test 6: 共享 RoPE 表 — 全模型共用一张预计算表, 解码过程中不重建
+  Test 7: Tokenizer 尾部增量解码 — 与全窗口解码的尾部一致
+  Test 8: 多路径预测分布 — 路径/分位数/信号概率来自同一次推理
+  Test 9: int8 动态量化 — 仅量化目标 Linear 层, 量化后仍可推理
+  Test 10: bf16 推理 — 权重转 bf16, 采样与输出保持 fp32; 不支持时回退 fp32
+  Test 11: 编译解码步 — 编译失败时回退 eager, 推理结果与未编译一致
+  Test 12: ONNX 后端 — 服务路径不导入 torch; 导出图的贪心预测与 PyTorch 一致; 支持自适应采样与按内存预算分块解码
+  Test 13: 批处理调度器 — 收集窗口内的兼容请求合并为一次 predict_batch, 按请求返回 Future; 单条请求失败 (含合批失败后逐条重跑) 不影响其余请求
+  Test 14: 不等长历史批处理 — 左填充 + padding mask 的结果与逐条单独推理一致
+  Test 15: 逐行采样参数 — 每个序列使用各自的温度 / top_p, 一次批量解码完成
+  Test 16: 候选集采样器 — 与全排序 nucleus 逐次一致; 按行种子的预测可复现且与批次组成无关
+  Test 17: 自适应采样 — 24h close 标准误达到容差即停止追加路径, 报告实际路径数
+  Test 18: 分块路径执行 — 按内存预算分块解码, 累加器流式汇总, 结果与一次性解码一致
+  Test 19: 快速冷启动 — mmap 加载 safetensors 与 from_pretrained 一致, 不影响其他线程构建的模块; 后台预热记录耗时
+  Test 20: 导入耗时 — app 启动不导入 ccxt / torch, 自身导入耗时不超过预算 (python -X importtime)
+  Test 21: 独立推理进程 — 子进程持有模型并回传进度, 结果与进程内推理一致; 加载失败 / 进程退出时请求报错并自动重启
+  Test 22: 流式预测 — 逐步产出已解码的部分预测, 最后一项与 predict() 一致; 经调度器合批时只回传给流式请求
+  Test 23: 增量 OHLCV 拉取 — 同一 K 线周期内命中缓存, 跨过边界后只请求 since 之后的 K 线, 合并结果与整段拉取一致
+  Test 24: 并发多交易对拉取 — fetch_many 共用一个异步客户端, 并发不超过上限; 无效交易对单独报错
+  Test 25: 分页历史回补 — 按页并发拉取并落盘, 中断后只补缺失页与含未收盘 K 线的页; 同步 / 异步结果一致
+  Test 26: 请求调度器 — 令牌桶限频, 交互式请求插队到后台请求之前; 连续失败后熔断, 冷却后试探恢复
+  Test 27: 实时 K 线推送 — 本地回放服务器推送更新内存窗口, 就绪后 fetch_ohlcv 不访问 REST; 缺口触发重新同步; 无效交易对的订阅结束且不重试
 """
 
+import functools
+import importlib.util
+import subprocess
 import sys
+import tempfile
+import threading
+import time
 import unittest
 from unittest.mock import MagicMock, patch
 
+import ccxt
 import numpy as np
 import pandas as pd
+import torch
 
 # ─────────────────────────────────────────────────────────
 # 全局 Mock：必须在导入依赖 streamlit 的模块 **之前** 完成
@@ -27,10 +59,50 @@ _mock_st.cache_data = lambda func: func           # 同理 mock cache_data（如
 sys.modules["streamlit"] = _mock_st
 
 # 现在可以安全导入项目模块了
-from src.config import INPUT_WINDOW, OUTPUT_WINDOW  # noqa: E402
+from src.config import ADAPTIVE_PATH_INCREMENT, INPUT_WINDOW, OUTPUT_WINDOW, PROJECT_ROOT  # noqa: E402
+from src.batch_scheduler import BatchScheduler     # noqa: E402
 from src.data_feed import DataFeed                  # noqa: E402
-from src.model_engine import ModelEngine            # noqa: E402
+from src.exceptions import ModelError               # noqa: E402
+from src.inference_worker import InferenceWorker    # noqa: E402
+from src.model_engine import ForecastDistribution, LoadTimings, ModelEngine  # noqa: E402
 from src.strategy import StrategyEngine, UserConfig # noqa: E402
+from src.cache_manager import CacheManager          # noqa: E402
+from src.async_feed import AsyncDataFeed            # noqa: E402
+from src.exceptions import DataFeedError            # noqa: E402
+from src.history_store import HistoryStore          # noqa: E402
+from src.rate_limiter import Priority, RequestScheduler  # noqa: E402
+from src.stream_feed import BinanceKlineSource, StreamingDataFeed  # noqa: E402
+from tests.fake_exchange import AsyncFakeExchange, FakeExchange  # noqa: E402
+from model.kronos import (                          # noqa: E402
+    Kronos,
+    KronosPredictor,
+    KronosTokenizer,
+    PathAccumulator,
+    auto_regressive_inference,
+    prefill_tail_decoder,
+    sample_from_logits as torch_sample_from_logits,
+)
+from model.compiled import compile_decode_step    # noqa: E402
+from model.loading import load_pretrained         # noqa: E402
+from model.sampling import RowGenerator, sample_tokens  # noqa: E402
+from model.precision import apply_precision, resolve_precision  # noqa: E402
+from src.onnx_backend import OnnxKronosPredictor, sample_from_logits  # noqa: E402
+
+
+def build_tiny_kronos(seed: int = 0):
+    """构造随机初始化的微型 Kronos + Tokenizer，用于不下载权重的推理路径测试。"""
+    torch.manual_seed(seed)
+    tokenizer = KronosTokenizer(
+        d_in=6, d_model=32, n_heads=4, ff_dim=64, n_enc_layers=2, n_dec_layers=2,
+        ffn_dropout_p=0.0, attn_dropout_p=0.0, resid_dropout_p=0.0,
+        s1_bits=4, s2_bits=4, beta=0.05, gamma0=1.0, gamma=1.1, zeta=0.05, group_size=4,
+    )
+    model = Kronos(
+        s1_bits=4, s2_bits=4, n_layers=2, d_model=64, n_heads=4, ff_dim=128,
+        ffn_dropout_p=0.0, attn_dropout_p=0.0, resid_dropout_p=0.0, token_dropout_p=0.0,
+        learn_te=True,
+    )
+    return tokenizer.eval(), model.eval()
 
 
 # ══════════════════════════════════════════════════════════
@@ -178,6 +250,1173 @@ class TestModelEngineShape(unittest.TestCase):
                          f"模型应输出 {OUTPUT_WINDOW} 行预测，实际输出 {len(result)} 行")
 
 
+# ══════════════════════════════════════════════════════════
+# Test 4: KV-cache 增量解码 (auto_regressive_inference)
+# ══════════════════════════════════════════════════════════
+
+class TestKVCacheDecoding(unittest.TestCase):
+    """验证 KV-cache 增量解码与逐步全窗口重算的输出一致（固定随机种子）。"""
+
+    def setUp(self):
+        self.tokenizer, self.model = build_tiny_kronos()
+        self.pred_len = 8
+        self.max_context = 64
+
+    def _run(self, hist_len, use_cache):
+        torch.manual_seed(1)
+        x = torch.randn(2, hist_len, 6)
+        x_stamp = torch.randint(0, 5, (2, hist_len, 5)).float()
+        y_stamp = torch.randint(0, 5, (2, self.pred_len, 5)).float()
+        torch.manual_seed(0)
+        return auto_regressive_inference(
+            self.tokenizer, self.model, x, x_stamp, y_stamp, self.max_context,
+            self.pred_len, sample_count=3, use_cache=use_cache,
+        )
+
+    def test_cached_matches_full_recompute(self):
+        """历史 + 预测长度不超过 max_context: 全程走缓存路径。"""
+        np.testing.assert_allclose(self._run(40, True), self._run(40, False), atol=1e-5)
+
+    def test_cached_matches_when_window_slides(self):
+        """超过 max_context 后窗口滑动, 缓存路径应回退为全窗口计算。"""
+        np.testing.assert_allclose(self._run(60, True), self._run(60, False), atol=1e-5)
+
+
+# ══════════════════════════════════════════════════════════
+# Test 5: 单位置 step 模式 (decode_s1 / decode_s2 last_only)
+# ══════════════════════════════════════════════════════════
+
+class TestLastPositionStep(unittest.TestCase):
+    """验证 last_only 模式只计算最后位置, 且结果等于全序列输出的最后一行。"""
+
+    def test_step_logits_match_full_sequence(self):
+        _, model = build_tiny_kronos()
+        torch.manual_seed(0)
+        s1_ids = torch.randint(0, 16, (3, 20))
+        s2_ids = torch.randint(0, 16, (3, 20))
+        stamp = torch.randint(0, 5, (3, 20, 5)).float()
+        sampled = torch.randint(0, 16, (3, 1))
+
+        with torch.no_grad():
+            full_s1, context = model.decode_s1(s1_ids, s2_ids, stamp)
+            full_s2 = model.decode_s2(context, sampled)
+            step_s1, _ = model.decode_s1(s1_ids, s2_ids, stamp, last_only=True)
+            step_s2 = model.decode_s2(context, sampled, last_only=True)
+
+        self.assertEqual(step_s1.shape, (3, 1, 16))
+        torch.testing.assert_close(step_s1[:, -1], full_s1[:, -1])
+        torch.testing.assert_close(step_s2[:, -1], full_s2[:, -1])
+
+
+# ══════════════════════════════════════════════════════════
+# Test 6: 共享 RoPE 表 (share_rotary_embeddings)
+# ══════════════════════════════════════════════════════════
+
+class TestSharedRotaryTable(unittest.TestCase):
+    """验证所有注意力层共享同一张 RoPE 表, 且表在加载时按 max_context 预计算。"""
+
+    def test_table_shared_and_not_rebuilt(self):
+        tokenizer, model = build_tiny_kronos()
+        predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=64)
+
+        rotaries = {id(block.self_attn.rotary) for block in predictor.model.transformer}
+        self.assertEqual(len(rotaries), 1)
+        rotary = predictor.model.transformer[0].self_attn.rotary
+        self.assertEqual(rotary.seq_len_cached, 64)
+
+        table = rotary.cos_cached
+        x = torch.randn(1, 40, 6)
+        x_stamp = torch.randint(0, 5, (1, 40, 5)).float()
+        y_stamp = torch.randint(0, 5, (1, 8, 5)).float()
+        auto_regressive_inference(predictor.tokenizer, predictor.model, x, x_stamp, y_stamp, 64, 8, sample_count=1)
+        self.assertIs(rotary.cos_cached, table)
+
+
+# ══════════════════════════════════════════════════════════
+# Test 7: Tokenizer 尾部增量解码 (prefill_tail_decoder)
+# ══════════════════════════════════════════════════════════
+
+class TestTailDecode(unittest.TestCase):
+    """验证逐步 / 整块尾部解码与全窗口解码后截取尾部的结果一致。"""
+
+    def test_tail_matches_full_window(self):
+        tokenizer, _ = build_tiny_kronos()
+        torch.manual_seed(0)
+        history = [torch.randint(0, 16, (2, 30)) for _ in range(2)]
+        tail = [torch.randint(0, 16, (6, 5)) for _ in range(2)]
+        full = [torch.cat([h.repeat_interleave(3, dim=0), t], dim=1) for h, t in zip(history, tail)]
+
+        with torch.no_grad():
+            expected = tokenizer.decode(full, half=True)[:, -5:]
+            chunk = tokenizer.decode(tail, half=True, kv_cache=prefill_tail_decoder(tokenizer, history, 3))
+            cache = prefill_tail_decoder(tokenizer, history, 3)
+            steps = torch.cat([
+                tokenizer.decode([t[:, i:i + 1] for t in tail], half=True, kv_cache=cache) for i in range(5)
+            ], dim=1)
+
+        torch.testing.assert_close(chunk, expected)
+        torch.testing.assert_close(steps, expected)
+
+
+# ══════════════════════════════════════════════════════════
+# Test 8: 多路径预测分布 (return_paths / ForecastDistribution)
+# ══════════════════════════════════════════════════════════
+
+class TestForecastDistribution(unittest.TestCase):
+    """验证单次推理返回的路径、分位数与信号概率。"""
+
+    def test_paths_consistent_with_mean(self):
+        """predict(return_paths=True) 的路径均值应等于返回的均值预测。"""
+        tokenizer, model = build_tiny_kronos()
+        predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=64)
+        n = 40
+        df = pd.DataFrame(
+            np.random.default_rng(0).uniform(1, 2, (n, 6)),
+            columns=["open", "high", "low", "close", "volume", "amount"],
+        )
+        x_ts = pd.Series(pd.date_range("2025-01-01", periods=n, freq="h"))
+        y_ts = pd.Series(pd.date_range(x_ts.iloc[-1] + pd.Timedelta(hours=1), periods=6, freq="h"))
+
+        pred_df, paths = predictor.predict(
+            df, x_ts, y_ts, pred_len=6, sample_count=4, verbose=False, return_paths=True
+        )
+        self.assertEqual(paths.shape, (4, 6, 6))
+        np.testing.assert_allclose(pred_df.values, paths.mean(axis=0), rtol=1e-5)
+
+    def test_quantiles_and_signal_probabilities(self):
+        """终点 close 为 90..109 的 20 条路径: 分位数与阈值概率可直接读出。"""
+        columns = ["open", "high", "low", "close", "volume", "amount"]
+        paths = np.ones((20, 24, 6)) * 100.0
+        paths[:, -1, 3] = np.arange(90, 110)
+        mean_df = pd.DataFrame(paths.mean(axis=0), columns=columns)
+
+        dist = ForecastDistribution.from_paths(mean_df, paths, quantiles=(0.05, 0.5, 0.95))
+        self.assertEqual(dist.sample_count, 20)
+        self.assertAlmostEqual(dist.quantiles[0.5]["close"].iloc[-1], 99.5)
+
+        # current=100, threshold=5% → close > 105: 106..109 (4 条); close < 95: 90..94 (5 条)
+        prob_bull, prob_bear = dist.signal_probabilities(100.0, 5.0)
+        self.assertAlmostEqual(prob_bull, 0.20)
+        self.assertAlmostEqual(prob_bear, 0.25)
+
+        result = StrategyEngine.analyze(100.0, mean_df, UserConfig(threshold=5.0), distribution=dist)
+        self.assertAlmostEqual(result.prob_bullish, 0.20)
+
+
+# ══════════════════════════════════════════════════════════
+# Test 9: int8 动态量化 (model.precision)
+# ══════════════════════════════════════════════════════════
+
+class TestInt8Quantization(unittest.TestCase):
+    """验证 int8 模式只替换目标 Linear 层, 且量化模型仍能完成预测。"""
+
+    def test_quantizes_target_layers_only(self):
+        tokenizer, model = build_tiny_kronos()
+        model, tokenizer = apply_precision(model, tokenizer, "int8")
+
+        quantized = torch.ao.nn.quantized.dynamic.Linear
+        self.assertIsInstance(model.transformer[0].ffn.w1, quantized)
+        self.assertIsInstance(model.transformer[0].self_attn.q_proj, quantized)
+        self.assertIsInstance(model.head.proj_s1, quantized)
+        self.assertIsInstance(model.embedding.fusion_proj, quantized)
+        self.assertIsInstance(tokenizer.decoder[0].ffn.w2, quantized)
+        # 未列入的层保持 fp32
+        self.assertIsInstance(model.dep_layer.cross_attn.q_proj, torch.nn.Linear)
+        self.assertIsInstance(tokenizer.quant_embed, torch.nn.Linear)
+
+        x = torch.randn(1, 30, 6)
+        x_stamp = torch.randint(0, 5, (1, 30, 5)).float()
+        y_stamp = torch.randint(0, 5, (1, 4, 5)).float()
+        preds = auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, 64, 4, sample_count=2)
+        self.assertEqual(preds.shape, (1, 4, 6))
+        self.assertTrue(np.isfinite(preds).all())
+
+    def test_unknown_precision_rejected(self):
+        tokenizer, model = build_tiny_kronos()
+        with self.assertRaises(ValueError):
+            apply_precision(model, tokenizer, "fp8")
+
+
+# ══════════════════════════════════════════════════════════
+# Test 10: bf16 推理 (model.precision)
+# ══════════════════════════════════════════════════════════
+
+class TestBf16Precision(unittest.TestCase):
+    """验证 bf16 模式的 dtype 划分与无硬件支持时的回退。"""
+
+    def test_bf16_weights_fp32_outputs(self):
+        tokenizer, model = build_tiny_kronos()
+        model, tokenizer = apply_precision(model, tokenizer, "bf16")
+
+        self.assertEqual(model.head.proj_s1.weight.dtype, torch.bfloat16)
+        self.assertEqual(tokenizer.embed.weight.dtype, torch.bfloat16)
+        self.assertEqual(model.transformer[0].self_attn.rotary.inv_freq.dtype, torch.float32)
+
+        x = torch.randn(1, 30, 6)
+        x_stamp = torch.randint(0, 5, (1, 30, 5)).float()
+        y_stamp = torch.randint(0, 5, (1, 4, 5)).float()
+        preds = auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, 64, 4, sample_count=2)
+        self.assertEqual(preds.dtype, np.float32)
+        self.assertTrue(np.isfinite(preds).all())
+
+    def test_falls_back_without_bf16_support(self):
+        with patch("model.precision.bf16_supported", return_value=False):
+            with self.assertWarns(UserWarning):
+                self.assertEqual(resolve_precision("bf16"), "fp32")
+        with patch("model.precision.bf16_supported", return_value=True):
+            self.assertEqual(resolve_precision("bf16"), "bf16")
+
+
+# ══════════════════════════════════════════════════════════
+# Test 11: 编译解码步回退 (model.compiled)
+# ══════════════════════════════════════════════════════════
+
+class TestCompiledDecodeFallback(unittest.TestCase):
+    """torch.compile 失败时, 模型保持 eager 解码且结果不变。"""
+
+    def test_falls_back_to_eager(self):
+        tokenizer, model = build_tiny_kronos()
+        x = torch.randn(1, 30, 6)
+        x_stamp = torch.randint(0, 5, (1, 30, 5)).float()
+        y_stamp = torch.randint(0, 5, (1, 4, 5)).float()
+        torch.manual_seed(0)
+        expected = auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, 64, 4, sample_count=2)
+
+        with patch("torch.compile", side_effect=RuntimeError("no compiler")):
+            with self.assertWarns(UserWarning):
+                report = compile_decode_step(model, max_len=64)
+        self.assertFalse(report["compiled"])
+        self.assertIn("no compiler", report["error"])
+
+        torch.manual_seed(0)
+        preds = auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, 64, 4, sample_count=2)
+        np.testing.assert_array_equal(preds, expected)
+
+
+
+# ══════════════════════════════════════════════════════════
+# Test 12: ONNX Runtime 后端 (model.onnx_export + src.onnx_backend)
+# ══════════════════════════════════════════════════════════
+
+HAS_ONNX = all(importlib.util.find_spec(m) is not None for m in ("onnxruntime", "onnxscript"))
+
+
+class TestOnnxBackend(unittest.TestCase):
+    """ONNX 服务路径不依赖 torch, 且导出图与 PyTorch 推理一致。"""
+
+    def test_serving_path_does_not_import_torch(self):
+        code = "import sys, src.onnx_backend; print('torch' in sys.modules)"
+        out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                             cwd=PROJECT_ROOT)
+        self.assertEqual(out.stdout.strip(), "False")
+
+    def test_numpy_sampler_filters(self):
+        rng = np.random.default_rng(0)
+        logits = np.tile(np.array([[5.0, 4.0, 0.0, -5.0]]), (200, 1))
+        # softmax ≈ [0.73, 0.27, ...]: top_p=0.5 只保留第一个 token
+        self.assertTrue((sample_from_logits(logits, rng, top_p=0.5) == 0).all())
+        self.assertTrue(set(sample_from_logits(logits, rng, top_k=2)) <= {0, 1})
+
+    @unittest.skipUnless(HAS_ONNX, "需要 onnxruntime 与 onnxscript")
+    def test_greedy_forecast_matches_torch(self):
+        from model.onnx_export import export_onnx
+
+        tokenizer, model = build_tiny_kronos()
+        with tempfile.TemporaryDirectory() as out_dir:
+            export_onnx(model, tokenizer, out_dir, max_context=64)
+            predictor = OnnxKronosPredictor(out_dir)
+            # 60 + 8 > 64: 同时覆盖 KV 缓存步与滑动窗口步
+            for history_len in (40, 60):
+                x = torch.randn(2, history_len, 6)
+                x_stamp = torch.randint(0, 5, (2, history_len, 5)).float()
+                y_stamp = torch.randint(0, 5, (2, 8, 5)).float()
+                expected = auto_regressive_inference(tokenizer, model, x, x_stamp, y_stamp, 64, 8,
+                                                     top_k=1, sample_count=2, return_paths=True)
+                actual = predictor.generate(x.numpy(), x_stamp.numpy(), y_stamp.numpy(), 8,
+                                            top_k=1, sample_count=2, return_paths=True)
+                np.testing.assert_allclose(actual, expected, atol=1e-4)
+
+    @unittest.skipUnless(HAS_ONNX, "需要 onnxruntime 与 onnxscript")
+    def test_memory_budget_chunks_paths(self):
+        from model.onnx_export import export_onnx
+
+        tokenizer, model = build_tiny_kronos()
+        x = np.random.default_rng(0).normal(size=(1, 40, 6)).astype(np.float32)
+        x_stamp = np.zeros((1, 40, 5), dtype=np.float32)
+        y_stamp = np.zeros((1, 8, 5), dtype=np.float32)
+        with tempfile.TemporaryDirectory() as out_dir:
+            export_onnx(model, tokenizer, out_dir, max_context=64)
+            full = OnnxKronosPredictor(out_dir)
+            # 预算只够 3 条路径: 10 条路径分 4 块解码
+            budget_mb = 3.5 * full.path_memory_bytes(48) / 2 ** 20
+            chunked = OnnxKronosPredictor(out_dir, max_memory_mb=budget_mb)
+            chunk_rows = []
+            sample_paths = chunked._sample_paths
+
+            def recording(*args):
+                paths = sample_paths(*args)
+                chunk_rows.append(paths.shape[1])
+                return paths
+
+            chunked._sample_paths = recording
+            seen = []
+            # 贪心解码 (top_k=1) 与随机数无关, 分块前后逐值一致
+            expected = full.generate(x, x_stamp, y_stamp, 8, top_k=1, sample_count=10, return_paths=True)
+            actual = chunked.generate(x, x_stamp, y_stamp, 8, top_k=1, sample_count=10, return_paths=True,
+                                      progress=seen.append)
+        self.assertEqual(chunk_rows, [3, 3, 3, 1])
+        np.testing.assert_allclose(actual, expected, atol=1e-5)
+        self.assertEqual(seen, sorted(seen))
+        self.assertAlmostEqual(seen[-1], 1.0)
+
+    @unittest.skipUnless(HAS_ONNX, "需要 onnxruntime 与 onnxscript")
+    def test_adaptive_sampling_via_scheduler(self):
+        from model.onnx_export import export_onnx
+
+        tokenizer, model = build_tiny_kronos()
+        df, x_ts, y_ts = _random_walk_series(30, 6, seed=1)
+        with tempfile.TemporaryDirectory() as out_dir:
+            export_onnx(model, tokenizer, out_dir, max_context=64)
+            predictor = OnnxKronosPredictor(out_dir, seed=0)
+            scheduler = BatchScheduler(lambda: predictor, max_wait_ms=1)
+
+            def submit(tolerance):
+                return scheduler.submit(df, x_ts, y_ts, 6, temperature=1.0, top_p=0.9, sample_count=40,
+                                        return_paths=True, tolerance=tolerance).result(timeout=60)
+
+            # 容差为 0 时跑满上限; 容差很大时首轮 (ADAPTIVE_PATH_INCREMENT 条) 即停止
+            pred_df, paths = submit(0.0)
+            self.assertEqual(pred_df.attrs["sample_count"], 40)
+            pred_df, paths = submit(1.0)
+            self.assertEqual(pred_df.attrs["sample_count"], min(40, max(2, ADAPTIVE_PATH_INCREMENT)))
+            np.testing.assert_allclose(pred_df.values, paths.mean(axis=0), rtol=1e-5)
+
+            # 停止点: 各轮路径是结果的前缀, 停下前每一轮的标准误都未达标, 停下时已达标 (或到达上限)
+            def relative_se(close, n):
+                return close[:n].std(ddof=1) / np.sqrt(n) / df["close"].iloc[-1]
+
+            _, fixed = submit(0.0)
+            tolerance = relative_se(fixed[:, -1, 3], 40)
+            pred_df, paths = submit(tolerance)
+            used, close = pred_df.attrs["sample_count"], paths[:, -1, 3]
+            self.assertEqual(len(paths), used)
+            for n in range(ADAPTIVE_PATH_INCREMENT, used, ADAPTIVE_PATH_INCREMENT):
+                self.assertGreater(relative_se(close, n), tolerance)
+            if used < 40:
+                self.assertLessEqual(relative_se(close, used), tolerance)
+
+
+
+# ══════════════════════════════════════════════════════════
+# Test 13: 连续批处理调度器 (src.batch_scheduler)
+# ══════════════════════════════════════════════════════════
+
+class _RecordingPredictor:
+    """记录调用方式的假预测器: 结果为填充了序列编号的 DataFrame。"""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def _result(self, df, pred_len):
+        return pd.DataFrame({"close": np.full(pred_len, df["close"].iloc[0])})
+
+    def predict(self, df, pred_len, **kwargs):
+        self.release.wait(5)
+        self.calls.append(("predict", 1))
+        return self._result(df, pred_len)
+
+    def predict_batch(self, df_list, x_timestamp_list, y_timestamp_list, pred_len, **kwargs):
+        self.release.wait(5)
+        self.calls.append(("predict_batch", len(df_list)))
+        return [self._result(df, pred_len) for df in df_list]
+
+
+class TestBatchScheduler(unittest.TestCase):
+    """并发请求在收集窗口内合批, 每个 Future 拿到自己的结果。"""
+
+    def _submit(self, scheduler, i, history_len=8, pred_len=3, temperature=1.0):
+        df = pd.DataFrame({"close": np.full(history_len, float(i))})
+        ts = pd.Series(pd.date_range("2025-01-01", periods=history_len, freq="h"))
+        return scheduler.submit(df, ts, ts[:pred_len], pred_len, temperature=temperature, top_p=0.9, sample_count=1)
+
+    def test_compatible_requests_share_one_batch(self):
+        predictor = _RecordingPredictor()
+        scheduler = BatchScheduler(lambda: predictor, max_batch_size=32, max_wait_ms=200)
+        # 历史长度与温度不同的请求仍可合批
+        futures = [self._submit(scheduler, i, history_len=8 + i % 3, temperature=1.0 + i % 2) for i in range(20)]
+        odd = self._submit(scheduler, 99, pred_len=5)  # 预测长度不同, 单独成组
+        predictor.release.set()
+
+        for i, future in enumerate(futures):
+            self.assertEqual(future.result(timeout=10)["close"].iloc[0], i)
+        self.assertEqual(len(odd.result(timeout=10)), 5)
+        self.assertEqual(sorted(predictor.calls), [("predict", 1), ("predict_batch", 20)])
+
+    def test_batch_size_limit_and_errors(self):
+        predictor = _RecordingPredictor()
+        predictor.release.set()
+        scheduler = BatchScheduler(lambda: predictor, max_batch_size=4, max_wait_ms=200)
+        futures = [self._submit(scheduler, i) for i in range(10)]
+        for future in futures:
+            future.result(timeout=10)
+        self.assertTrue(all(n <= 4 for _, n in predictor.calls))
+        self.assertEqual(sum(n for _, n in predictor.calls), 10)
+
+        def broken_loader():
+            raise RuntimeError("load failed")
+
+        broken = BatchScheduler(broken_loader, max_wait_ms=1)
+        with self.assertRaisesRegex(RuntimeError, "load failed"):
+            self._submit(broken, 0).result(timeout=10)
+
+    def test_batch_failure_falls_back_per_request(self):
+        tokenizer, model = build_tiny_kronos()
+        predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=64)
+        scheduler = BatchScheduler(lambda: predictor, max_wait_ms=200)
+        series = [_random_walk_series(30, 4, seed=i) for i in range(3)]
+        series[1][0].loc[5, "close"] = np.nan
+        futures = [scheduler.submit(*s, 4, temperature=1.0, top_p=0.9, sample_count=1) for s in series]
+
+        with self.assertRaisesRegex(ValueError, "NaN"):
+            futures[1].result(timeout=60)
+        for i in (0, 2):
+            self.assertEqual(len(futures[i].result(timeout=60)), 4)
+        self.assertEqual(scheduler.batches_run, 1)  # 同一组: 合批失败后逐条重跑
+
+    def test_unbatched_failures_are_per_request(self):
+        class SingleOnly:
+            """没有 predict_batch 的预测器: 组内请求逐条执行, 编号为 3 的请求失败。"""
+
+            def predict(self, df, pred_len, **kwargs):
+                if df["close"].iloc[0] == 3:
+                    raise ValueError("bad series")
+                return pd.DataFrame({"close": np.full(pred_len, df["close"].iloc[0])})
+
+        scheduler = BatchScheduler(SingleOnly, max_wait_ms=200)
+        futures = [self._submit(scheduler, i) for i in range(6)]
+        for i, future in enumerate(futures):
+            if i == 3:
+                with self.assertRaisesRegex(ValueError, "bad series"):
+                    future.result(timeout=10)
+            else:
+                self.assertEqual(future.result(timeout=10)["close"].iloc[0], i)
+
+
+
+# ══════════════════════════════════════════════════════════
+# Test 14: 不等长历史批处理 (左填充 + padding mask)
+# ══════════════════════════════════════════════════════════
+
+def _random_walk_series(history_len: int, pred_len: int, seed: int):
+    rng = np.random.default_rng(seed)
+    close = 100 * np.exp(np.cumsum(rng.normal(0, 0.01, history_len)))
+    df = pd.DataFrame({
+        "open": close, "high": close * 1.01, "low": close * 0.99, "close": close,
+        "volume": rng.uniform(1, 10, history_len),
+    })
+    ts = pd.Series(pd.date_range("2025-01-01", periods=history_len + pred_len, freq="h"))
+    return df, ts[:history_len].reset_index(drop=True), ts[history_len:].reset_index(drop=True)
+
+
+class TestRaggedBatch(unittest.TestCase):
+    """左填充的短序列与单独推理结果一致 (贪心采样, 误差仅来自浮点)。"""
+
+    def test_padded_prefill_matches_unpadded(self):
+        _, model = build_tiny_kronos()
+        s1 = torch.randint(0, 16, (1, 12))
+        s2 = torch.randint(0, 16, (1, 12))
+        stamp = torch.randint(0, 5, (1, 12, 5)).float()
+        expected, _ = model.prefill(s1, s2, model.new_kv_cache(), stamp=stamp)
+
+        pad = 5
+        mask = torch.zeros(1, 12 + pad, dtype=torch.bool)
+        mask[:, :pad] = True
+        padded = [torch.cat([torch.zeros(1, pad, dtype=torch.long), t], dim=1) for t in (s1, s2)]
+        cache = model.new_kv_cache()
+        logits, _ = model.prefill(*padded, cache, stamp=torch.cat([stamp[:, :1].repeat(1, pad, 1), stamp], dim=1),
+                                  padding_mask=mask)
+        torch.testing.assert_close(logits, expected, atol=1e-5, rtol=1e-5)
+        self.assertEqual(tuple(cache.padding_mask.shape), (1, 12 + pad))
+
+    def test_ragged_predict_batch_matches_single(self):
+        tokenizer, model = build_tiny_kronos()
+        predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=64)
+        # 50 + 20 > 64: 填充后的短序列会进入滑动窗口, 而单独推理全程走 KV 缓存
+        series = [_random_walk_series(n, 20, seed) for seed, n in enumerate((20, 35, 50))]
+        for sample_count in (1, 2):  # 2 条路径时走尾部增量解码
+            batch = predictor.predict_batch([s[0] for s in series], [s[1] for s in series], [s[2] for s in series],
+                                            20, top_k=1, sample_count=sample_count, verbose=False)
+            for (df, x_ts, y_ts), pred_df in zip(series, batch):
+                single = predictor.predict(df, x_ts, y_ts, 20, top_k=1, sample_count=sample_count, verbose=False)
+                np.testing.assert_allclose(pred_df.values, single.values, rtol=1e-4)
+                self.assertTrue(pred_df.index.equals(single.index))
+
+
+
+# ══════════════════════════════════════════════════════════
+# Test 15: 逐行采样参数 (temperature / top_p 张量)
+# ══════════════════════════════════════════════════════════
+
+class TestPerRowSampling(unittest.TestCase):
+    """同一批次中每行使用自己的温度与 top_p。"""
+
+    def test_sampler_applies_row_parameters(self):
+        # 词表大于候选集 (64), 覆盖部分 top-k 与全排序回退两条路径
+        logits = torch.cat([torch.tensor([5.0, 4.0]), torch.linspace(0.0, -5.0, 126)]).repeat(400, 1)
+        uniform = torch.rand(400, 1, generator=torch.Generator().manual_seed(0))
+        top_p = torch.tensor([0.5] * 200 + [1.0] * 200).unsqueeze(-1)
+        tokens = sample_tokens(logits, top_p=top_p, uniform=uniform)
+        self.assertEqual(tokens[:200].unique().tolist(), [0])
+        self.assertGreater(len(tokens[200:].unique()), 1)
+
+        temperature = torch.tensor([1e-3] * 200 + [5.0] * 200).unsqueeze(-1)
+        tokens = sample_tokens(logits, temperature=temperature, top_p=1.0, uniform=uniform)
+        self.assertEqual(tokens[:200].unique().tolist(), [0])
+        self.assertGreater(len(tokens[200:].unique()), 2)
+
+        # 温度与 top_p 同时逐行变化: 每行与用该行参数单独采样一致
+        temperature = torch.linspace(0.5, 2.0, 400).unsqueeze(-1)
+        top_p = torch.linspace(0.3, 1.0, 400).unsqueeze(-1)
+        tokens = sample_tokens(logits, temperature=temperature, top_p=top_p, uniform=uniform)
+        for row in range(0, 400, 37):
+            expected = sample_tokens(logits[row:row + 1], temperature=temperature[row].item(),
+                                     top_p=top_p[row].item(), uniform=uniform[row:row + 1])
+            self.assertEqual(tokens[row].item(), expected.item())
+
+        # 旧采样器 (基准对照) 的逐行参数语义相同
+        legacy = torch_sample_from_logits(logits.clone(), top_k=0, top_p=torch.full((400, 1), 0.5))
+        self.assertEqual(legacy.unique().tolist(), [0])
+
+    def test_predict_batch_sweeps_sampling_settings(self):
+        tokenizer, model = build_tiny_kronos()
+        predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=64)
+        df, x_ts, y_ts = _random_walk_series(40, 8, seed=0)
+        greedy = predictor.predict(df, x_ts, y_ts, 8, top_k=1, verbose=False)
+
+        # 同一序列两种设置: top_p=0.01 只保留最可能的 token, 等价于贪心解码
+        sweep = predictor.predict_batch([df, df], [x_ts, x_ts], [y_ts, y_ts], 8,
+                                        T=[1.0, 2.0], top_p=[0.01, 1.0], verbose=False)
+        np.testing.assert_allclose(sweep[0].values, greedy.values, rtol=1e-5)
+        with self.assertRaises(ValueError):
+            predictor.predict_batch([df, df], [x_ts, x_ts], [y_ts, y_ts], 8, T=[1.0, 1.0, 1.0], verbose=False)
+
+
+
+# ══════════════════════════════════════════════════════════
+# Test 16: 候选集采样器 (model.sampling)
+# ══════════════════════════════════════════════════════════
+
+def _reference_nucleus(logits, temperature, top_p, uniform):
+    """全词表排序的参考实现, 用同一组均匀数做逆 CDF 采样。"""
+    probs, order = torch.sort(torch.softmax(logits / temperature, dim=-1), descending=True)
+    cumulative = probs.cumsum(dim=-1)
+    kept = probs * ((cumulative - probs) <= top_p)
+    cdf = kept.cumsum(dim=-1)
+    choice = (cdf <= uniform * cdf[:, -1:]).sum(dim=-1, keepdim=True).clamp_max(logits.size(-1) - 1)
+    return order.gather(-1, choice)
+
+
+class TestCandidateSampler(unittest.TestCase):
+    """部分 top-k 求 nucleus 与全排序结果一致 (含回退路径); 按行种子采样可复现。"""
+
+    def test_matches_full_sort(self):
+        generator = torch.Generator().manual_seed(0)
+        vocab = 1024
+        # scale 越小分布越平: 8 → nucleus 在 64 个候选内; 2 → 需扩大候选; 0.5 → 回退全排序
+        for scale in (8.0, 2.0, 0.5):
+            logits = torch.randn(64, vocab, generator=generator) * scale
+            uniform = torch.rand(64, 1, generator=generator)
+            temperature = torch.linspace(0.5, 1.5, 64).unsqueeze(-1)
+            expected = _reference_nucleus(logits, temperature, 0.9, uniform)
+            actual = sample_tokens(logits, temperature, top_p=0.9, uniform=uniform)
+            # 两者的归一化计算顺序不同, 允许恰好落在 CDF 边界上的个别抽样不同
+            self.assertLessEqual((actual != expected).sum().item(), 1, f"scale={scale}")
+
+    def test_seeded_forecast_independent_of_batch(self):
+        tokenizer, model = build_tiny_kronos()
+        predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=64)
+        series = [_random_walk_series(40, 8, seed) for seed in range(3)]
+        alone = predictor.predict(*series[1], 8, sample_count=3, verbose=False, seed=7)
+        again = predictor.predict(*series[1], 8, sample_count=3, verbose=False, seed=7)
+        np.testing.assert_array_equal(alone.values, again.values)
+
+        batch = predictor.predict_batch([s[0] for s in series], [s[1] for s in series], [s[2] for s in series], 8,
+                                        sample_count=3, verbose=False, seed=[1, 7, 9])
+        np.testing.assert_allclose(batch[1].values, alone.values, rtol=1e-5)
+        self.assertEqual(len(RowGenerator.for_paths([1, 7], 3)), 6)
+
+
+
+# ══════════════════════════════════════════════════════════
+# Test 17: 自适应采样 (按标准误提前停止)
+# ══════════════════════════════════════════════════════════
+
+class TestAdaptiveSampling(unittest.TestCase):
+    """分批追加路径, 收敛即停; 带种子时与固定路径数的结果逐条一致。"""
+
+    def test_stops_once_standard_error_is_below_tolerance(self):
+        tokenizer, model = build_tiny_kronos()
+        predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=64)
+        df, x_ts, y_ts = _random_walk_series(40, 8, seed=0)
+        _, fixed = predictor.predict(df, x_ts, y_ts, 8, sample_count=10, verbose=False, return_paths=True, seed=3)
+
+        # 容差为 0 时跑满上限; 容差很大时首轮 (path_increment 条) 即停止
+        for tolerance, expected in ((0.0, 10), (1.0, 4)):
+            pred_df, paths = predictor.predict(df, x_ts, y_ts, 8, sample_count=10, verbose=False, return_paths=True,
+                                               seed=3, tolerance=tolerance, path_increment=4)
+            self.assertEqual(pred_df.attrs["sample_count"], expected)
+            np.testing.assert_allclose(paths, fixed[:expected], rtol=1e-5)
+
+        # 停止点: 第一个标准误 ≤ 容差 × 最新收盘价的轮次
+        _, fixed = predictor.predict(df, x_ts, y_ts, 8, sample_count=80, verbose=False, return_paths=True, seed=3)
+        close = fixed[:, -1, 3]
+        relative_se = [close[:n].std(ddof=1) / np.sqrt(n) / df["close"].iloc[-1] for n in range(4, 81, 4)]
+        tolerance = 0.8 * relative_se[0]
+        expected = next((n for n, se in zip(range(4, 81, 4), relative_se) if se <= tolerance), 80)
+        self.assertTrue(4 < expected < 80)
+        pred_df = predictor.predict(df, x_ts, y_ts, 8, sample_count=80, verbose=False, seed=3, tolerance=tolerance)
+        self.assertEqual(pred_df.attrs["sample_count"], expected)
+
+    def test_scheduler_forwards_tolerance(self):
+        tokenizer, model = build_tiny_kronos()
+        predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=64)
+        scheduler = BatchScheduler(lambda: predictor, max_wait_ms=1)
+        df, x_ts, y_ts = _random_walk_series(30, 6, seed=1)
+        pred_df, paths = scheduler.submit(df, x_ts, y_ts, 6, temperature=1.0, top_p=0.9, sample_count=12,
+                                          return_paths=True, tolerance=1.0).result(timeout=60)
+        self.assertEqual(paths.shape[0], pred_df.attrs["sample_count"])
+        self.assertLess(paths.shape[0], 12)
+
+
+
+# ══════════════════════════════════════════════════════════
+# Test 18: 分块路径执行 (内存预算)
+# ══════════════════════════════════════════════════════════
+
+class TestChunkedPaths(unittest.TestCase):
+    """路径按内存预算分块解码, 均值 / 标准误由累加器流式汇总。"""
+
+    def test_accumulator_matches_full_statistics(self):
+        paths = np.random.default_rng(0).normal(size=(2, 9, 4, 6)).astype(np.float32)
+        accumulator = PathAccumulator(2, 9, keep_paths=True)
+        for start, end in ((0, 2), (2, 7), (7, 9)):
+            accumulator.add(paths[:, start:end])
+        np.testing.assert_allclose(accumulator.mean(), paths.mean(axis=1), rtol=1e-5)
+        np.testing.assert_array_equal(accumulator.paths(), paths)
+        expected_se = paths[:, :, -1].std(axis=1, ddof=1) / 3
+        np.testing.assert_allclose(accumulator.last_step_std_error(), expected_se, rtol=1e-4)
+        with self.assertRaises(ValueError):
+            accumulator.add(paths[:, :1])
+
+    def test_budgeted_predict_matches_unchunked(self):
+        tokenizer, model = build_tiny_kronos()
+        df, x_ts, y_ts = _random_walk_series(40, 8, seed=2)
+        full = KronosPredictor(model, tokenizer, device="cpu", max_context=64)
+        # 预算小于一条路径: 每块只解码一条路径
+        chunked = KronosPredictor(model, tokenizer, device="cpu", max_context=64, max_memory_mb=1e-3)
+        for kwargs in (dict(return_paths=True), dict(tolerance=0.0)):
+            expected = full.predict(df, x_ts, y_ts, 8, sample_count=5, verbose=False, seed=4, **kwargs)
+            actual = chunked.predict(df, x_ts, y_ts, 8, sample_count=5, verbose=False, seed=4, **kwargs)
+            if kwargs.get("return_paths"):
+                np.testing.assert_allclose(actual[1], expected[1], rtol=1e-5)
+                actual, expected = actual[0], expected[0]
+            np.testing.assert_allclose(actual.values, expected.values, rtol=1e-5)
+            self.assertEqual(actual.attrs["sample_count"], 5)
+
+
+
+# ══════════════════════════════════════════════════════════
+# Test 19: 快速冷启动 (mmap 加载 + 后台预热)
+# ══════════════════════════════════════════════════════════
+
+class TestFastColdStart(unittest.TestCase):
+    """mmap 加载的权重与 from_pretrained 相同且不回写文件; 预热线程只启动一次并记录耗时。"""
+
+    def test_mmap_load_matches_from_pretrained(self):
+        tokenizer, model = build_tiny_kronos()
+        with tempfile.TemporaryDirectory() as tmp:
+            for original in (tokenizer, model):
+                original.save_pretrained(tmp)
+                loaded = load_pretrained(type(original), tmp)
+                expected = type(original).from_pretrained(tmp).state_dict()
+                self.assertEqual(loaded.state_dict().keys(), expected.keys())
+                for name, tensor in loaded.state_dict().items():
+                    torch.testing.assert_close(tensor, expected[name], rtol=0, atol=0, msg=name)
+
+                # copy-on-write: 原地修改不影响文件
+                with torch.no_grad():
+                    next(loaded.parameters()).add_(1.0)
+                reloaded = load_pretrained(type(original), tmp)
+                torch.testing.assert_close(next(reloaded.parameters()), next(original.parameters()))
+
+    def test_meta_build_is_thread_local(self):
+        tokenizer, model = build_tiny_kronos()
+        built, original_init = [], Kronos.__init__
+
+        @functools.wraps(original_init)
+        def init_with_concurrent_build(self, *args, **kwargs):
+            original_init(self, *args, **kwargs)
+            # 加载期间其他线程 (如同时启动的预热 / 页面线程) 构建的模块不受影响
+            thread = threading.Thread(target=lambda: built.append(torch.nn.Linear(4, 4)))
+            thread.start()
+            thread.join()
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tokenizer.save_pretrained(tmp)
+            loaded = load_pretrained(KronosTokenizer, tmp)
+            with patch.object(Kronos, "__init__", init_with_concurrent_build):
+                model.save_pretrained(tmp)
+                load_pretrained(Kronos, tmp)
+        self.assertFalse(built[0].weight.is_meta)
+        # 不在检查点中的派生 buffer (如量化器的 group_codebook) 已重新计算
+        expected = dict(tokenizer.named_buffers())
+        for name, buffer in loaded.named_buffers():
+            torch.testing.assert_close(buffer, expected[name], rtol=0, atol=0, msg=name)
+
+    @patch.object(ModelEngine, "_load_model")
+    def test_background_warmup_records_timings(self, mock_load):
+        mock_predictor = MagicMock()
+        mock_predictor.predict.return_value = pd.DataFrame(np.zeros((OUTPUT_WINDOW, 6)))
+        mock_load.return_value = mock_predictor
+        with patch.object(ModelEngine, "timings", LoadTimings()), patch.object(ModelEngine, "_warmup_thread", None):
+            thread = ModelEngine.start_warmup()
+            self.assertIs(ModelEngine.start_warmup(), thread)
+            thread.join(timeout=30)
+            self.assertTrue(ModelEngine.timings.ready)
+            self.assertIsNone(ModelEngine.timings.error)
+        self.assertEqual(len(mock_predictor.predict.call_args.kwargs["df"]), INPUT_WINDOW)
+
+
+
+# ══════════════════════════════════════════════════════════
+# Test 20: 导入耗时 (python -X importtime)
+# ══════════════════════════════════════════════════════════
+
+APP_IMPORT_BUDGET_S = 0.25  # 预先导入 streamlit / pandas 后, src.app 自身的导入预算 (当前约 0.02s, ccxt 约 0.5s)
+
+
+def _import_profile(preload: str, target: str, probe):
+    """
+    在干净的子进程中先导入 preload, 再导入 target。
+
+    Returns:
+        (target 的累计导入秒数, probe 中已被导入的模块列表)
+    """
+    code = f"{preload}; import {target}; import sys; print(' '.join(m for m in {list(probe)!r} if m in sys.modules))"
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                         capture_output=True, text=True, check=True, cwd=PROJECT_ROOT)
+    cumulative = next(int(line.split("|")[1]) for line in out.stderr.splitlines()
+                      if line.split("|")[-1].strip() == target)
+    return cumulative / 1e6, out.stdout.split()
+
+
+class TestImportTime(unittest.TestCase):
+    """重量级依赖推迟到首次使用, 启动导入耗时回归时失败。"""
+
+    def test_app_import_defers_heavy_dependencies(self):
+        seconds, loaded = _import_profile("import streamlit, pandas, numpy", "src.app",
+                                          ["ccxt", "torch", "model", "onnxruntime"])
+        self.assertEqual(loaded, [])
+        self.assertLess(seconds, APP_IMPORT_BUDGET_S)
+
+    def test_model_import_skips_compiler_stack(self):
+        _, loaded = _import_profile("import torch", "model.kronos", ["torch._dynamo"])
+        self.assertEqual(loaded, [])
+
+
+
+# ══════════════════════════════════════════════════════════
+# Test 21: 独立推理进程 (src.inference_worker)
+# ══════════════════════════════════════════════════════════
+
+def _tiny_predictor():
+    """推理进程的加载函数 (模块级, 按名称传给 spawn 子进程)。"""
+    tokenizer, model = build_tiny_kronos()
+    return KronosPredictor(model, tokenizer, device="cpu", max_context=64)
+
+
+def _failing_predictor():
+    raise ModelError("权重文件不存在")
+
+
+class TestInferenceWorker(unittest.TestCase):
+    """模型常驻子进程: 请求经管道往返, 进度逐步回传; 异常与进程退出以 ModelError 告知调用方。"""
+
+    def test_worker_streams_progress_and_restarts(self):
+        df, x_ts, y_ts = _random_walk_series(30, 6, seed=5)
+        timings = LoadTimings()
+        worker = InferenceWorker(_tiny_predictor, warmup=(df, x_ts, y_ts), timings=timings, max_wait_ms=1)
+        self.addCleanup(worker.close)
+
+        # top_p 极小时退化为贪心解码, 结果与随机数状态无关, 可与进程内推理逐值比较
+        expected = _tiny_predictor().predict(df, x_ts, y_ts, 6, T=1.0, top_p=1e-6, sample_count=2, verbose=False)
+        future = worker.submit(df, x_ts, y_ts, 6, temperature=1.0, top_p=1e-6, sample_count=2)
+        seen = []
+        future.add_progress_listener(seen.append)
+        np.testing.assert_allclose(future.result(timeout=120).values, expected.values, rtol=1e-5)
+        self.assertTrue(timings.ready)
+        self.assertEqual(future.progress, 1.0)
+        self.assertTrue(seen)
+        self.assertEqual(seen, sorted(seen))
+
+        # 进程意外退出后, 下一次提交自动重启
+        worker._process.kill()
+        worker._process.join()
+        pred_df = worker.submit(df, x_ts, y_ts, 6, temperature=1.0, top_p=1e-6, sample_count=2).result(timeout=120)
+        np.testing.assert_allclose(pred_df.values, expected.values, rtol=1e-5)
+
+    def test_load_failure_fails_requests(self):
+        timings = LoadTimings()
+        worker = InferenceWorker(_failing_predictor, timings=timings, max_wait_ms=1)
+        self.addCleanup(worker.close)
+        df, x_ts, y_ts = _random_walk_series(20, 4, seed=0)
+        future = worker.submit(df, x_ts, y_ts, 4, temperature=1.0, top_p=0.9, sample_count=1)
+        with self.assertRaises(ModelError):
+            future.result(timeout=120)
+        self.assertIn("权重文件不存在", timings.error)
+
+
+
+# ══════════════════════════════════════════════════════════
+# Test 22: 流式预测 (predict_stream)
+# ══════════════════════════════════════════════════════════
+
+class TestStreamingForecast(unittest.TestCase):
+    """部分预测逐小时增长, 是完整预测的前缀; 流式与否不改变采样结果。"""
+
+    def test_predict_stream_grows_to_predict_result(self):
+        tokenizer, model = build_tiny_kronos()
+        predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=64)
+        df, x_ts, y_ts = _random_walk_series(40, 8, seed=0)
+        *partials, final = predictor.predict_stream(df, x_ts, y_ts, 8, sample_count=3, seed=1)
+        expected = predictor.predict(df, x_ts, y_ts, 8, sample_count=3, seed=1, verbose=False)
+
+        self.assertEqual([len(p) for p in partials], list(range(1, 9)))
+        np.testing.assert_allclose(final.values, expected.values, rtol=1e-5)
+        self.assertEqual(final.attrs["sample_count"], 3)
+        for partial in partials:
+            # 解码器是因果的: 前 k 小时不随后续步骤改变
+            np.testing.assert_allclose(partial.values, expected.values[:len(partial)], rtol=1e-5)
+            self.assertTrue(partial.index.equals(expected.index[:len(partial)]))
+
+    def test_scheduler_streams_only_to_streaming_requests(self):
+        tokenizer, model = build_tiny_kronos()
+        predictor = KronosPredictor(model, tokenizer, device="cpu", max_context=64)
+        scheduler = BatchScheduler(lambda: predictor, max_wait_ms=200)
+        series = [_random_walk_series(n, OUTPUT_WINDOW, seed=n) for n in (30, 40)]
+        # top_p 极小时退化为贪心解码, 合批与否结果相同
+        streamed, plain = (
+            scheduler.submit(*s, OUTPUT_WINDOW, temperature=1.0, top_p=1e-6, sample_count=1, stream=stream)
+            for s, stream in zip(series, (True, False))
+        )
+        pred_df = streamed.result(timeout=60)
+        plain.result(timeout=60)
+        self.assertEqual(scheduler.batches_run, 1)
+        self.assertIsNone(plain.partial)
+        np.testing.assert_allclose(streamed.partial.values, pred_df.values, rtol=1e-5)
+
+        # ModelEngine.predict_stream: 24 份逐步增长的部分预测 + 完整结果
+        with patch.object(ModelEngine, "_get_scheduler", return_value=BatchScheduler(lambda: predictor, max_wait_ms=1)):
+            *partials, final = ModelEngine().predict_stream(*series[1])
+        self.assertEqual([len(p) for p in partials], list(range(1, OUTPUT_WINDOW + 1)))
+        self.assertEqual(len(final), OUTPUT_WINDOW)
+
+
+# ══════════════════════════════════════════════════════════
+# Test 23: 增量 OHLCV 拉取 (K 线边界失效)
+# ══════════════════════════════════════════════════════════
+
+class TestIncrementalFetch(unittest.TestCase):
+    """缓存按 K 线边界失效, 过期后只补齐最后一根缓存 K 线及之后的数据。"""
+
+    HOUR = 3600
+    START = 1_700_000_000 // 3600 * 3600 + 600  # 某小时开盘后 10 分钟
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.exchange = FakeExchange()
+        self.feed = DataFeed(cache_manager=CacheManager(ohlcv_dir=tmp.name, prediction_dir=tmp.name),
+                             exchange=self.exchange)
+
+    def fetch_at(self, now: float, limit: int = 100) -> pd.DataFrame:
+        with patch("time.time", return_value=now):
+            return self.feed.fetch_ohlcv("BTC/USDT", "1h", limit=limit)
+
+    def test_boundary_invalidation_and_incremental_merge(self):
+        first = self.fetch_at(self.START)
+        self.assertEqual(self.exchange.calls[-1]["since"], None)
+        self.assertEqual(len(first), 100)
+
+        # 同一小时内 (TTL 之内) 直接命中缓存
+        self.fetch_at(self.START + 120)
+        self.assertEqual(len(self.exchange.calls), 1)
+
+        # 跨过小时边界: 以最后一根缓存 K 线为起点, 只拉 2 根 (重新校验的旧未收盘 K 线 + 新 K 线)
+        now = self.START + self.HOUR
+        merged = self.fetch_at(now)
+        call = self.exchange.calls[-1]
+        self.assertEqual(call["since"], int(first["timestamp"].iloc[-1]))
+        self.assertEqual(call["rows"], 2)
+        with patch("time.time", return_value=now):
+            full = pd.DataFrame(self.exchange.fetch_ohlcv("BTC/USDT", "1h", limit=100),
+                                columns=list(merged.columns))
+        pd.testing.assert_frame_equal(merged, full, check_dtype=False)
+
+    def test_large_gap_refetches_whole_window(self):
+        self.fetch_at(self.START, limit=10)
+        self.fetch_at(self.START + 20 * self.HOUR, limit=10)
+        self.assertEqual([call["since"] for call in self.exchange.calls], [None, None])
+
+
+# ══════════════════════════════════════════════════════════
+# Test 24: 并发多交易对拉取 (AsyncDataFeed.fetch_many)
+# ══════════════════════════════════════════════════════════
+
+class TestAsyncFetchMany(unittest.TestCase):
+    """多个交易对经同一客户端并发拉取, 结果与同步 DataFeed 一致。"""
+
+    SYMBOLS = [f"COIN{i}/USDT" for i in range(6)]
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache = CacheManager(ohlcv_dir=tmp.name, prediction_dir=tmp.name)
+        self.exchange = AsyncFakeExchange(symbols=self.SYMBOLS, latency=0.05)
+        self.feed = AsyncDataFeed(cache_manager=self.cache, exchange=self.exchange, concurrency=4)
+        self.addCleanup(self.feed.close)
+
+    def test_fetch_many_runs_concurrently_within_limit(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        sync_feed = DataFeed(cache_manager=CacheManager(ohlcv_dir=tmp.name, prediction_dir=tmp.name),
+                             exchange=FakeExchange(symbols=self.SYMBOLS))
+        with patch("time.time", return_value=1_700_000_000.0):
+            frames = self.feed.fetch_many(self.SYMBOLS + self.SYMBOLS[:2], limit=50)
+            sync_df = sync_feed.fetch_ohlcv("COIN3/USDT", limit=50)
+        self.assertEqual(list(frames), self.SYMBOLS)
+        self.assertEqual(len(self.exchange.calls), len(self.SYMBOLS))  # 重复项只请求一次
+        self.assertEqual(self.exchange.max_in_flight, 4)
+        pd.testing.assert_frame_equal(frames["COIN3/USDT"], sync_df, check_dtype=False)
+
+        self.feed.close()
+        self.assertTrue(self.exchange.closed)
+
+    def test_bad_symbol_fails_alone(self):
+        symbols = ["COIN0/USDT", "NOPE/USDT", "COIN1/USDT"]
+        results = self.feed.fetch_many(symbols, limit=10, return_exceptions=True)
+        self.assertIsInstance(results["NOPE/USDT"], DataFeedError)
+        self.assertEqual(len(results["COIN1/USDT"]), 10)
+        with self.assertRaises(DataFeedError):
+            self.feed.fetch_many(symbols, limit=10)
+
+
+# ══════════════════════════════════════════════════════════
+# Test 25: 分页历史回补 (DataFeed.backfill + HistoryStore)
+# ══════════════════════════════════════════════════════════
+
+class TestBackfill(unittest.TestCase):
+    """回补范围按页切分, 已完整保存的页不再请求, 结果是连续无重复的 K 线。"""
+
+    HOUR_MS = 3_600_000
+    NOW = 1_700_000_000.0
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = tmp.name
+        self.store = HistoryStore(root=f"{tmp.name}/history", page_size=100)
+        now_ms = int(self.NOW * 1000)
+        self.start = now_ms - 350 * self.HOUR_MS  # 跨 4~5 页, 最后一页含未收盘 K 线
+        self.pages = self.store.page_starts(self.HOUR_MS, self.start, now_ms)
+
+    def make_feed(self, feed_cls, exchange):
+        cache = CacheManager(ohlcv_dir=self.tmp, prediction_dir=self.tmp)
+        feed = feed_cls(cache_manager=cache, exchange=exchange, scheduler=RequestScheduler())
+        if feed_cls is AsyncDataFeed:
+            self.addCleanup(feed.close)
+        return feed
+
+    def check_continuous(self, df: pd.DataFrame):
+        self.assertEqual(df["timestamp"].iloc[0], -(-self.start // self.HOUR_MS) * self.HOUR_MS)
+        self.assertEqual(df["timestamp"].iloc[-1], int(self.NOW * 1000) // self.HOUR_MS * self.HOUR_MS)
+        self.assertTrue((df["timestamp"].diff().dropna() == self.HOUR_MS).all())
+
+    def test_resume_after_interruption(self):
+        exchange = FakeExchange()
+        exchange.fail_since = {self.pages[1]}
+        feed = self.make_feed(DataFeed, exchange)
+        with patch("time.time", return_value=self.NOW), patch("time.sleep"):
+            with self.assertRaises(DataFeedError):
+                feed.backfill("BTC/USDT", self.start, store=self.store)
+            # 中断后续传: 只请求失败页与含未收盘 K 线的最后一页
+            exchange.fail_since = set()
+            exchange.calls.clear()
+            df = feed.backfill("BTC/USDT", self.start, store=self.store)
+        self.assertEqual(sorted(call["since"] for call in exchange.calls), [self.pages[1], self.pages[-1]])
+        self.check_continuous(df)
+
+    def test_async_backfill_matches_sync(self):
+        exchange = AsyncFakeExchange(latency=0.01)
+        feed = self.make_feed(AsyncDataFeed, exchange)
+        with patch("time.time", return_value=self.NOW):
+            df = feed.backfill("BTC/USDT", pd.Timestamp(self.start, unit="ms"), store=self.store)
+            sync_df = self.make_feed(DataFeed, FakeExchange()).backfill(
+                "BTC/USDT", self.start, store=HistoryStore(root=f"{self.tmp}/sync", page_size=100))
+        self.assertEqual(len(exchange.calls), len(self.pages))
+        self.assertGreater(exchange.max_in_flight, 1)
+        pd.testing.assert_frame_equal(df, sync_df)
+        self.check_continuous(df)
+
+
+# ══════════════════════════════════════════════════════════
+# Test 26: 请求调度器 (src.rate_limiter)
+# ══════════════════════════════════════════════════════════
+
+class TestRequestScheduler(unittest.TestCase):
+    """进程级令牌桶: 按权重限速, 按优先级发放; 连续失败熔断。"""
+
+    def test_token_bucket_and_priority(self):
+        scheduler = RequestScheduler(weight_per_minute=60 * 20)  # 每秒补充 20 个令牌
+        scheduler.acquire(scheduler.capacity)  # 取空令牌桶
+        order = []
+
+        def request(name, priority):
+            scheduler.acquire(2, priority)
+            order.append(name)
+
+        threads = [threading.Thread(target=request, args=(f"bg{i}", Priority.BACKGROUND)) for i in range(3)]
+        for thread in threads:
+            thread.start()
+        while scheduler.metrics()["queue_depth"] < 3:
+            threading.Event().wait(0.005)
+        self.assertEqual(scheduler.metrics()["queue_by_priority"]["BACKGROUND"], 3)
+        threads.append(threading.Thread(target=request, args=("click", Priority.INTERACTIVE)))
+        threads[-1].start()
+        for thread in threads:
+            thread.join(timeout=5)
+
+        # 交互式请求后到, 但在排队的后台请求之前获得令牌; 4 × 2 个令牌约需 0.4s
+        self.assertEqual(order[0], "click")
+        metrics = scheduler.metrics()
+        self.assertEqual(metrics["queue_depth"], 0)
+        self.assertEqual(metrics["wait"]["BACKGROUND"]["granted"], 3)
+        self.assertGreater(metrics["wait"]["BACKGROUND"]["max_ms"], 250)
+
+    def test_circuit_breaker(self):
+        exchange = FakeExchange()
+        scheduler = RequestScheduler(failure_threshold=2, cooldown=0.2, base_delay=0)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        feed = DataFeed(cache_manager=CacheManager(ohlcv_dir=tmp.name, prediction_dir=tmp.name),
+                        exchange=exchange, scheduler=scheduler)
+        with patch.object(FakeExchange, "fetch_ohlcv", side_effect=ccxt.NetworkError("down")) as fetch:
+            for _ in range(2):
+                with self.assertRaises(DataFeedError):
+                    feed.fetch_ohlcv("BTC/USDT")
+            self.assertTrue(scheduler.circuit_open)
+            calls = fetch.call_count
+            with self.assertRaises(DataFeedError):
+                feed.fetch_ohlcv("BTC/USDT")
+            self.assertEqual(fetch.call_count, calls)  # 熔断期间不访问交易所
+            self.assertEqual(scheduler.metrics()["rejected"], 1)
+
+        threading.Event().wait(0.25)  # 冷却结束, 放行试探请求
+        self.assertEqual(len(feed.fetch_ohlcv("BTC/USDT", limit=10)), 10)
+        self.assertFalse(scheduler.circuit_open)
+
+
+# ══════════════════════════════════════════════════════════
+# Test 27: 实时 K 线推送 (StreamingDataFeed + 本地回放服务器)
+# ══════════════════════════════════════════════════════════
+
+def _wait_until(condition, timeout: float = 10.0) -> bool:
+    deadline = threading.Event()
+    for _ in range(int(timeout / 0.02)):
+        if condition():
+            return True
+        deadline.wait(0.02)
+    return condition()
+
+
+@unittest.skipUnless(importlib.util.find_spec("websockets"), "需要 websockets")
+class TestStreamingFeed(unittest.TestCase):
+    """推送经本地 websocket 服务器走完整链路: 解析 → 环形缓冲区 → fetch_ohlcv。"""
+
+    HOUR_MS = 3_600_000
+    STREAM = "btcusdt@kline_1h"
+
+    def setUp(self):
+        from tests.replay_server import KlineReplayServer
+
+        self.server = KlineReplayServer().start()
+        self.addCleanup(self.server.close)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.exchange = AsyncFakeExchange()
+        self.feed = StreamingDataFeed(
+            cache_manager=CacheManager(ohlcv_dir=tmp.name, prediction_dir=tmp.name), exchange=self.exchange,
+            scheduler=RequestScheduler(base_delay=0.05), source=BinanceKlineSource(self.server.url),
+        )
+        self.addCleanup(self.feed.close)
+        self.open_ts = int(time.time() * 1000) // self.HOUR_MS * self.HOUR_MS  # 当前未收盘 K 线
+
+    def test_window_served_from_memory(self):
+        self.server.push(self.STREAM, [
+            [self.open_ts, 100.0, 105.0, 99.0, 123.0, 7.0],                  # 未收盘 K 线的更新
+            [self.open_ts + self.HOUR_MS, 123.0, 124.0, 122.0, 123.5, 1.0],  # 新 K 线开盘
+        ])
+        first = self.feed.fetch_ohlcv("BTC/USDT")  # 尚未就绪: 经 REST, 并自动订阅
+        self.assertEqual(len(first), 500)
+        self.assertTrue(_wait_until(lambda: (self.feed.latest_window("BTC/USDT") is not None and
+                                             self.feed.latest_window("BTC/USDT")["timestamp"].iloc[-1]
+                                             == self.open_ts + self.HOUR_MS)))
+
+        calls = len(self.exchange.calls)
+        df = self.feed.fetch_ohlcv("BTC/USDT")
+        self.assertEqual(len(self.exchange.calls), calls)  # 命中内存, 不访问 REST
+        self.assertEqual(len(df), INPUT_WINDOW)
+        self.assertEqual(df.loc[df["timestamp"] == self.open_ts, "close"].item(), 123.0)
+        self.assertTrue((df["timestamp"].diff().dropna() == self.HOUR_MS).all())
+        x_df, _, _ = self.feed.preprocess(df)
+        self.assertEqual(len(x_df), INPUT_WINDOW)
+
+    def test_gap_triggers_resync(self):
+        self.feed.subscribe(["BTC/USDT"])
+        self.server.push(self.STREAM, [[self.open_ts, 1.0, 1.0, 1.0, 1.0, 1.0]])
+        self.assertTrue(self.feed.wait_ready("BTC/USDT", timeout=10))
+        self.server.push(self.STREAM, [[self.open_ts + 3 * self.HOUR_MS, 1.0, 1.0, 1.0, 1.0, 1.0]])  # 跳过 2 根
+        self.assertTrue(_wait_until(lambda: self.server.connections.get(self.STREAM, 0) >= 2))
+        status = self.feed.status()["BTC/USDT_1h"]
+        self.assertGreaterEqual(status["resyncs"], 2)
+        self.assertEqual(self.feed.latest_window("BTC/USDT"), None)  # 重连后尚无推送, 回退 REST
+        self.assertEqual(len(self.feed.fetch_ohlcv("BTC/USDT")), 500)
+
+    def test_bad_symbol_stops_subscription(self):
+        requests, fetch = [], self.exchange.fetch_ohlcv
+
+        async def counting_fetch(symbol, *args, **kwargs):
+            requests.append(symbol)  # exchange.calls 只记录成功的请求
+            return await fetch(symbol, *args, **kwargs)
+
+        self.exchange.fetch_ohlcv = counting_fetch
+        subscription, = self.feed.subscribe(["NOPE/USDT"])
+        self.assertTrue(_wait_until(lambda: subscription.task is not None and subscription.task.done()))
+        self.assertFalse(self.feed.wait_ready("NOPE/USDT", timeout=1))
+        status = self.feed.status()["NOPE/USDT_1h"]
+        self.assertTrue(status["failed"])
+        self.assertIn("NOPE/USDT", status["error"])
+
+        # 再次订阅 (如页面重跑) 不会重启任务, 也不再请求交易所
+        self.assertEqual(requests, ["NOPE/USDT"])
+        self.assertIs(self.feed.subscribe(["NOPE/USDT"])[0], subscription)
+        time.sleep(0.3)
+        self.assertEqual(requests, ["NOPE/USDT"])
+        with self.assertRaises(DataFeedError):
+            self.feed.fetch_ohlcv("NOPE/USDT")
+
+
 # ──────────────────────────────────────────────────────────
 
 if __name__ == "__main__":